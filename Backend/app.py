@@ -1,17 +1,30 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
+import json
+import multiprocessing
+import os
+import tempfile
 import threading
 import cv2
 import numpy as np
 from io import BytesIO
 import time
 
-from config import get_config, Config
+from config import get_config, load_signal_timings, Config
 from logger import setup_logger
-from vehicle_detector import VehicleDetector
-from signal_controller import TrafficSignalController
-from object_tracker import ObjectTracker
+from vehicle_detector import DetectorLoader, DetectorNotReadyError
+from detector_pool import create_detector
+from detection_executor import DetectionBusyError, DetectionExecutor
+from signal_controller import create_signal_controller
+from signal_scheduler import SignalScheduler
+from object_tracker import TrackerRegistry
+from detection_cache import DetectionCache, analysis_size
+from camera_capture import CaptureManager
+from state_snapshot import StateSnapshotter
+from timing_strategies import STRATEGIES
+from corridor_coordinator import GreenWaveCoordinator
+from emergency_preemption import EmergencyPreemptor
 
 
 app = Flask(__name__)
@@ -20,18 +33,105 @@ CORS(app)
 config = get_config()
 logger = setup_logger(__name__)
 
-vehicle_detector = VehicleDetector()
-signal_controller = TrafficSignalController()
-object_tracker = ObjectTracker()
-
+# Spawned detector pool workers re-import this module, and in debug `python app.py` runs twice: a
+# Werkzeug reloader parent that only watches files and the serving child (WERKZEUG_RUN_MAIN=true).
+# Only the process that serves requests loads the model and starts the background threads.
+reloader_parent = __name__ == "__main__" and config.DEBUG and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+start_services = multiprocessing.parent_process() is None and not reloader_parent
+
+detector_loader = DetectorLoader(factory=create_detector)
+if start_services:
+    detector_loader.start()
+signal_controller = create_signal_controller()
+tracker_registry = TrackerRegistry(flow_listener=signal_controller.update_flow_rates)
+detection_cache = DetectionCache()
+detection_executor = DetectionExecutor()
+
+signal_timings = load_signal_timings(config.SIGNAL_TIMINGS_PATH)
 for intersection in config.INTERSECTIONS:
-    signal_controller.initialize_intersection(intersection.intersection_id)
+    signal_controller.initialize_intersection(
+        intersection.intersection_id,
+        strategy=intersection.timing_strategy,
+        signal_timing=signal_timings.get(intersection.intersection_id, intersection.signal_timings)
+    )
+
+state_snapshotter = StateSnapshotter(signal_controller, tracker_registry)
+if config.SNAPSHOT_ENABLED and start_services:
+    state_snapshotter.restore()
+    state_snapshotter.start()
+
+corridor_coordinator = GreenWaveCoordinator(signal_controller)
+if start_services:
+    corridor_coordinator.start()
+
+signal_scheduler = SignalScheduler(signal_controller)
+if config.SIGNAL_SCHEDULER_ENABLED and start_services:
+    signal_scheduler.start()
+
+emergency_preemptor = EmergencyPreemptor(signal_controller)
+
+capture_manager = CaptureManager(
+    config.INTERSECTIONS, detector_loader.get, signal_controller, tracker_registry, emergency_preemptor
+)
+if config.CAPTURE_ENABLED and start_services:
+    capture_manager.start()
 
 simulation_running = False
 current_frame = None
 current_analysis = None
 
 
+def detect_cached(data: bytes, decode, kind: str = "image"):
+    """
+    Run detection on uploaded bytes through the shared detection cache.
+    
+    Decoding and inference run on the detection executor, so the request
+    thread only waits and never competes with signal-state reads for CPU.
+    
+    Args:
+        data: Raw uploaded bytes, hashed for the cache key
+        decode: Callable returning (frame or None) from data; only called on a miss
+        kind: Upload type, so an image and a video never share an entry
+        
+    Returns:
+        Tuple of (FrameAnalysis or None if decoding failed, decoded frame or None on a hit)
+        
+    Raises:
+        DetectorNotReadyError: If the model is still loading
+        DetectionBusyError: If the detection executor is saturated
+        RuntimeError: If inference failed; nothing is cached for the upload
+    """
+    vehicle_detector = detector_loader.get()
+    key = DetectionCache.make_key(
+        data,
+        kind,
+        vehicle_detector.model_id,
+        vehicle_detector.confidence_threshold
+    )
+    analysis = detection_cache.get(key)
+    if analysis is not None:
+        return analysis, None
+    
+    def analyze():
+        frame = decode(data)
+        if frame is None:
+            return None, None
+        analysis = vehicle_detector.detect_vehicles(frame)
+        if analysis is None:
+            raise RuntimeError("Vehicle detection failed")
+        return analysis, frame
+    
+    analysis, frame = detection_executor.run(analyze)
+    if analysis is None:
+        return None, None
+    detection_cache.put(key, analysis, analysis_size(analysis))
+    return analysis, frame
+
+
+def decode_image(data: bytes):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({
@@ -41,6 +141,13 @@ def health():
     }), 200
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    status = detector_loader.status()
+    status["timestamp"] = datetime.now().isoformat()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 @app.route("/api/intersections", methods=["GET"])
 def get_intersections():
     try:
@@ -59,6 +166,20 @@ def get_intersections():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/intersections/signals", methods=["GET"])
+def get_all_signals():
+    try:
+        table = signal_controller.get_status_table()
+        return jsonify({
+            "count": len(table["intersection_ids"]),
+            "signals": table,
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting signal table: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/intersection/<intersection_id>/status", methods=["GET"])
 def get_intersection_status(intersection_id):
     try:
@@ -71,6 +192,23 @@ def get_intersection_status(intersection_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/intersection/<intersection_id>/flow", methods=["GET"])
+def get_intersection_flow(intersection_id):
+    try:
+        if not signal_controller.get_signal_state(intersection_id):
+            return jsonify({"error": "Intersection not found"}), 404
+        
+        snapshots = tracker_registry.flow_snapshots(intersection_id, request.args.get("direction"))
+        return jsonify({
+            "intersection_id": intersection_id,
+            "directions": {direction: snapshot for (_, direction), snapshot in snapshots.items()},
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting intersection flow: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/intersection/<intersection_id>/signal/state", methods=["GET"])
 def get_signal_state(intersection_id):
     try:
@@ -150,8 +288,65 @@ def update_vehicle_count(intersection_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/intersection/<intersection_id>/strategy", methods=["POST"])
+def set_timing_strategy(intersection_id):
+    try:
+        data = request.get_json()
+        strategy = data.get("strategy")
+        
+        if strategy not in STRATEGIES:
+            return jsonify({"error": f"Strategy must be one of {sorted(STRATEGIES)}"}), 400
+        if not signal_controller.set_strategy(intersection_id, strategy):
+            return jsonify({"error": "Intersection not found"}), 404
+        
+        return jsonify({
+            "status": "updated",
+            "intersection_id": intersection_id,
+            "timing_strategy": strategy,
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error setting timing strategy: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def spool_upload(file_storage, suffix: str = "") -> str:
+    """
+    Copy an upload to a temp file in fixed-size chunks.
+    
+    Returns:
+        Path of the temp file
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload_")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = file_storage.stream.read(Config.VIDEO_UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                spool.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
 @app.route("/api/video/process", methods=["POST"])
 def process_video():
+    """
+    Stream per-frame vehicle counts for an uploaded clip as NDJSON.
+    
+    Form fields: video (file), intersection_id, direction, frame_stride
+    (analyze every Nth frame), start_seconds and end_seconds (time window).
+    One JSON line is emitted per analyzed frame while decoding continues,
+    and the last line holds the aggregate summary, including the clip's
+    flow rates measured on stream time. The live trackers and the flow
+    rates the controller sees are left untouched.
+    
+    Clips are not cached: a replay would have to hold every per-frame line
+    and repeat the signal updates, and memory must stay flat in clip length.
+    """
+    path = None
     try:
         if "video" not in request.files:
             return jsonify({"error": "No video file provided"}), 400
@@ -159,38 +354,101 @@ def process_video():
         video_file = request.files["video"]
         intersection_id = request.form.get("intersection_id", "INT_001")
         direction = request.form.get("direction", "north")
+        frame_stride = max(1, int(request.form.get("frame_stride", Config.VIDEO_FRAME_STRIDE)))
+        start_seconds = max(0.0, float(request.form.get("start_seconds", 0)))
+        end_seconds = request.form.get("end_seconds")
+        end_seconds = float(end_seconds) if end_seconds else None
         
-        stream = BytesIO(video_file.read())
-        nparr = np.frombuffer(stream.getvalue(), np.uint8)
+        vehicle_detector = detector_loader.get()
         
-        cap = cv2.VideoCapture()
-        retval = cap.open(cv2.CAP_FFMPEG)
-        
-        success, frame = cap.read()
-        cap.release()
-        
-        if not success:
+        path = spool_upload(video_file, os.path.splitext(video_file.filename or "")[1])
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            cap.release()
+            os.remove(path)
             return jsonify({"error": "Failed to read video"}), 400
+        if start_seconds > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_seconds * 1000)
         
-        analysis = vehicle_detector.detect_vehicles(frame)
+        # The clip gets its own trackers on stream time: it decodes faster than real time, so the live
+        # approach's tracker would mix it in and push inflated flow rates to the signal controller.
+        clip_trackers = TrackerRegistry(stop_lines=tracker_registry.stop_lines, **tracker_registry.tracker_kwargs)
         
-        signal_controller.update_vehicle_counts(
-            intersection_id,
-            direction,
-            analysis.total_vehicles,
-            analysis.emergency_vehicles
-        )
+        def generate():
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            frames_analyzed = 0
+            vehicle_sum = 0
+            max_vehicles = 0
+            peak_emergency = 0
+            emergency_types = set()
+            last_analysis = None
+            frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            try:
+                while True:
+                    if not cap.grab():
+                        break
+                    frame_time = frame_index / fps
+                    if end_seconds is not None and frame_time > end_seconds:
+                        break
+                    
+                    if frame_index % frame_stride == 0:
+                        success, frame = cap.retrieve()
+                        analysis = None
+                        if success:
+                            # The stream was already accepted, so wait for a slot rather than fail mid-clip.
+                            analysis = detection_executor.run(vehicle_detector.detect_vehicles, frame, block=True)
+                        # A frame the detector failed on is skipped; it is not evidence of an empty road.
+                        if analysis is not None:
+                            clip_trackers.update(intersection_id, direction, analysis, timestamp=frame_time)
+                            last_analysis = analysis
+                            frames_analyzed += 1
+                            vehicle_sum += analysis.total_vehicles
+                            max_vehicles = max(max_vehicles, analysis.total_vehicles)
+                            peak_emergency = max(peak_emergency, analysis.emergency_vehicles)
+                            emergency_types.update(analysis.emergency_types)
+                            yield json.dumps({
+                                "frame": frame_index,
+                                "time": round(frame_time, 3),
+                                "total_vehicles": analysis.total_vehicles,
+                                "vehicle_breakdown": analysis.vehicle_breakdown,
+                                "emergency_vehicles": analysis.emergency_vehicles
+                            }) + "\n"
+                    frame_index += 1
+                
+                if last_analysis is not None:
+                    signal_controller.update_vehicle_counts(
+                        intersection_id,
+                        direction,
+                        last_analysis.total_vehicles,
+                        last_analysis.emergency_vehicles
+                    )
+                
+                summary = {
+                    "intersection_id": intersection_id,
+                    "direction": direction,
+                    "frames_analyzed": frames_analyzed,
+                    "frame_stride": frame_stride,
+                    "mean_vehicles": vehicle_sum / frames_analyzed if frames_analyzed else 0.0,
+                    "max_vehicles": max_vehicles,
+                    "peak_emergency_vehicles": peak_emergency,
+                    "emergency_types": sorted(emergency_types),
+                    "flow": clip_trackers.flow_snapshots(intersection_id, direction).get((intersection_id, direction)),
+                    "timestamp": datetime.now().isoformat()
+                }
+                yield json.dumps({"summary": summary}) + "\n"
+            except Exception as e:
+                logger.error(f"Error processing video: {e}")
+                yield json.dumps({"error": str(e)}) + "\n"
+            finally:
+                cap.release()
+                os.remove(path)
         
-        return jsonify({
-            "intersection_id": intersection_id,
-            "direction": direction,
-            "total_vehicles": analysis.total_vehicles,
-            "vehicle_breakdown": analysis.vehicle_breakdown,
-            "emergency_vehicles": analysis.emergency_vehicles,
-            "emergency_types": analysis.emergency_types,
-            "timestamp": datetime.now().isoformat()
-        }), 200
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    except DetectorNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
+        if path and os.path.exists(path):
+            os.remove(path)
         logger.error(f"Error processing video: {e}")
         return jsonify({"error": str(e)}), 500
 
@@ -201,18 +459,17 @@ def detect_from_image():
         if "image" not in request.files:
             return jsonify({"error": "No image file provided"}), 400
         
+        received_at = time.monotonic()
         image_file = request.files["image"]
         intersection_id = request.form.get("intersection_id", "INT_001")
         direction = request.form.get("direction", "north")
         
-        nparr = np.frombuffer(image_file.read(), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if frame is None:
+        analysis, _ = detect_cached(image_file.read(), decode_image)
+        if analysis is None:
             return jsonify({"error": "Invalid image file"}), 400
         
-        analysis = vehicle_detector.detect_vehicles(frame)
-        
+        emergency_preemptor.observe(intersection_id, direction, analysis.emergency_vehicles, received_at)
+        tracker_registry.update(intersection_id, direction, analysis)
         signal_controller.update_vehicle_counts(
             intersection_id,
             direction,
@@ -238,6 +495,10 @@ def detect_from_image():
             ],
             "timestamp": datetime.now().isoformat()
         }), 200
+    except DetectorNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except DetectionBusyError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error detecting from image: {e}")
         return jsonify({"error": str(e)}), 500
@@ -250,40 +511,155 @@ def get_detection_visualization():
             return jsonify({"error": "No image file provided"}), 400
         
         image_file = request.files["image"]
-        nparr = np.frombuffer(image_file.read(), np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        data = image_file.read()
         
-        if frame is None:
+        analysis, frame = detect_cached(data, decode_image)
+        if analysis is None:
             return jsonify({"error": "Invalid image file"}), 400
         
-        analysis = vehicle_detector.detect_vehicles(frame)
-        output_frame = vehicle_detector.draw_detections(frame, analysis)
+        def render(frame):
+            if frame is None:
+                frame = decode_image(data)
+            output_frame = detector_loader.get().draw_detections(frame, analysis)
+            return cv2.imencode('.png', output_frame)[1]
         
-        _, buffer = cv2.imencode('.png', output_frame)
+        buffer = detection_executor.run(render, frame)
         img_io = BytesIO(buffer)
         img_io.seek(0)
         
         return send_file(img_io, mimetype='image/png')
+    except DetectorNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except DetectionBusyError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error generating visualization: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/detection/stats", methods=["GET"])
+def get_detection_stats():
+    try:
+        vehicle_detector = detector_loader.get()
+        return jsonify({
+            "motion_gate": vehicle_detector.get_gate_stats(),
+            "pool": vehicle_detector.pool.get_stats() if vehicle_detector.pool else None,
+            "executor": detection_executor.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except DetectorNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logger.error(f"Error getting detection stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def get_cache_stats():
+    try:
+        return jsonify({
+            "detection_cache": detection_cache.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting cache stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/scheduler/stats", methods=["GET"])
+def get_scheduler_stats():
+    try:
+        return jsonify({
+            "scheduler": signal_scheduler.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting scheduler stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/emergency/stats", methods=["GET"])
+def get_emergency_stats():
+    try:
+        return jsonify({
+            "emergency": emergency_preemptor.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting emergency stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/corridors", methods=["GET"])
+def get_corridors():
+    try:
+        return jsonify({
+            "coordination": corridor_coordinator.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting corridors: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/corridor/<corridor_id>/coordinate", methods=["POST"])
+def coordinate_corridor(corridor_id):
+    try:
+        if corridor_id not in corridor_coordinator.planners:
+            return jsonify({"error": "Corridor not found"}), 404
+        plan = corridor_coordinator.coordinate(corridor_id)
+        plan["timestamp"] = datetime.now().isoformat()
+        return jsonify(plan), 200
+    except Exception as e:
+        logger.error(f"Error coordinating corridor: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/snapshot/stats", methods=["GET"])
+def get_snapshot_stats():
+    try:
+        return jsonify({
+            "snapshot": state_snapshotter.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }), 200
+    except Exception as e:
+        logger.error(f"Error getting snapshot stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/capture/stats", methods=["GET"])
+def get_capture_stats():
+    try:
+        stats = capture_manager.get_stats()
+        stats["timestamp"] = datetime.now().isoformat()
+        return jsonify(stats), 200
+    except Exception as e:
+        logger.error(f"Error getting capture stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/tracker/state", methods=["GET"])
 def get_tracker_state():
     try:
-        active_objects = object_tracker.get_active_objects()
+        intersection_id = request.args.get("intersection_id")
+        direction = request.args.get("direction")
+        tracks = tracker_registry.active_objects(intersection_id, direction)
+        objects = [
+            {
+                "id": obj.id,
+                "intersection_id": key[0],
+                "direction": key[1],
+                "class": obj.class_name,
+                "center": obj.center,
+                "confidence": obj.confidence
+            }
+            for key, active_objects in tracks.items()
+            for obj in active_objects
+        ]
         return jsonify({
-            "active_objects": len(active_objects),
-            "objects": [
-                {
-                    "id": obj.id,
-                    "class": obj.class_name,
-                    "center": obj.center,
-                    "confidence": obj.confidence
-                }
-                for obj in active_objects
-            ],
+            "active_objects": len(objects),
+            "trackers": len(tracks),
+            "objects": objects,
             "timestamp": datetime.now().isoformat()
         }), 200
     except Exception as e:
@@ -294,9 +670,11 @@ def get_tracker_state():
 @app.route("/api/tracker/reset", methods=["POST"])
 def reset_tracker():
     try:
-        object_tracker.reset()
+        data = request.get_json(silent=True) or {}
+        count = tracker_registry.reset(data.get("intersection_id"), data.get("direction"))
         return jsonify({
             "status": "tracker reset",
+            "trackers_reset": count,
             "timestamp": datetime.now().isoformat()
         }), 200
     except Exception as e:
@@ -336,8 +714,12 @@ def internal_error(error):
 
 if __name__ == "__main__":
     logger.info(f"Starting Traffic Management System API - {config.ENVIRONMENT} mode")
-    app.run(
-        host=config.API_HOST,
-        port=config.API_PORT,
-        debug=config.DEBUG
-    )
+    if config.DEBUG:
+        app.run(
+            host=config.API_HOST,
+            port=config.API_PORT,
+            debug=config.DEBUG
+        )
+    else:
+        from serve import serve
+        serve(app)
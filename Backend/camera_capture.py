@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+import cv2
+import numpy as np
+from config import Config, IntersectionConfig, camera_key
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class CapturedFrame:
+    frame: np.ndarray
+    captured_at: float
+    sequence: int
+
+
+class LatestFrameBuffer:
+    """
+    Single-slot frame buffer. A new frame replaces any unread one, so a
+    slow consumer always gets the freshest frame and never builds up lag.
+    """
+    
+    def __init__(self, notify: Optional[threading.Event] = None):
+        self._lock = threading.Lock()
+        self._latest: Optional[CapturedFrame] = None
+        self._notify = notify
+        self.dropped = 0
+    
+    def put(self, captured: CapturedFrame) -> None:
+        with self._lock:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = captured
+        if self._notify is not None:
+            self._notify.set()
+    
+    def take(self) -> Optional[CapturedFrame]:
+        with self._lock:
+            captured, self._latest = self._latest, None
+            return captured
+
+
+def parse_source(source: Union[str, int]) -> Union[str, int]:
+    """Camera URLs that are plain integers are local device indices."""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+
+class CameraReader(threading.Thread):
+    """
+    Reads one camera (device index, stream URL or local video file) into a
+    LatestFrameBuffer. Video files are paced at their native fps and looped,
+    so recorded footage can stand in for a live camera.
+    """
+    
+    def __init__(
+        self,
+        intersection_id: str,
+        direction: str,
+        source: Union[str, int],
+        notify: Optional[threading.Event] = None,
+        reconnect_delay: float = Config.CAPTURE_RECONNECT_DELAY,
+        loop_files: bool = Config.CAPTURE_LOOP_FILES
+    ):
+        super().__init__(name=f"camera-{intersection_id}-{direction}", daemon=True)
+        self.intersection_id = intersection_id
+        self.direction = direction
+        self.key = camera_key(intersection_id, direction)
+        self.source = parse_source(source)
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        self.reconnect_delay = reconnect_delay
+        self.loop_files = loop_files
+        self.buffer = LatestFrameBuffer(notify)
+        
+        self.connected = False
+        self.frames_read = 0
+        self.fps = 0.0
+        self.last_error: Optional[str] = None
+        self._stop_event = threading.Event()
+    
+    def stop(self) -> None:
+        self._stop_event.set()
+    
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                cap.release()
+                self.last_error = f"Could not open camera source {self.source}"
+                logger.warning(f"{self.key}: {self.last_error}, retrying in {self.reconnect_delay}s")
+                self._stop_event.wait(self.reconnect_delay)
+                continue
+            
+            self.connected = True
+            self.last_error = None
+            logger.info(f"{self.key}: connected to {self.source}")
+            try:
+                self._read_loop(cap)
+            finally:
+                cap.release()
+                self.connected = False
+            
+            if self.is_file and not self.loop_files:
+                break
+            if not self._stop_event.is_set() and not self.is_file:
+                logger.warning(f"{self.key}: stream ended, reconnecting in {self.reconnect_delay}s")
+                self._stop_event.wait(self.reconnect_delay)
+    
+    def _read_loop(self, cap: cv2.VideoCapture) -> None:
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25.0) if self.is_file else 0.0
+        next_frame_at = time.monotonic()
+        window_start = time.monotonic()
+        window_frames = 0
+        
+        while not self._stop_event.is_set():
+            if frame_interval:
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                next_frame_at = max(next_frame_at + frame_interval, time.monotonic() - frame_interval)
+            
+            success, frame = cap.read()
+            if not success:
+                return
+            
+            now = time.monotonic()
+            self.frames_read += 1
+            self.buffer.put(CapturedFrame(frame=frame, captured_at=now, sequence=self.frames_read))
+            
+            window_frames += 1
+            if now - window_start >= 1.0:
+                self.fps = window_frames / (now - window_start)
+                window_start = now
+                window_frames = 0
+
+
+class CaptureScheduler(threading.Thread):
+    """
+    Feeds the latest frame of every camera through the detector in one batch
+    and pushes the counts into the signal controller. Emergency vehicles
+    go to the emergency preemptor first, ahead of the tracker and counts.
+    """
+    
+    def __init__(
+        self,
+        readers: List[CameraReader],
+        detector_getter: Callable,
+        signal_controller,
+        frame_available: threading.Event,
+        tracker_registry=None,
+        emergency_preemptor=None,
+        idle_wait: float = Config.CAPTURE_IDLE_WAIT
+    ):
+        super().__init__(name="capture-scheduler", daemon=True)
+        self.readers = readers
+        self.detector_getter = detector_getter
+        self.signal_controller = signal_controller
+        self.tracker_registry = tracker_registry
+        self.emergency_preemptor = emergency_preemptor
+        self.frame_available = frame_available
+        self.idle_wait = idle_wait
+        self.frame_age: Dict[str, Dict[str, float]] = {
+            reader.key: {"last_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0, "processed": 0}
+            for reader in readers
+        }
+        self.batches = 0
+        self._stop_event = threading.Event()
+    
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.frame_available.set()
+    
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.frame_available.wait(self.idle_wait)
+            self.frame_available.clear()
+            if self._stop_event.is_set():
+                break
+            
+            try:
+                detector = self.detector_getter()
+            except Exception:
+                continue  # model still loading; frames keep being replaced meanwhile
+            
+            pending = []
+            for reader in self.readers:
+                captured = reader.buffer.take()
+                if captured is not None:
+                    pending.append((reader, captured))
+            if not pending:
+                continue
+            
+            try:
+                analyses = detector.detect_vehicles_batch(
+                    [captured.frame for _, captured in pending],
+                    [reader.key for reader, _ in pending]
+                )
+            except Exception as e:
+                logger.error(f"Capture batch detection failed: {e}")
+                continue
+            
+            for (reader, captured), analysis in zip(pending, analyses):
+                if analysis is None:
+                    continue  # nothing was observed; keep the camera's last state until a real analysis
+                if self.emergency_preemptor is not None:
+                    self.emergency_preemptor.observe(
+                        reader.intersection_id,
+                        reader.direction,
+                        analysis.emergency_vehicles,
+                        captured.captured_at
+                    )
+                if self.tracker_registry is not None:
+                    self.tracker_registry.update(reader.intersection_id, reader.direction, analysis)
+                self.signal_controller.update_vehicle_counts(
+                    reader.intersection_id,
+                    reader.direction,
+                    analysis.total_vehicles,
+                    analysis.emergency_vehicles
+                )
+                self._record_age(reader.key, time.monotonic() - captured.captured_at)
+            self.batches += 1
+    
+    def _record_age(self, key: str, age_seconds: float) -> None:
+        stats = self.frame_age[key]
+        age_ms = age_seconds * 1000
+        stats["processed"] += 1
+        stats["last_ms"] = age_ms
+        stats["max_ms"] = max(stats["max_ms"], age_ms)
+        stats["mean_ms"] += (age_ms - stats["mean_ms"]) / stats["processed"]
+
+
+class CaptureManager:
+    """Owns the camera readers and the scheduler for all configured intersections."""
+    
+    def __init__(
+        self,
+        intersections: List[IntersectionConfig],
+        detector_getter: Callable,
+        signal_controller,
+        tracker_registry=None,
+        emergency_preemptor=None
+    ):
+        self.frame_available = threading.Event()
+        self.readers = [
+            CameraReader(intersection.intersection_id, direction, source, notify=self.frame_available)
+            for intersection in intersections
+            for direction, source in intersection.camera_urls.items()
+        ]
+        self.scheduler = CaptureScheduler(
+            self.readers, detector_getter, signal_controller, self.frame_available, tracker_registry, emergency_preemptor
+        )
+        self.running = False
+    
+    def start(self) -> None:
+        if self.running:
+            return
+        for reader in self.readers:
+            reader.start()
+        self.scheduler.start()
+        self.running = True
+        logger.info(f"Camera capture started for {len(self.readers)} cameras")
+    
+    def stop(self) -> None:
+        for reader in self.readers:
+            reader.stop()
+        self.scheduler.stop()
+        self.running = False
+    
+    def get_stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "batches": self.scheduler.batches,
+            "cameras": {
+                reader.key: {
+                    "source": str(reader.source),
+                    "connected": reader.connected,
+                    "fps": round(reader.fps, 2),
+                    "frames_read": reader.frames_read,
+                    "frames_dropped": reader.buffer.dropped,
+                    "frame_age": self.scheduler.frame_age[reader.key],
+                    "last_error": reader.last_error
+                }
+                for reader in self.readers
+            }
+        }
@@ -1,7 +1,8 @@
+import json
 import os
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, fields
+from typing import Dict, List, Tuple
 
 
 class TrafficLightState(Enum):
@@ -15,6 +16,7 @@ class SignalTiming:
     min_duration: int = 10
     max_duration: int = 60
     yellow_duration: int = 3
+    saturation_count: int = 50  # queued vehicles at which the linear rule gives max_duration
 
 
 @dataclass
@@ -25,10 +27,37 @@ class IntersectionConfig:
     longitude: float
     camera_urls: dict
     signal_timings: SignalTiming = None
+    camera_rois: dict = None
+    stop_lines: dict = None
+    timing_strategy: str = None
     
     def __post_init__(self):
         if self.signal_timings is None:
             self.signal_timings = SignalTiming()
+        if self.camera_rois is None:
+            self.camera_rois = {}
+        if self.stop_lines is None:
+            self.stop_lines = {}
+    
+    def camera_key(self, direction: str) -> str:
+        return camera_key(self.intersection_id, direction)
+
+
+@dataclass
+class CorridorConfig:
+    """
+    An arterial to run as a green wave: intersection_ids in travel order,
+    and the signal direction that serves traffic travelling along it.
+    """
+    corridor_id: str
+    intersection_ids: List[str]
+    direction: str
+    design_speed: float = None  # km/h; Config.CORRIDOR_DESIGN_SPEED when None
+
+
+def camera_key(intersection_id: str, direction: str) -> str:
+    """Key identifying one camera (intersection approach) across the backend."""
+    return f"{intersection_id}/{direction}"
 
 
 class Config:
@@ -38,19 +67,97 @@ class Config:
     YOLO_MODEL = "yolo11n.pt"
     CONFIDENCE_THRESHOLD = 0.5
     
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+    INFERENCE_INT8 = os.getenv("INFERENCE_INT8", "false").lower() == "true"
+    INFERENCE_INT8_CALIBRATION_DATA = os.getenv("INFERENCE_INT8_CALIBRATION_DATA", "coco8.yaml")
+    INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", 640))
+    MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "model_cache")
+    MODEL_WARMUP_ITERATIONS = int(os.getenv("MODEL_WARMUP_ITERATIONS", 2))
+    
+    DETECTOR_POOL_SIZE = int(os.getenv("DETECTOR_POOL_SIZE", 0))
+    DETECTOR_POOL_SLOTS = int(os.getenv("DETECTOR_POOL_SLOTS", 4))
+    DETECTOR_POOL_MAX_FRAME_BYTES = int(os.getenv("DETECTOR_POOL_MAX_FRAME_BYTES", 1920 * 1080 * 3))
+    DETECTOR_POOL_TORCH_THREADS = int(os.getenv("DETECTOR_POOL_TORCH_THREADS", 1))
+    DETECTOR_POOL_RESTART_BACKOFF = 2.0  # seconds before retrying a worker whose model failed to load
+    DETECTOR_POOL_MAX_RESTART_BACKOFF = 60.0
+    
+    DETECTION_MAX_BATCH_SIZE = int(os.getenv("DETECTION_MAX_BATCH_SIZE", 8))
+    # Upload detection runs on its own threads; requests beyond DETECTION_MAX_PENDING get 503.
+    # DETECTION_TIMEOUT also bounds waits on DetectorPool workers. Without a pool the model calls
+    # themselves are serialized, so extra workers only overlap decoding.
+    DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", 2))
+    DETECTION_MAX_PENDING = int(os.getenv("DETECTION_MAX_PENDING", 8))
+    DETECTION_TIMEOUT = float(os.getenv("DETECTION_TIMEOUT", 30))
+    
+    MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true"
+    MOTION_GATE_THRESHOLD = float(os.getenv("MOTION_GATE_THRESHOLD", 2.5))
+    MOTION_GATE_SIZE = (96, 54)
+    MOTION_GATE_MAX_SKIPPED = 50
+    
+    DETECTION_CACHE_MAX_ENTRIES = int(os.getenv("DETECTION_CACHE_MAX_ENTRIES", 256))
+    DETECTION_CACHE_MAX_BYTES = int(os.getenv("DETECTION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    DETECTION_CACHE_TTL = float(os.getenv("DETECTION_CACHE_TTL", 300))
+    
+    VIDEO_FRAME_STRIDE = int(os.getenv("VIDEO_FRAME_STRIDE", 5))
+    VIDEO_UPLOAD_CHUNK_BYTES = 1024 * 1024
+    
+    CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+    CAPTURE_RECONNECT_DELAY = float(os.getenv("CAPTURE_RECONNECT_DELAY", 5))
+    CAPTURE_LOOP_FILES = True
+    CAPTURE_IDLE_WAIT = 0.5
+    
     VEHICLE_CLASSES = ["car", "truck", "bus", "motorcycle", "bicycle"]
     EMERGENCY_CLASSES = ["ambulance", "fire_truck", "police"]
     
     MAX_TRACKING_DISTANCE = 50
+    TRACKER_HUNGARIAN_MAX_SIZE = 500
+    TRACKER_MODE = os.getenv("TRACKER_MODE", "centroid")
+    TRACKER_IOU_THRESHOLD = 0.3
+    TRACKER_IDLE_TIMEOUT = float(os.getenv("TRACKER_IDLE_TIMEOUT", 300))
+    
+    FLOW_WINDOW_SECONDS = float(os.getenv("FLOW_WINDOW_SECONDS", 60))
+    FLOW_BIN_SECONDS = 1.0
+    
+    SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "true").lower() == "true"
+    SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "traffic_state.npz")
+    SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", 5))
     
     SIGNAL_MIN_TIME = 10
     SIGNAL_MAX_TIME = 60
     SIGNAL_YELLOW_TIME = 3
+    SIGNAL_CONTROLLER = os.getenv("SIGNAL_CONTROLLER", "object")
+    SIGNAL_SCHEDULER_ENABLED = os.getenv("SIGNAL_SCHEDULER_ENABLED", "true").lower() == "true"
+    SIGNAL_LOCK_STRIPES = int(os.getenv("SIGNAL_LOCK_STRIPES", 64))
+    # Per-intersection SignalTiming overrides, as written by timing_tuner
+    SIGNAL_TIMINGS_PATH = os.getenv("SIGNAL_TIMINGS_PATH", "signal_timings.json")
+    SCHEDULER_JITTER_SAMPLES = 4096
+    
+    # Timing strategy: "linear", "webster" or "max_pressure" (per-intersection override in IntersectionConfig)
+    SIGNAL_STRATEGY = os.getenv("SIGNAL_STRATEGY", "linear")
+    SATURATION_FLOW = 30.0  # vehicles per minute per approach during green
+    WEBSTER_LOST_TIME = 4.0  # seconds lost per phase
+    WEBSTER_MAX_CYCLE = 120
+    
+    EMERGENCY_CONFIRM_FRAMES = 2  # consecutive frames with an emergency vehicle before preempting
+    EMERGENCY_CLEAR_FRAMES = 5  # consecutive frames without one before releasing
+    EMERGENCY_MAX_HOLD = 120  # seconds; a detected preemption never holds green longer
+    EMERGENCY_MANUAL_HOLD = 30  # seconds an operator-triggered preemption holds green
+    EMERGENCY_LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    
+    CORRIDOR_DESIGN_SPEED = 50.0  # km/h
+    CORRIDOR_RECOORDINATE_INTERVAL = float(os.getenv("CORRIDOR_RECOORDINATE_INTERVAL", 60))
+    CORRIDOR_DEMAND_TOLERANCE = 0.15  # relative demand change that triggers re-coordination
+    
+    SIMULATION_SAMPLE_INTERVAL = 1.0  # seconds between simulated camera counts
+    SIMULATION_FLOW_INTERVAL = 10.0  # seconds between simulated flow rate updates
     
     DB_URL = os.getenv("DATABASE_URL", "sqlite:///traffic.db")
     
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", 5000))
+    # Production server (serve.py) request threads; keep above DETECTION_MAX_PENDING.
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", 16))
+    SERVER_CONNECTION_LIMIT = int(os.getenv("SERVER_CONNECTION_LIMIT", 256))
     
     INTERSECTIONS: List[IntersectionConfig] = [
         IntersectionConfig(
@@ -67,6 +174,8 @@ class Config:
         ),
     ]
     
+    CORRIDORS: List[CorridorConfig] = []
+    
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "traffic_system.log")
 
@@ -81,6 +190,24 @@ class ProductionConfig(Config):
     YOLO_MODEL = "yolo11.pt"
 
 
+def load_signal_timings(path: str = Config.SIGNAL_TIMINGS_PATH) -> Dict[str, SignalTiming]:
+    """
+    Per-intersection signal timings from a timing_tuner output file.
+    
+    Returns:
+        SignalTiming by intersection id; empty if the file does not exist
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        entries = json.load(f)["intersections"]
+    names = {field.name for field in fields(SignalTiming)}
+    return {
+        intersection_id: SignalTiming(**{key: value for key, value in entry.items() if key in names})
+        for intersection_id, entry in entries.items()
+    }
+
+
 def get_config():
     config_map = {
         "development": DevelopmentConfig,
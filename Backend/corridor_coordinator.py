@@ -0,0 +1,313 @@
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config, CorridorConfig, IntersectionConfig, SignalTiming
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@dataclass
+class CoordinationPlan:
+    """
+    Fixed-time plan for one coordinated intersection.
+    
+    Directions turn green in order, each for its green followed by the
+    yellow clearance, so the cycle is sum(greens) + yellow per direction.
+    A cycle begins (the first direction turns green) at origin and every
+    cycle_length seconds before and after it on the monotonic clock.
+    """
+    origin: float
+    directions: List[str]
+    greens: List[float]
+    yellow: float
+    starts: List[float] = field(init=False)
+    cycle_length: float = field(init=False)
+    
+    def __post_init__(self):
+        self.starts = np.concatenate([[0.0], np.cumsum(np.asarray(self.greens) + self.yellow)[:-1]]).tolist()
+        self.cycle_length = float(sum(self.greens) + self.yellow * len(self.greens))
+    
+    def phase_at(self, now: float) -> Tuple[int, bool, float]:
+        """
+        Where the plan is at a monotonic time.
+        
+        Returns:
+            Tuple of (direction index, whether it is in its green rather
+            than its yellow, seconds until that part of the phase ends)
+        """
+        position = (now - self.origin) % self.cycle_length
+        index = bisect.bisect_right(self.starts, position) - 1
+        into = position - self.starts[index]
+        green = self.greens[index]
+        if into < green:
+            return index, True, green - into
+        return index, False, max(green + self.yellow - into, 0.0)
+
+
+def haversine(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in meters between consecutive points."""
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CorridorPlanner:
+    """
+    Offset and split solver for one corridor.
+    
+    Everything that depends only on geometry (travel time from the first
+    intersection to each of the others at the design speed, each
+    intersection's phase order starting from the corridor direction) is
+    computed once here, so solve() for new demand is a handful of array
+    operations over the corridor.
+    """
+    
+    def __init__(
+        self,
+        corridor: CorridorConfig,
+        intersections: Dict[str, IntersectionConfig],
+        directions: Dict[str, List[str]]
+    ):
+        """
+        Args:
+            corridor: Corridor definition
+            intersections: Intersection configs by id, for coordinates
+            directions: Each intersection's signal directions, in cycle order
+        """
+        self.corridor_id = corridor.corridor_id
+        self.intersection_ids = list(corridor.intersection_ids)
+        self.direction = corridor.direction
+        self.design_speed = corridor.design_speed or Config.CORRIDOR_DESIGN_SPEED
+        
+        latitudes = np.array([intersections[i].latitude for i in self.intersection_ids], dtype=np.float64)
+        longitudes = np.array([intersections[i].longitude for i in self.intersection_ids], dtype=np.float64)
+        self.distances = np.concatenate([[0.0], np.cumsum(haversine(latitudes, longitudes))])
+        self.travel_times = self.distances / (self.design_speed / 3.6)
+        
+        # Phase order per intersection, rotated so the corridor direction goes first.
+        self.phase_orders: List[List[str]] = []
+        for intersection_id in self.intersection_ids:
+            order = directions[intersection_id]
+            if self.direction not in order:
+                raise ValueError(f"Intersection {intersection_id} has no {self.direction} signal for corridor {self.corridor_id}")
+            first = order.index(self.direction)
+            self.phase_orders.append(order[first:] + order[:first])
+        
+        self.width = max(len(order) for order in self.phase_orders)
+        self.num_directions = np.array([len(order) for order in self.phase_orders])
+        self.valid = np.arange(self.width) < self.num_directions[:, None]
+    
+    def demand_matrix(self, demand: Dict[str, Dict[str, float]]) -> np.ndarray:
+        """Demand (vehicles per minute) laid out as intersections x phase order."""
+        matrix = np.zeros((len(self.intersection_ids), self.width))
+        for row, (intersection_id, order) in enumerate(zip(self.intersection_ids, self.phase_orders)):
+            approaches = demand.get(intersection_id, {})
+            matrix[row, :len(order)] = [approaches.get(direction, 0.0) for direction in order]
+        return matrix
+    
+    def solve(self, demand: np.ndarray, signal_timings: List[SignalTiming]) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Common cycle, green splits and offsets for the given demand.
+        
+        The cycle is Webster's optimum at the critical (most loaded)
+        intersection, so every intersection can run it. Each intersection
+        splits its effective green in proportion to flow ratios on top of
+        min_duration per phase, and the corridor direction turns green as a
+        platoon leaving the first intersection arrives.
+        
+        Args:
+            demand: demand_matrix() output
+            signal_timings: Each intersection's timing, for its minimum
+                green and yellow durations
+        
+        Returns:
+            Tuple of (cycle length in seconds, greens per intersection x
+            phase order, offsets in seconds within the cycle)
+        """
+        ratios = np.where(self.valid, np.maximum(demand, 0.0), 0.0) / Config.SATURATION_FLOW
+        total_ratio = ratios.sum(axis=1)
+        lost_time = Config.WEBSTER_LOST_TIME * self.num_directions
+        webster = (1.5 * lost_time + 5) / (1 - np.minimum(total_ratio, 0.95))
+        
+        min_green = np.array([timing.min_duration for timing in signal_timings], dtype=np.float64)
+        yellow = np.array([timing.yellow_duration for timing in signal_timings], dtype=np.float64)
+        shortest = int(((min_green + yellow) * self.num_directions).max())
+        cycle = int(np.clip(np.ceil(webster.max()), shortest, max(Config.WEBSTER_MAX_CYCLE, shortest)))
+        
+        spare = cycle - (min_green + yellow) * self.num_directions
+        shares = np.where(
+            total_ratio[:, None] > 0,
+            ratios / np.where(total_ratio > 0, total_ratio, 1.0)[:, None],
+            self.valid / self.num_directions[:, None]
+        )
+        greens = np.where(self.valid, np.floor(min_green[:, None] + spare[:, None] * shares), 0.0)
+        # Rounding leftovers go to the corridor direction, so every intersection's cycle is exact.
+        greens[:, 0] += cycle - yellow * self.num_directions - greens.sum(axis=1)
+        
+        offsets = self.travel_times % cycle
+        return cycle, greens, offsets
+
+
+class GreenWaveCoordinator:
+    """
+    Runs configured corridors as green waves.
+    
+    Every intersection on a corridor gets a CoordinationPlan on a common
+    cycle, offset by the travel time from the start of the corridor. A
+    background thread re-solves a corridor when its demand has moved by
+    more than CORRIDOR_DEMAND_TOLERANCE since it was last coordinated.
+    """
+    
+    def __init__(
+        self,
+        signal_controller,
+        corridors: List[CorridorConfig] = None,
+        intersections: List[IntersectionConfig] = None,
+        interval: float = Config.CORRIDOR_RECOORDINATE_INTERVAL,
+        tolerance: float = Config.CORRIDOR_DEMAND_TOLERANCE
+    ):
+        self.signal_controller = signal_controller
+        self.interval = interval
+        self.tolerance = tolerance
+        # Plans of every corridor share one time base, so re-coordinating moves greens as little as possible.
+        self.epoch = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        
+        intersections = {i.intersection_id: i for i in (intersections or Config.INTERSECTIONS)}
+        self.planners: Dict[str, CorridorPlanner] = {}
+        for corridor in (corridors if corridors is not None else Config.CORRIDORS):
+            directions = {
+                intersection_id: list(signal_controller.get_signal_state(intersection_id).keys())
+                for intersection_id in corridor.intersection_ids
+            }
+            self.planners[corridor.corridor_id] = CorridorPlanner(corridor, intersections, directions)
+        
+        self._demand: Dict[str, np.ndarray] = {}
+        self._plans: Dict[str, Dict] = {}
+    
+    def coordinate(self, corridor_id: str, demand: Optional[Dict[str, Dict[str, float]]] = None) -> Dict:
+        """
+        Solve and apply a corridor's plan.
+        
+        Args:
+            corridor_id: Corridor to coordinate
+            demand: Vehicles per minute by intersection and direction (default: current measurements)
+        
+        Returns:
+            Summary of the applied plan
+        """
+        planner = self.planners[corridor_id]
+        start = time.perf_counter()
+        matrix = planner.demand_matrix(demand if demand is not None else self.current_demand(planner))
+        signal_timings = [self.signal_controller.get_signal_timing(i) for i in planner.intersection_ids]
+        cycle, greens, offsets = planner.solve(matrix, signal_timings)
+        
+        greens_list = greens.tolist()
+        for row, intersection_id in enumerate(planner.intersection_ids):
+            width = planner.num_directions[row]
+            plan = CoordinationPlan(
+                origin=self.epoch + offsets[row],
+                directions=planner.phase_orders[row],
+                greens=greens_list[row][:width],
+                yellow=signal_timings[row].yellow_duration
+            )
+            self.signal_controller.set_coordination(intersection_id, plan)
+        
+        summary = {
+            "corridor_id": corridor_id,
+            "intersections": len(planner.intersection_ids),
+            "cycle_length": cycle,
+            "offsets": dict(zip(planner.intersection_ids, np.round(offsets, 1).tolist())),
+            "corridor_greens": dict(zip(planner.intersection_ids, greens[:, 0].tolist())),
+            "solve_ms": round((time.perf_counter() - start) * 1000, 3),
+            "coordinated_at": time.time()
+        }
+        with self._lock:
+            self._demand[corridor_id] = matrix
+            self._plans[corridor_id] = summary
+        logger.info(f"Coordinated corridor {corridor_id}: cycle {cycle}s over {len(planner.intersection_ids)} intersections")
+        return summary
+    
+    def coordinate_all(self) -> None:
+        for corridor_id in self.planners:
+            self.coordinate(corridor_id)
+    
+    def release(self, corridor_id: str) -> None:
+        """Return a corridor's intersections to independent operation."""
+        for intersection_id in self.planners[corridor_id].intersection_ids:
+            self.signal_controller.set_coordination(intersection_id, None)
+        with self._lock:
+            self._demand.pop(corridor_id, None)
+            self._plans.pop(corridor_id, None)
+    
+    def current_demand(self, planner: CorridorPlanner) -> Dict[str, Dict[str, float]]:
+        """Measured arrival rate per approach, falling back to the vehicle count where there is none."""
+        demand = {}
+        for intersection_id in planner.intersection_ids:
+            status = self.signal_controller.get_intersection_status(intersection_id)
+            approaches = dict(status.get("vehicle_counts", {}))
+            for direction, rates in status.get("flow_rates", {}).items():
+                approaches[direction] = rates["arrival_rate"]
+            demand[intersection_id] = approaches
+        return demand
+    
+    def demand_changed(self, corridor_id: str) -> bool:
+        """Whether demand moved by more than the tolerance since the corridor was last coordinated."""
+        planner = self.planners[corridor_id]
+        with self._lock:
+            previous = self._demand.get(corridor_id)
+        if previous is None:
+            return True
+        current = planner.demand_matrix(self.current_demand(planner))
+        change = np.abs(current - previous).sum()
+        return change > self.tolerance * max(previous.sum(), 1.0)
+    
+    def start(self) -> None:
+        if self._thread is not None or not self.planners:
+            return
+        self.coordinate_all()
+        self._thread = threading.Thread(target=self._run, name="corridor-coordinator", daemon=True)
+        self._thread.start()
+        logger.info(f"Green-wave coordination started for {len(self.planners)} corridors")
+    
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._stop_event.clear()
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            plans = {corridor_id: dict(summary) for corridor_id, summary in self._plans.items()}
+        return {
+            "running": self._thread is not None,
+            "interval": self.interval,
+            "corridors": {
+                corridor_id: plans.get(corridor_id, {"corridor_id": corridor_id, "coordinated_at": None})
+                for corridor_id in self.planners
+            }
+        }
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            for corridor_id in self.planners:
+                try:
+                    if self.demand_changed(corridor_id):
+                        self.coordinate(corridor_id)
+                except Exception as e:
+                    logger.error(f"Error coordinating corridor {corridor_id}: {e}")
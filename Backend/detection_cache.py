@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+def analysis_size(analysis) -> int:
+    """Approximate memory held by a cached FrameAnalysis, including lazily built Detections."""
+    return 1024 + analysis.boxes.nbytes + 256 * len(analysis.boxes)
+
+
+class DetectionCache:
+    """
+    LRU cache of detection results keyed by a hash of the uploaded bytes.
+    
+    Bounded by entry count and by approximate memory, and entries older
+    than ttl_seconds are evicted on access.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = Config.DETECTION_CACHE_MAX_ENTRIES,
+        max_bytes: int = Config.DETECTION_CACHE_MAX_BYTES,
+        ttl_seconds: float = Config.DETECTION_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[Any, int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+    
+    @staticmethod
+    def make_key(data: bytes, *parts) -> str:
+        """Key from the content hash of data plus e.g. model name and threshold."""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        return "|".join([digest] + [str(part) for part in parts])
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            
+            value, size, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+    
+    def put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds cache limit")
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._total_bytes += size
+            
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats["evictions"] += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
+    
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
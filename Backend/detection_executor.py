@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from config import Config
+from emergency_preemption import LatencyHistogram
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+class DetectionBusyError(RuntimeError):
+    """Raised when the detection executor already has its maximum of jobs pending."""
+
+
+class DetectionExecutor:
+    """
+    Runs detection requests off the server's request threads.
+    
+    Decoding and inference are CPU-bound, so they run on a small thread
+    pool. Only decoding and pre/post-processing overlap across threads:
+    the in-process model is not thread-safe, so VehicleDetector serializes
+    every model call (including the capture scheduler's) behind one lock.
+    Parallel inference needs DETECTOR_POOL_SIZE > 0, where the threads
+    only wait on DetectorPool worker processes. Admission is
+    bounded: at most max_pending jobs may be queued or running, and any
+    request beyond that is refused with DetectionBusyError instead of
+    parking another request thread. Keeping max_pending below the
+    server's thread count means a burst of uploads can never occupy every
+    thread, so signal-state reads are always served promptly.
+    """
+    
+    def __init__(
+        self,
+        workers: int = Config.DETECTION_WORKERS,
+        max_pending: int = Config.DETECTION_MAX_PENDING,
+        timeout: float = Config.DETECTION_TIMEOUT
+    ):
+        """
+        Args:
+            workers: Threads running detection jobs
+            max_pending: Jobs queued or running before new ones are refused
+            timeout: Seconds a request waits for its job before giving up
+        """
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="detection")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+    
+    def run(self, fn: Callable, *args, block: bool = False):
+        """
+        Run fn(*args) on the executor and wait for its result.
+        
+        Args:
+            fn: Detection callable
+            *args: Its arguments
+            block: Wait for a free slot instead of refusing when saturated;
+                for streams that have already been accepted
+        
+        Returns:
+            Whatever fn returns
+        
+        Raises:
+            DetectionBusyError: If max_pending jobs are already in flight
+            TimeoutError: If the job does not finish within the timeout
+        """
+        if not self._slots.acquire(blocking=block, timeout=self.timeout if block else None):
+            with self._lock:
+                self.rejected += 1
+            raise DetectionBusyError(f"Detection is saturated ({self.max_pending} requests pending), retry shortly")
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        
+        submitted_at = time.perf_counter()
+        try:
+            future = self._executor.submit(self._timed, fn, args, submitted_at)
+        except Exception:
+            self._finish()
+            raise
+        future.add_done_callback(lambda _: self._finish())
+        return future.result(timeout=self.timeout)
+    
+    def _timed(self, fn: Callable, args: tuple, submitted_at: float):
+        started_at = time.perf_counter()
+        self.queue_wait.record((started_at - submitted_at) * 1000)
+        try:
+            return fn(*args)
+        finally:
+            self.run_time.record((time.perf_counter() - started_at) * 1000)
+    
+    def _finish(self) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        self._slots.release()
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+        stats["queue_wait_ms"] = self.queue_wait.to_dict()
+        stats["run_time_ms"] = self.run_time.to_dict()
+        return stats
+    
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,380 @@
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from logger import setup_logger
+from vehicle_detector import DetectionBoxes, VehicleDetector
+
+
+logger = setup_logger(__name__)
+
+
+def _worker_main(
+    worker_id: int,
+    shm_name: str,
+    slot_bytes: int,
+    task_queue,
+    result_queue,
+    model_name: str,
+    backend: str,
+    int8: bool,
+    torch_threads: int
+) -> None:
+    """Entry point of a detector worker process."""
+    # Thread limits must be set before torch is imported by load_model.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    
+    try:
+        detector = VehicleDetector(model_name, backend, int8)
+        detector.warmup()
+    except Exception as e:
+        result_queue.put(("failed", worker_id, None, str(e)))
+        return
+    result_queue.put(("ready", worker_id, None, (detector.model_id, detector.class_names)))
+    
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        
+        request_id, entries = task
+        try:
+            frames = [
+                np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_bytes)
+                for slot, shape, dtype in entries
+            ]
+            result_queue.put(("result", worker_id, request_id, detector._infer_boxes(frames)))
+        except Exception as e:
+            result_queue.put(("error", worker_id, request_id, str(e)))
+    
+    shm.close()
+
+
+class _Worker:
+    def __init__(self, worker_id: int, shm: shared_memory.SharedMemory, slots: int):
+        self.worker_id = worker_id
+        self.shm = shm
+        self.process: Optional[mp.Process] = None
+        self.task_queue = None
+        self.free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        # One caller gathers slots at a time, so two partial batches never wait on each other.
+        self.slot_lock = threading.Lock()
+        self.in_flight: Dict[int, Tuple[Future, List[int]]] = {}
+        self.completed = 0
+        self.restarts = 0
+        self.load_failures = 0  # consecutive, reset once the model loads
+        self.restart_at: Optional[float] = None
+
+
+class DetectorPool:
+    """
+    Pool of detector worker processes, each holding its own model.
+    
+    Every worker owns a shared-memory ring of frame slots. Frames are copied
+    into free slots and only the slot indices and shapes travel through the
+    task queue. A batch is split into one slice per worker, and each worker
+    runs its slice as one batched model call and sends back compact
+    DetectionBoxes arrays. Crashed
+    workers are restarted and their in-flight requests fail with an error;
+    a worker that keeps failing to load its model after start() is retried
+    with exponential backoff rather than taking the whole pool down.
+    """
+    
+    def __init__(
+        self,
+        size: int = Config.DETECTOR_POOL_SIZE,
+        slots_per_worker: int = Config.DETECTOR_POOL_SLOTS,
+        max_frame_bytes: int = Config.DETECTOR_POOL_MAX_FRAME_BYTES,
+        torch_threads: int = Config.DETECTOR_POOL_TORCH_THREADS,
+        model_name: str = Config.YOLO_MODEL,
+        backend: str = Config.INFERENCE_BACKEND,
+        int8: bool = Config.INFERENCE_INT8
+    ):
+        self.size = max(1, size)
+        self.slots_per_worker = max(1, slots_per_worker)
+        self.slot_bytes = max_frame_bytes
+        self.torch_threads = max(1, torch_threads)
+        self.model_name = model_name
+        self.backend = backend
+        self.int8 = int8
+        self.model_id: Optional[str] = None
+        self.class_names: Dict[int, str] = {}
+        
+        self._ctx = mp.get_context("spawn")
+        self._result_queue = self._ctx.Queue()
+        self._workers: List[_Worker] = []
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._ready_workers = set()
+        self._started = False
+        self._stopping = False
+        self._stopped = False
+        self._threads: List[threading.Thread] = []
+    
+    def start(self, timeout: float = 300) -> "DetectorPool":
+        """Spawn all workers and wait until each has loaded its model."""
+        # Export/convert the model once here, so workers never race to write the cache.
+        if self.backend != "torch":
+            from inference_backends import load_model
+            load_model(self.model_name, self.backend, self.int8)
+        
+        for worker_id in range(self.size):
+            shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots_per_worker)
+            worker = _Worker(worker_id, shm, self.slots_per_worker)
+            self._workers.append(worker)
+            self._spawn(worker)
+        
+        for target, name in ((self._collect_results, "detector-pool-results"),
+                             (self._monitor, "detector-pool-monitor")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        
+        deadline = time.monotonic() + timeout
+        with self._ready:
+            while len(self._ready_workers) < self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    self.stop()
+                    raise RuntimeError("Detector pool workers failed to start")
+                self._ready.wait(remaining)
+            self._started = True
+        
+        atexit.register(self.stop)
+        logger.info(
+            f"Detector pool started: {self.size} workers x {self.slots_per_worker} slots, "
+            f"{self.torch_threads} torch threads each"
+        )
+        return self
+    
+    def submit(self, frames: List[np.ndarray], timeout: Optional[float] = Config.DETECTION_TIMEOUT) -> Future:
+        """
+        Queue up to slots_per_worker frames as one batched task on the least
+        loaded worker; the future resolves to their DetectionBoxes, in order.
+        
+        Raises:
+            TimeoutError: If the chosen worker has too few free slots within timeout
+        """
+        frames = [np.ascontiguousarray(frame) for frame in frames]
+        if len(frames) > self.slots_per_worker:
+            raise ValueError(f"Batch of {len(frames)} frames exceeds {self.slots_per_worker} slots per worker")
+        for frame in frames:
+            if frame.nbytes > self.slot_bytes:
+                raise ValueError(
+                    f"Frame of {frame.nbytes} bytes exceeds pool slot size {self.slot_bytes}; "
+                    f"raise DETECTOR_POOL_MAX_FRAME_BYTES"
+                )
+        
+        with self._lock:
+            candidates = [w for w in self._workers if w.worker_id in self._ready_workers]
+            if not candidates:
+                raise RuntimeError("No detector pool workers available")
+            worker = max(candidates, key=lambda w: w.free_slots.qsize())
+        
+        deadline = None if timeout is None else time.monotonic() + timeout
+        slots = []
+        with worker.slot_lock:
+            try:
+                for _ in frames:
+                    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    slots.append(worker.free_slots.get(timeout=remaining))
+            except queue.Empty:
+                for slot in slots:
+                    worker.free_slots.put(slot)
+                raise TimeoutError(f"Detector worker {worker.worker_id} had no free slot for {timeout}s") from None
+        for frame, slot in zip(frames, slots):
+            offset = slot * self.slot_bytes
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=worker.shm.buf, offset=offset)[...] = frame
+        
+        future: Future = Future()
+        with self._lock:
+            if worker.worker_id not in self._ready_workers:
+                for slot in slots:
+                    worker.free_slots.put(slot)
+                raise RuntimeError(f"Detector worker {worker.worker_id} is restarting")
+            request_id = next(self._request_ids)
+            worker.in_flight[request_id] = (future, slots)
+            worker.task_queue.put((
+                request_id, [(slot, frame.shape, frame.dtype.str) for frame, slot in zip(frames, slots)]
+            ))
+        return future
+    
+    def infer(self, frames: List[np.ndarray], timeout: float = Config.DETECTION_TIMEOUT) -> List[DetectionBoxes]:
+        """
+        Split frames into one batched slice per ready worker and wait for all of them.
+        
+        Raises:
+            TimeoutError: If the whole batch is not done within timeout seconds,
+                so a hung worker cannot block the caller forever
+        """
+        if not frames:
+            return []
+        with self._lock:
+            ready = max(1, len(self._ready_workers))
+        chunk = min(self.slots_per_worker, -(-len(frames) // ready))
+        deadline = time.monotonic() + timeout
+        futures = [self.submit(frames[i:i + chunk], timeout) for i in range(0, len(frames), chunk)]
+        return [
+            boxes
+            for future in futures
+            for boxes in future.result(timeout=max(0.0, deadline - time.monotonic()))
+        ]
+    
+    def get_stats(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "worker_id": w.worker_id,
+                    "pid": w.process.pid if w.process else None,
+                    "alive": bool(w.process and w.process.is_alive()),
+                    "ready": w.worker_id in self._ready_workers,
+                    "in_flight": len(w.in_flight),
+                    "completed": w.completed,
+                    "restarts": w.restarts
+                }
+                for w in self._workers
+            ]
+    
+    def stop(self) -> None:
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._stopping = True
+            self._ready.notify_all()
+        
+        for worker in self._workers:
+            if worker.process and worker.process.is_alive():
+                worker.task_queue.put(None)
+        for worker in self._workers:
+            if worker.process:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            self._fail_in_flight(worker, RuntimeError("Detector pool stopped"))
+            worker.shm.close()
+            worker.shm.unlink()
+        self._result_queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+    
+    def _spawn(self, worker: _Worker) -> None:
+        # A fresh queue per process, so tasks meant for a crashed worker are never replayed.
+        worker.task_queue = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker.worker_id, worker.shm.name, self.slot_bytes, worker.task_queue,
+                self._result_queue, self.model_name, self.backend, self.int8, self.torch_threads
+            ),
+            name=f"detector-worker-{worker.worker_id}",
+            daemon=True
+        )
+        worker.process.start()
+    
+    def _collect_results(self) -> None:
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                break
+            
+            kind, worker_id, request_id, payload = message
+            worker = self._workers[worker_id]
+            if kind == "ready":
+                with self._ready:
+                    self.model_id, self.class_names = payload
+                    self._ready_workers.add(worker_id)
+                    worker.load_failures = 0
+                    self._ready.notify_all()
+                continue
+            if kind == "failed":
+                logger.error(f"Detector worker {worker_id} failed to load model: {payload}")
+                with self._ready:
+                    if self._started:
+                        # The worker process exits after reporting; _monitor restarts it with backoff.
+                        worker.load_failures += 1
+                    else:
+                        self._stopping = True
+                    self._ready.notify_all()
+                continue
+            
+            with self._lock:
+                entry = worker.in_flight.pop(request_id, None)
+                if entry is not None:
+                    worker.completed += 1
+            if entry is None:
+                continue  # request already failed by a worker restart
+            
+            future, slots = entry
+            for slot in slots:
+                worker.free_slots.put(slot)
+            if kind == "result":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"Detector worker {worker_id}: {payload}"))
+    
+    def _monitor(self) -> None:
+        while not self._stopping:
+            time.sleep(1.0)
+            for worker in self._workers:
+                if self._stopping or worker.process.is_alive():
+                    continue
+                
+                now = time.monotonic()
+                if worker.restart_at is None:
+                    with self._lock:
+                        self._ready_workers.discard(worker.worker_id)
+                        failures = worker.load_failures
+                    self._fail_in_flight(worker, RuntimeError(f"Detector worker {worker.worker_id} crashed"))
+                    delay = 0.0 if failures == 0 else min(
+                        Config.DETECTOR_POOL_MAX_RESTART_BACKOFF,
+                        Config.DETECTOR_POOL_RESTART_BACKOFF * 2 ** (failures - 1)
+                    )
+                    worker.restart_at = now + delay
+                    logger.error(
+                        f"Detector worker {worker.worker_id} exited "
+                        f"(code {worker.process.exitcode}), restarting in {delay:.0f}s"
+                    )
+                if now < worker.restart_at:
+                    continue
+                
+                worker.restart_at = None
+                worker.restarts += 1
+                self._spawn(worker)
+    
+    def _fail_in_flight(self, worker: _Worker, error: Exception) -> None:
+        with self._lock:
+            entries = list(worker.in_flight.values())
+            worker.in_flight.clear()
+        for future, slots in entries:
+            for slot in slots:
+                worker.free_slots.put(slot)
+            if not future.done():
+                future.set_exception(error)
+
+
+def create_detector() -> VehicleDetector:
+    """Build the configured detector: pooled when DETECTOR_POOL_SIZE > 0, in-process otherwise."""
+    if Config.DETECTOR_POOL_SIZE > 0:
+        return VehicleDetector(pool=DetectorPool().start())
+    return VehicleDetector()
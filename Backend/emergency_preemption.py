@@ -0,0 +1,200 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram, in milliseconds.
+    
+    Bucket i counts samples up to bounds[i]; the last bucket takes
+    everything above the highest bound. Percentiles are estimated as the
+    upper bound of the bucket they fall in, capped at the recorded
+    maximum, so recording stays O(log buckets) with no sample buffer.
+    """
+    
+    def __init__(self, bounds_ms: List[float] = None):
+        self.bounds = np.asarray(bounds_ms or Config.EMERGENCY_LATENCY_BUCKETS_MS, dtype=float)
+        self.counts = np.zeros(len(self.bounds) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.maximum = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, latency_ms: float) -> None:
+        bucket = int(np.searchsorted(self.bounds, latency_ms))
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += latency_ms
+            self.maximum = max(self.maximum, latency_ms)
+    
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            counts = self.counts.copy()
+            maximum = self.maximum
+        samples = int(counts.sum())
+        if samples == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(counts), q / 100.0 * samples))
+        return min(float(self.bounds[bucket]), maximum) if bucket < len(self.bounds) else maximum
+    
+    def to_dict(self) -> Dict:
+        with self._lock:
+            samples = int(self.counts.sum())
+            counts = self.counts.tolist()
+            mean = self.total / samples if samples else 0.0
+            maximum = self.maximum
+        return {
+            "samples": samples,
+            "mean": round(mean, 3),
+            "p50": round(self.percentile(50), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(maximum, 3),
+            # counts[i] is the samples up to bounds_ms[i]; the extra last count is those above them all.
+            "bounds_ms": self.bounds.tolist(),
+            "counts": counts
+        }
+
+
+@dataclass
+class _Track:
+    """Debounce state of one camera's emergency detections."""
+    hits: int = 0
+    misses: int = 0
+    first_seen: Optional[float] = None
+    confirmed: bool = False  # seen in confirm_frames consecutive frames
+    active: bool = False  # the controller accepted its preemption
+    rejected: bool = False
+
+
+class EmergencyPreemptor:
+    """
+    Fast path from detected emergency vehicles to signal preemption.
+    
+    Each analyzed frame is reported per camera (intersection and
+    approach). A vehicle must be seen in confirm_frames consecutive frames
+    before the approach is preempted, and the preemption is released once
+    clear_frames consecutive frames show none, so a single misdetection
+    neither stops a junction nor cuts an emergency green short. The
+    controller handles the yellow clearance, the hold limit and restoring
+    the interrupted phase (see TrafficSignalController.preempt). A
+    confirmed vehicle whose preemption is refused because another approach
+    holds the junction is retried on each later frame that still sees it.
+    
+    Latency is measured from the first frame that saw the vehicle, both to
+    the preempt call and to the approach actually turning green.
+    """
+    
+    def __init__(
+        self,
+        signal_controller,
+        confirm_frames: int = Config.EMERGENCY_CONFIRM_FRAMES,
+        clear_frames: int = Config.EMERGENCY_CLEAR_FRAMES,
+        max_hold: float = Config.EMERGENCY_MAX_HOLD
+    ):
+        self.signal_controller = signal_controller
+        self.confirm_frames = max(1, confirm_frames)
+        self.clear_frames = max(1, clear_frames)
+        self.max_hold = max_hold
+        self.preemptions = 0
+        self.rejected = 0
+        self.releases = 0
+        self.detection_to_preempt = LatencyHistogram()
+        self.detection_to_green = LatencyHistogram()
+        self._tracks: Dict[Tuple[str, str], _Track] = {}
+        # Guards only _tracks; never held while calling the controller, whose listener runs under its locks.
+        self._lock = threading.Lock()
+        signal_controller.preemption_listener = self._on_green
+    
+    def observe(
+        self,
+        intersection_id: str,
+        direction: str,
+        emergency_vehicles: int,
+        detected_at: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Report one analyzed frame from a camera.
+        
+        Args:
+            intersection_id: ID of the intersection
+            direction: Approach the camera watches
+            emergency_vehicles: Emergency vehicles detected in the frame
+            detected_at: Monotonic time the frame was captured (default: now)
+        
+        Returns:
+            "preempt" or "release" when the frame asked the controller for one, else None
+        """
+        detected_at = time.monotonic() if detected_at is None else detected_at
+        key = (intersection_id, direction)
+        with self._lock:
+            track = self._tracks.get(key)
+            if track is None:
+                if emergency_vehicles <= 0:
+                    return None
+                track = self._tracks[key] = _Track()
+            
+            action = None
+            if emergency_vehicles > 0:
+                track.misses = 0
+                track.hits += 1
+                if track.first_seen is None:
+                    track.first_seen = detected_at
+                if not track.active and (track.confirmed or track.hits >= self.confirm_frames):
+                    track.confirmed = track.active = True
+                    action = "preempt"
+            else:
+                track.hits = 0
+                track.misses += 1
+                if not track.confirmed:
+                    del self._tracks[key]
+                elif track.misses >= self.clear_frames:
+                    del self._tracks[key]
+                    action = "release" if track.active else None
+            first_seen = track.first_seen
+        
+        if action == "preempt":
+            preempted = self.signal_controller.preempt(intersection_id, direction, self.max_hold, first_seen)
+            with self._lock:
+                if preempted:
+                    self.preemptions += 1
+                else:
+                    # Another approach holds the junction; retry on the next frame that still sees the vehicle.
+                    track.active = False
+                    if not track.rejected:
+                        track.rejected = True
+                        self.rejected += 1
+            if preempted:
+                self.detection_to_preempt.record((time.monotonic() - first_seen) * 1000)
+        elif action == "release":
+            if self.signal_controller.release(intersection_id, direction):
+                with self._lock:
+                    self.releases += 1
+        return action
+    
+    def get_stats(self) -> Dict:
+        with self._lock:
+            tracking = len(self._tracks)
+            active = sum(track.active for track in self._tracks.values())
+            preemptions, rejected, releases = self.preemptions, self.rejected, self.releases
+        return {
+            "confirm_frames": self.confirm_frames,
+            "clear_frames": self.clear_frames,
+            "max_hold": self.max_hold,
+            "tracking": tracking,
+            "active": active,
+            "preemptions": preemptions,
+            "rejected": rejected,
+            "releases": releases,
+            "detection_to_preempt_ms": self.detection_to_preempt.to_dict(),
+            "detection_to_green_ms": self.detection_to_green.to_dict()
+        }
+    
+    def _on_green(self, intersection_id: str, direction: str, detected_at: float, green_at: float) -> None:
+        self.detection_to_green.record(max(green_at - detected_at, 0.0) * 1000)
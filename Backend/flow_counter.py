@@ -0,0 +1,182 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from config import Config
+
+
+ARRIVAL = 0
+DISCHARGE = 1
+
+
+class StopLine:
+    """
+    Virtual stop line segment in full-frame pixel coordinates.
+    
+    A track discharges when the segment between its previous and current
+    center intersects the line, which is a constant-time test per update.
+    """
+    __slots__ = ("x1", "y1", "dx", "dy")
+    
+    def __init__(self, line: Sequence[float]):
+        """
+        Args:
+            line: (x1, y1, x2, y2) endpoints of the line
+        """
+        x1, y1, x2, y2 = (float(v) for v in line)
+        if x1 == x2 and y1 == y2:
+            raise ValueError("Stop line endpoints must differ")
+        self.x1, self.y1 = x1, y1
+        self.dx, self.dy = x2 - x1, y2 - y1
+    
+    def side(self, point: Tuple[float, float]) -> float:
+        """Signed area of (line, point); the sign tells which side point is on."""
+        return self.dx * (point[1] - self.y1) - self.dy * (point[0] - self.x1)
+    
+    def crossed(self, start: Tuple[float, float], end: Tuple[float, float]) -> bool:
+        """Whether the movement from start to end crosses the segment."""
+        side_start = self.side(start)
+        side_end = self.side(end)
+        if (side_start > 0) == (side_end > 0) or side_start == side_end:
+            return False
+        
+        # Where along the line the movement crosses it (0..1 within the segment).
+        mx, my = end[0] - start[0], end[1] - start[1]
+        denom = self.dx * my - self.dy * mx
+        t = ((start[0] - self.x1) * my - (start[1] - self.y1) * mx) / denom
+        return 0.0 <= t <= 1.0
+
+
+class FlowCounter:
+    """
+    Sliding-window arrival and discharge counts per vehicle class.
+    
+    Counts live in a fixed-size ring of time bins, so recording an event
+    is O(1) and reading rates sums a small constant-size array no matter
+    how much traffic has passed.
+    """
+    
+    def __init__(
+        self,
+        window_seconds: float = Config.FLOW_WINDOW_SECONDS,
+        bin_seconds: float = Config.FLOW_BIN_SECONDS,
+        classes: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            window_seconds: Length of the sliding window rates are computed over
+            bin_seconds: Width of one ring slot; the window slides in these steps
+            classes: Class names counted separately; anything else is "other"
+        """
+        self.bin_seconds = float(bin_seconds)
+        self.num_bins = max(1, int(math.ceil(window_seconds / self.bin_seconds)))
+        self.window_seconds = self.num_bins * self.bin_seconds
+        self.classes = list(classes or Config.VEHICLE_CLASSES + Config.EMERGENCY_CLASSES) + ["other"]
+        self._class_index = {name: i for i, name in enumerate(self.classes)}
+        self._other = len(self.classes) - 1
+        self.reset()
+    
+    def reset(self) -> None:
+        self._counts = np.zeros((2, self.num_bins, len(self.classes)), dtype=np.int32)
+        self._bin_ids = np.full(self.num_bins, -1, dtype=np.int64)
+        self.totals = np.zeros((2, len(self.classes)), dtype=np.int64)
+        self.started_at: Optional[float] = None
+    
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """Ring contents as arrays, for state snapshots."""
+        return {
+            "counts": self._counts.copy(),
+            "bin_ids": self._bin_ids.copy(),
+            "totals": self.totals.copy(),
+            "started_at": np.array(np.nan if self.started_at is None else self.started_at)
+        }
+    
+    def load_state(self, state: Dict[str, np.ndarray], time_shift: float = 0.0) -> bool:
+        """
+        Restore from export_state() output.
+        
+        Args:
+            state: Arrays produced by export_state()
+            time_shift: Seconds to add to stored times, mapping the old
+                process's clock onto this one
+        
+        Returns:
+            False (leaving the counter empty) if the ring layout differs
+        """
+        self.reset()
+        if state["counts"].shape != self._counts.shape:
+            return False
+        
+        # Shifted bin ids keep their residues distinct, so each still gets its own slot.
+        bin_ids = state["bin_ids"].astype(np.int64)
+        live = bin_ids >= 0
+        shifted = bin_ids[live] + int(round(time_shift / self.bin_seconds))
+        slots = shifted % self.num_bins
+        self._counts[:, slots] = state["counts"][:, live]
+        self._bin_ids[slots] = shifted
+        self.totals[:] = state["totals"]
+        started_at = float(state["started_at"])
+        self.started_at = None if np.isnan(started_at) else started_at + time_shift
+        return True
+    
+    def observe(self, now: float) -> None:
+        """Mark that the approach was watched at `now`, starting the window clock."""
+        if self.started_at is None:
+            self.started_at = now
+    
+    def record(self, kind: int, class_name: str, now: float) -> None:
+        """
+        Count one event.
+        
+        Args:
+            kind: ARRIVAL or DISCHARGE
+            class_name: Vehicle class of the track
+            now: Event time in seconds (monotonic or stream time)
+        """
+        self.observe(now)
+        bin_id = int(now // self.bin_seconds)
+        slot = bin_id % self.num_bins
+        if self._bin_ids[slot] != bin_id:
+            if self._bin_ids[slot] > bin_id:
+                # Stale timestamp older than the slot's contents; already outside the window.
+                return
+            self._counts[:, slot] = 0
+            self._bin_ids[slot] = bin_id
+        column = self._class_index.get(class_name, self._other)
+        self._counts[kind, slot, column] += 1
+        self.totals[kind, column] += 1
+    
+    def window_counts(self, now: float) -> np.ndarray:
+        """(2, num_classes) counts of arrivals and discharges within the window."""
+        current = int(now // self.bin_seconds)
+        live = (self._bin_ids > current - self.num_bins) & (self._bin_ids <= current)
+        return self._counts[:, live].sum(axis=1)
+    
+    def rates(self, now: float) -> Tuple[float, float]:
+        """(arrival rate, discharge rate) in vehicles per minute."""
+        counts = self.window_counts(now).sum(axis=1)
+        minutes = self._elapsed(now) / 60.0
+        return float(counts[ARRIVAL]) / minutes, float(counts[DISCHARGE]) / minutes
+    
+    def snapshot(self, now: float) -> Dict:
+        """Rates plus per-class window counts and lifetime totals."""
+        counts = self.window_counts(now)
+        minutes = self._elapsed(now) / 60.0
+        
+        def by_class(row: np.ndarray) -> Dict[str, int]:
+            return {self.classes[i]: int(row[i]) for i in np.flatnonzero(row)}
+        
+        return {
+            "arrival_rate": round(float(counts[ARRIVAL].sum()) / minutes, 2),
+            "discharge_rate": round(float(counts[DISCHARGE].sum()) / minutes, 2),
+            "window_seconds": round(minutes * 60.0, 1),
+            "arrivals_by_class": by_class(counts[ARRIVAL]),
+            "discharges_by_class": by_class(counts[DISCHARGE]),
+            "total_arrivals": int(self.totals[ARRIVAL].sum()),
+            "total_discharges": int(self.totals[DISCHARGE].sum())
+        }
+    
+    def _elapsed(self, now: float) -> float:
+        """Seconds the window actually covers, so rates are not diluted right after startup."""
+        if self.started_at is None:
+            return self.window_seconds
+        return min(self.window_seconds, max(now - self.started_at, self.bin_seconds))
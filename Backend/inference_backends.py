@@ -0,0 +1,120 @@
+import os
+import shutil
+from pathlib import Path
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+SUPPORTED_BACKENDS = ("torch", "onnxruntime", "openvino")
+
+
+def exported_model_path(
+    model_name: str,
+    backend: str,
+    int8: bool = False,
+    imgsz: int = Config.INFERENCE_IMGSZ,
+    cache_dir: str = Config.MODEL_CACHE_DIR
+) -> Path:
+    """Location of the cached converted model for a backend."""
+    stem = Path(model_name).stem
+    suffix = f"{stem}_{imgsz}" + ("_int8" if int8 else "")
+    if backend == "onnxruntime":
+        return Path(cache_dir) / f"{suffix}.onnx"
+    if backend == "openvino":
+        # Ultralytics recognizes OpenVINO models by this directory suffix.
+        return Path(cache_dir) / f"{suffix}_openvino_model"
+    raise ValueError(f"Backend {backend} has no exported model")
+
+
+def load_model(
+    model_name: str = Config.YOLO_MODEL,
+    backend: str = Config.INFERENCE_BACKEND,
+    int8: bool = Config.INFERENCE_INT8,
+    imgsz: int = Config.INFERENCE_IMGSZ,
+    cache_dir: str = Config.MODEL_CACHE_DIR
+) -> "YOLO":
+    """
+    Load a YOLO model for the selected inference backend.
+    
+    Non-torch backends are exported once and cached on disk; later loads
+    reuse the cached graph. Every backend returns a YOLO object, so the
+    detector's post-processing and FrameAnalysis output are unchanged.
+    ultralytics (and torch) are imported here rather than at module load
+    so the API can start serving before the model stack is imported.
+    
+    Args:
+        model_name: PyTorch weights to load or export from
+        backend: One of SUPPORTED_BACKENDS
+        int8: Use an INT8-quantized variant (onnxruntime and openvino only)
+        imgsz: Inference image size the export is built for
+        cache_dir: Directory holding exported models
+        
+    Returns:
+        YOLO model ready for inference
+    """
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend}, expected one of {SUPPORTED_BACKENDS}")
+    
+    from ultralytics import YOLO
+    
+    if backend == "torch":
+        if int8:
+            logger.warning("INT8 is not supported by the torch backend, using FP32")
+        return YOLO(model_name)
+    
+    path = exported_model_path(model_name, backend, int8, imgsz, cache_dir)
+    if not path.exists():
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        if backend == "onnxruntime":
+            _export_onnx(model_name, path, int8, imgsz)
+        else:
+            _export_openvino(model_name, path, int8, imgsz)
+    else:
+        logger.info(f"Using cached {backend} model: {path}")
+    
+    return YOLO(str(path), task="detect")
+
+
+def _export_onnx(model_name: str, path: Path, int8: bool, imgsz: int) -> None:
+    from ultralytics import YOLO
+    
+    fp32_path = exported_model_path(model_name, "onnxruntime", False, imgsz, str(path.parent))
+    if not fp32_path.exists():
+        logger.info(f"Exporting {model_name} to ONNX (imgsz={imgsz})")
+        exported = YOLO(model_name).export(format="onnx", imgsz=imgsz, dynamic=True)
+        _move_into_cache(Path(exported), fp32_path)
+    
+    if int8:
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as e:
+            raise ImportError("INT8 ONNX models require onnxruntime: pip install onnxruntime") from e
+        
+        logger.info(f"Quantizing {fp32_path} to INT8")
+        tmp_path = path.with_suffix(".tmp.onnx")
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QUInt8)
+        os.replace(tmp_path, path)
+
+
+def _export_openvino(model_name: str, path: Path, int8: bool, imgsz: int) -> None:
+    from ultralytics import YOLO
+    
+    logger.info(f"Exporting {model_name} to OpenVINO (imgsz={imgsz}, int8={int8})")
+    export_args = {"format": "openvino", "imgsz": imgsz, "dynamic": True, "int8": int8}
+    if int8:
+        export_args["data"] = Config.INFERENCE_INT8_CALIBRATION_DATA
+    exported = YOLO(model_name).export(**export_args)
+    _move_into_cache(Path(exported), path)
+
+
+def _move_into_cache(exported: Path, path: Path) -> None:
+    # Move to a sibling first so a half-written export never sits at the final path.
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path) if tmp_path.is_dir() else tmp_path.unlink()
+    shutil.move(str(exported), str(tmp_path))
+    os.replace(tmp_path, path)
+    logger.info(f"Cached exported model at {path}")
@@ -1,32 +1,193 @@
 import math
-from typing import List, Dict, Tuple
-from dataclasses import dataclass, field
-from datetime import datetime
+import threading
+import time
+from typing import Callable, List, Dict, Optional, Tuple
+import numpy as np
+from config import Config
+from flow_counter import ARRIVAL, DISCHARGE, FlowCounter, StopLine
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    linear_sum_assignment = None
 
 
-@dataclass
 class TrackedObject:
-    id: int
-    class_name: str
-    center: Tuple[int, int]
-    bbox: Tuple[int, int, int, int]
-    last_seen: datetime = field(default_factory=datetime.now)
-    frames_since_seen: int = 0
-    confidence: float = 0.9
-    
-    def update(self, center: Tuple[int, int], bbox: Tuple[int, int, int, int]) -> None:
+    """
+    One tracked vehicle. Uses __slots__ and integer frame indices instead of
+    a datetime per update, so thousands of tracks stay small and updating
+    them makes no clock calls.
+    """
+    __slots__ = (
+        "id", "class_name", "center", "bbox", "last_seen_frame", "frames_since_seen", "confidence", "crossed"
+    )
+    
+    def __init__(
+        self,
+        id: int,
+        class_name: str,
+        center: Tuple[int, int],
+        bbox: Tuple[int, int, int, int],
+        last_seen_frame: int = 0,
+        frames_since_seen: int = 0,
+        confidence: float = 0.9
+    ):
+        self.id = id
+        self.class_name = class_name
+        self.center = center
+        self.bbox = bbox
+        self.last_seen_frame = last_seen_frame
+        self.frames_since_seen = frames_since_seen
+        self.confidence = confidence
+        self.crossed = False
+    
+    def update(self, center: Tuple[int, int], bbox: Tuple[int, int, int, int], frame_index: int) -> None:
         self.center = center
         self.bbox = bbox
-        self.last_seen = datetime.now()
+        self.last_seen_frame = frame_index
         self.frames_since_seen = 0
+    
+    def __repr__(self) -> str:
+        return (
+            f"TrackedObject(id={self.id}, class_name={self.class_name!r}, center={self.center}, "
+            f"bbox={self.bbox}, last_seen_frame={self.last_seen_frame}, "
+            f"frames_since_seen={self.frames_since_seen}, confidence={self.confidence})"
+        )
+
+
+# Constant-velocity Kalman model over [cx, cy, w, h] and their per-frame velocities.
+_KF_PROCESS_NOISE = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001, 0.0001])
+_KF_MEASUREMENT_NOISE = np.diag([1.0, 1.0, 10.0, 10.0])
+_KF_INITIAL_COVARIANCE = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+
+
+def _boxes_to_measurements(boxes: np.ndarray) -> np.ndarray:
+    """xyxy boxes to [cx, cy, w, h] measurements."""
+    return np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+
+
+class SpatialGrid:
+    """
+    Uniform grid of track ids bucketed by center, with cells of size
+    cell_size. With cell_size equal to the tracker's max_distance, every
+    track that can match a detection lies in the 3x3 block of cells
+    around the detection.
+    """
+    
+    def __init__(self, cell_size: float):
+        self.cell_size = float(cell_size)
+        self.cells: Dict[Tuple[int, int], set] = {}
+        self.cell_of: Dict[int, Tuple[int, int]] = {}
+    
+    def _cell(self, center: Tuple[int, int]) -> Tuple[int, int]:
+        return (int(center[0] // self.cell_size), int(center[1] // self.cell_size))
+    
+    def insert(self, obj_id: int, center: Tuple[int, int]) -> None:
+        cell = self._cell(center)
+        self.cells.setdefault(cell, set()).add(obj_id)
+        self.cell_of[obj_id] = cell
+    
+    def move(self, obj_id: int, center: Tuple[int, int]) -> None:
+        cell = self._cell(center)
+        old_cell = self.cell_of.get(obj_id)
+        if cell == old_cell:
+            return
+        if old_cell is not None:
+            self._discard(obj_id, old_cell)
+        self.cells.setdefault(cell, set()).add(obj_id)
+        self.cell_of[obj_id] = cell
+    
+    def remove(self, obj_id: int) -> None:
+        cell = self.cell_of.pop(obj_id, None)
+        if cell is not None:
+            self._discard(obj_id, cell)
+    
+    def clear(self) -> None:
+        self.cells.clear()
+        self.cell_of.clear()
+    
+    def candidate_pairs(self, centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All (detection index, track id) pairs whose cells are neighbours.
+        
+        Detections sharing a cell share one neighbourhood lookup, so the
+        work is proportional to the number of detections, not tracks.
+        """
+        cells = np.floor(centers / self.cell_size).astype(np.int64).tolist()
+        dets_by_cell: Dict[Tuple[int, int], List[int]] = {}
+        for det_index, (cx, cy) in enumerate(cells):
+            dets_by_cell.setdefault((cx, cy), []).append(det_index)
+        
+        rows: List[int] = []
+        ids: List[int] = []
+        for (cx, cy), dets in dets_by_cell.items():
+            neighbours = [
+                obj_id
+                for dx in (-1, 0, 1)
+                for dy in (-1, 0, 1)
+                for obj_id in self.cells.get((cx + dx, cy + dy), ())
+            ]
+            if neighbours:
+                for det_index in dets:
+                    rows.extend([det_index] * len(neighbours))
+                    ids.extend(neighbours)
+        
+        return np.array(rows, dtype=np.int64), np.array(ids, dtype=np.int64)
+    
+    def _discard(self, obj_id: int, cell: Tuple[int, int]) -> None:
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.discard(obj_id)
+            if not bucket:
+                del self.cells[cell]
 
 
 class ObjectTracker:
-    def __init__(self, max_distance: int = 50, max_frames_lost: int = 30):
+    def __init__(
+        self,
+        max_distance: int = 50,
+        max_frames_lost: int = 30,
+        hungarian_max_size: int = Config.TRACKER_HUNGARIAN_MAX_SIZE,
+        mode: str = Config.TRACKER_MODE,
+        iou_threshold: float = Config.TRACKER_IOU_THRESHOLD,
+        stop_line: Optional[Tuple[float, float, float, float]] = None
+    ):
+        """
+        Args:
+            max_distance: Largest center distance (pixels) that can match in centroid mode
+            max_frames_lost: Updates a track may go unmatched before it is dropped
+            hungarian_max_size: Largest matrix side solved optimally; larger ones are greedy
+            mode: "centroid" matches raw centers from the previous update;
+                "sort" keeps a constant-velocity Kalman state per track and
+                matches on IoU with the predicted boxes, so IDs survive
+                sparse inference
+            iou_threshold: Minimum IoU between a detection and a predicted box in sort mode
+            stop_line: (x1, y1, x2, y2) line in frame pixels; a track crossing it
+                counts as one discharge. Tracks born after the first update
+                count as arrivals; the first frame's vehicles were already queued.
+        """
+        if mode not in ("centroid", "sort"):
+            raise ValueError(f"Unknown tracker mode {mode}, expected 'centroid' or 'sort'")
+        
         self.tracked_objects: Dict[int, TrackedObject] = {}
         self.next_id = 0
+        self.frame_index = 0
         self.max_distance = max_distance
         self.max_frames_lost = max_frames_lost
+        self.hungarian_max_size = hungarian_max_size
+        self.mode = mode
+        self.iou_threshold = iou_threshold
+        self.grid = SpatialGrid(max_distance)
+        self.stop_line = StopLine(stop_line) if stop_line is not None else None
+        self.flow = FlowCounter()
+        self.last_timestamp: Optional[float] = None
+        
+        # Sort-mode Kalman state, one row per track: ids, [cx, cy, w, h, vx, vy, vw, vh], covariance.
+        self._kf_ids = np.empty(0, dtype=np.int64)
+        self._kf_x = np.empty((0, 8))
+        self._kf_P = np.empty((0, 8, 8))
     
     def calculate_distance(
         self, 
@@ -36,7 +197,118 @@ class ObjectTracker:
         """Calculate Euclidean distance between two points."""
         return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
     
-    def update(self, detections: List[Dict]) -> List[Dict]:
+    def distance_matrix(self, det_centers: np.ndarray, track_centers: np.ndarray) -> np.ndarray:
+        """Euclidean distances between every detection (rows) and track (columns)."""
+        diff = det_centers[:, None, :] - track_centers[None, :, :]
+        return np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+    
+    def assign(self, cost: np.ndarray, max_cost: Optional[float] = None) -> List[Tuple[int, int]]:
+        """
+        Match detections to tracks, allowing only pairs cheaper than max_cost
+        (max_distance by default).
+        
+        Uses the Hungarian algorithm (optimal total distance) when SciPy is
+        available and the matrix is at most hungarian_max_size on a side,
+        otherwise a greedy closest-pair-first assignment.
+        
+        Returns:
+            List of (detection index, track index) pairs
+        """
+        if max_cost is None:
+            max_cost = self.max_distance
+        gated = cost < max_cost
+        if not gated.any():
+            return []
+        
+        if linear_sum_assignment is not None and max(cost.shape) <= self.hungarian_max_size:
+            # Forbidden pairs get a cost no valid assignment can beat, then are dropped.
+            masked = np.where(gated, cost, max(max_cost, 1.0) * (cost.size + 1))
+            rows, cols = linear_sum_assignment(masked)
+            keep = gated[rows, cols]
+            return list(zip(rows[keep].tolist(), cols[keep].tolist()))
+        
+        return self._greedy_assign(cost, gated)
+    
+    def assign_pairs(
+        self,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        costs: np.ndarray
+    ) -> List[Tuple[int, int]]:
+        """
+        Match a sparse set of gated (row, col, cost) candidate pairs.
+        
+        Pairs whose row and column appear nowhere else are matched directly.
+        The rest is solved in one dense block when it fits within
+        hungarian_max_size, otherwise split into connected components that
+        are solved independently, so one congested area never forces a
+        global solve.
+        """
+        if not len(rows):
+            return []
+        
+        row_degree = np.bincount(rows)
+        col_degree = np.bincount(cols)
+        isolated = (row_degree[rows] == 1) & (col_degree[cols] == 1)
+        matches = list(zip(rows[isolated].tolist(), cols[isolated].tolist()))
+        rows, cols, costs = rows[~isolated], cols[~isolated], costs[~isolated]
+        if not len(rows):
+            return matches
+        if linear_sum_assignment is None:
+            return matches + self._greedy_pairs(rows, cols, costs)
+        
+        block = self._solve_block(rows, cols, costs)
+        if block is not None:
+            return matches + block
+        
+        num_rows = int(rows.max()) + 1
+        num_nodes = num_rows + int(cols.max()) + 1
+        graph = coo_matrix((np.ones(len(rows)), (rows, cols + num_rows)), shape=(num_nodes, num_nodes))
+        _, labels = connected_components(graph, directed=False)
+        pair_labels = labels[rows]
+        order = np.argsort(pair_labels, kind="stable")
+        boundaries = np.flatnonzero(np.diff(pair_labels[order])) + 1
+        
+        for group in np.split(order, boundaries):
+            block = self._solve_block(rows[group], cols[group], costs[group])
+            if block is None:
+                block = self._greedy_pairs(rows[group], cols[group], costs[group])
+            matches += block
+        return matches
+    
+    def _solve_block(
+        self,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        costs: np.ndarray
+    ) -> Optional[List[Tuple[int, int]]]:
+        """Optimal assignment over the dense block spanned by the pairs, or None if too large."""
+        block_rows, row_index = np.unique(rows, return_inverse=True)
+        block_cols, col_index = np.unique(cols, return_inverse=True)
+        if max(len(block_rows), len(block_cols)) > self.hungarian_max_size:
+            return None
+        
+        dense = np.full((len(block_rows), len(block_cols)), np.inf)
+        dense[row_index, col_index] = costs
+        return [(int(block_rows[r]), int(block_cols[c])) for r, c in self.assign(dense)]
+    
+    def _greedy_assign(self, cost: np.ndarray, gated: np.ndarray) -> List[Tuple[int, int]]:
+        rows, cols = np.nonzero(gated)
+        return self._greedy_pairs(rows, cols, cost[rows, cols])
+    
+    def _greedy_pairs(self, rows: np.ndarray, cols: np.ndarray, costs: np.ndarray) -> List[Tuple[int, int]]:
+        order = np.argsort(costs, kind="stable")
+        used_rows, used_cols = set(), set()
+        matches = []
+        for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+            if row in used_rows or col in used_cols:
+                continue
+            used_rows.add(row)
+            used_cols.add(col)
+            matches.append((row, col))
+        return matches
+    
+    def update(self, detections: List[Dict], dt: float = 1.0, timestamp: Optional[float] = None) -> List[Dict]:
         """
         Update tracker with new detections.
         
@@ -44,60 +316,76 @@ class ObjectTracker:
             detections: List of detection dicts with keys: 
                        center, bbox, class_name, confidence
         
+            dt: Sort mode only. Frames elapsed since the last update or
+                predict() call; tracks are advanced by dt before matching.
+                Pass 0 if they were already advanced with predict().
+            timestamp: Time of the frame in seconds, used for flow rates;
+                defaults to time.monotonic(). Pass stream time for recorded clips.
+        
         Returns:
             List of tracked objects with assigned IDs
         """
+        self.frame_index += 1
+        now = time.monotonic() if timestamp is None else timestamp
+        self.last_timestamp = now
+        self.flow.observe(now)
+        if self.mode == "sort":
+            return self._update_sort(detections, dt, now)
+        
+        det_to_track: Dict[int, int] = {}
+        
+        if detections and self.tracked_objects:
+            det_centers = np.array([d["center"] for d in detections], dtype=np.float64)
+            rows, pair_ids = self.grid.candidate_pairs(det_centers)
+            if len(rows):
+                track_ids, cols = np.unique(pair_ids, return_inverse=True)
+                track_centers = np.array(
+                    [self.tracked_objects[obj_id].center for obj_id in track_ids.tolist()],
+                    dtype=np.float64
+                )
+                diff = det_centers[rows] - track_centers[cols]
+                distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+                gated = distances < self.max_distance
+                for det_index, col in self.assign_pairs(rows[gated], cols[gated], distances[gated]):
+                    det_to_track[det_index] = int(track_ids[col])
+        
         matched_ids = set()
         updated_detections = []
         
-        for detection in detections:
+        for det_index, detection in enumerate(detections):
             center = detection["center"]
             bbox = detection["bbox"]
             class_name = detection["class_name"]
             confidence = detection.get("confidence", 0.9)
             
-            best_match_id = None
-            best_distance = self.max_distance
-            
-            for obj_id, tracked_obj in self.tracked_objects.items():
-                if obj_id in matched_ids:
-                    continue
-                
-                distance = self.calculate_distance(center, tracked_obj.center)
-                
-                if distance < best_distance:
-                    best_distance = distance
-                    best_match_id = obj_id
-            
-            if best_match_id is not None:
-                self.tracked_objects[best_match_id].update(center, bbox)
-                matched_ids.add(best_match_id)
-                updated_detections.append({
-                    "id": best_match_id,
-                    "center": center,
-                    "bbox": bbox,
-                    "class_name": class_name,
-                    "confidence": confidence
-                })
+            obj_id = det_to_track.get(det_index)
+            if obj_id is not None:
+                self._move(self.tracked_objects[obj_id], center, bbox, now)
+                self.grid.move(obj_id, center)
             else:
-                new_id = self.next_id
+                obj_id = self.next_id
                 self.next_id += 1
                 
-                self.tracked_objects[new_id] = TrackedObject(
-                    id=new_id,
+                self.tracked_objects[obj_id] = TrackedObject(
+                    id=obj_id,
                     class_name=class_name,
                     center=center,
                     bbox=bbox,
+                    last_seen_frame=self.frame_index,
                     confidence=confidence
                 )
-                matched_ids.add(new_id)
-                updated_detections.append({
-                    "id": new_id,
-                    "center": center,
-                    "bbox": bbox,
-                    "class_name": class_name,
-                    "confidence": confidence
-                })
+                self.grid.insert(obj_id, center)
+                if self.frame_index > 1:
+                    self.flow.record(ARRIVAL, class_name, now)
+            
+            matched_ids.add(obj_id)
+            updated_detections.append({
+                "id": obj_id,
+                "center": center,
+                "bbox": bbox,
+                "class_name": class_name,
+                "confidence": confidence
+            })
         
         for obj_id in list(self.tracked_objects.keys()):
             if obj_id not in matched_ids:
@@ -105,14 +393,422 @@ class ObjectTracker:
                 
                 if self.tracked_objects[obj_id].frames_since_seen > self.max_frames_lost:
                     del self.tracked_objects[obj_id]
+                    self.grid.remove(obj_id)
         
         return updated_detections
     
+    def predict(self, dt: float = 1.0) -> None:
+        """
+        Advance every track by dt frames with its constant-velocity model,
+        without running detection. Only sort mode has a motion model; in
+        centroid mode this is a no-op.
+        """
+        if self.mode != "sort" or not len(self._kf_ids) or dt == 0:
+            return
+        
+        transition = np.eye(8)
+        transition[:4, 4:] = np.eye(4) * dt
+        self._kf_x = self._kf_x @ transition.T
+        self._kf_P = transition @ self._kf_P @ transition.T + _KF_PROCESS_NOISE * abs(dt)
+    
+    @staticmethod
+    def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """IoU between every box in boxes_a (rows) and boxes_b (columns), both xyxy."""
+        top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+        bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+        intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+        area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+        area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+        union = area_a[:, None] + area_b[None, :] - intersection
+        return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+    
+    def _predicted_boxes(self) -> np.ndarray:
+        centers, sizes = self._kf_x[:, :2], np.abs(self._kf_x[:, 2:4])
+        return np.hstack([centers - sizes / 2, centers + sizes / 2])
+    
+    def _move(
+        self,
+        tracked: TrackedObject,
+        center: Tuple[int, int],
+        bbox: Tuple[int, int, int, int],
+        now: float
+    ) -> None:
+        """Apply a matched detection to a track and count a stop line crossing, once per track."""
+        previous = tracked.center
+        tracked.update(center, bbox, self.frame_index)
+        if self.stop_line is not None and not tracked.crossed and self.stop_line.crossed(previous, center):
+            tracked.crossed = True
+            self.flow.record(DISCHARGE, tracked.class_name, now)
+    
+    def _update_sort(self, detections: List[Dict], dt: float, now: float) -> List[Dict]:
+        self.predict(dt)
+        
+        matches: List[Tuple[int, int]] = []
+        if detections:
+            det_boxes = np.array([d["bbox"] for d in detections], dtype=np.float64).reshape(-1, 4)
+            if len(self._kf_ids):
+                iou = self.iou_matrix(det_boxes, self._predicted_boxes())
+                matches = self.assign(1.0 - iou, max_cost=1.0 - self.iou_threshold)
+        
+        if matches:
+            det_rows = np.array([d for d, _ in matches])
+            kf_rows = np.array([r for _, r in matches])
+            self._kf_correct(kf_rows, _boxes_to_measurements(det_boxes[det_rows]))
+        
+        det_to_row = dict(matches)
+        seen = np.zeros(len(self._kf_ids), dtype=bool)
+        new_rows = []
+        updated_detections = []
+        
+        for det_index, detection in enumerate(detections):
+            center = detection["center"]
+            bbox = detection["bbox"]
+            class_name = detection["class_name"]
+            confidence = detection.get("confidence", 0.9)
+            
+            row = det_to_row.get(det_index)
+            if row is not None:
+                obj_id = int(self._kf_ids[row])
+                self._move(self.tracked_objects[obj_id], center, bbox, now)
+                seen[row] = True
+            else:
+                obj_id = self.next_id
+                self.next_id += 1
+                self.tracked_objects[obj_id] = TrackedObject(
+                    id=obj_id,
+                    class_name=class_name,
+                    center=center,
+                    bbox=bbox,
+                    last_seen_frame=self.frame_index,
+                    confidence=confidence
+                )
+                new_rows.append((obj_id, det_index))
+                if self.frame_index > 1:
+                    self.flow.record(ARRIVAL, class_name, now)
+            
+            updated_detections.append({
+                "id": obj_id,
+                "center": center,
+                "bbox": bbox,
+                "class_name": class_name,
+                "confidence": confidence
+            })
+        
+        keep = np.ones(len(self._kf_ids), dtype=bool)
+        for row in np.flatnonzero(~seen).tolist():
+            obj_id = int(self._kf_ids[row])
+            tracked = self.tracked_objects[obj_id]
+            tracked.frames_since_seen += 1
+            if tracked.frames_since_seen > self.max_frames_lost:
+                del self.tracked_objects[obj_id]
+                keep[row] = False
+        if not keep.all():
+            self._kf_ids, self._kf_x, self._kf_P = self._kf_ids[keep], self._kf_x[keep], self._kf_P[keep]
+        
+        if new_rows:
+            ids = np.array([obj_id for obj_id, _ in new_rows], dtype=np.int64)
+            state = np.zeros((len(new_rows), 8))
+            state[:, :4] = _boxes_to_measurements(det_boxes[[d for _, d in new_rows]])
+            self._kf_ids = np.concatenate([self._kf_ids, ids])
+            self._kf_x = np.concatenate([self._kf_x, state])
+            self._kf_P = np.concatenate([self._kf_P, np.broadcast_to(_KF_INITIAL_COVARIANCE, (len(ids), 8, 8))])
+        
+        return updated_detections
+    
+    def _kf_correct(self, rows: np.ndarray, measurements: np.ndarray) -> None:
+        """Vectorized Kalman measurement update for the given state rows."""
+        x, P = self._kf_x[rows], self._kf_P[rows]
+        innovation = measurements - x[:, :4]
+        S = P[:, :4, :4] + _KF_MEASUREMENT_NOISE
+        gain = np.linalg.solve(S, P[:, :4, :]).transpose(0, 2, 1)
+        self._kf_x[rows] = x + np.einsum("kij,kj->ki", gain, innovation)
+        self._kf_P[rows] = P - gain @ P[:, :4, :]
+    
+    def _sync_from_state(self) -> None:
+        """Copy predicted positions from the Kalman state onto the TrackedObjects."""
+        boxes = np.rint(self._predicted_boxes()).astype(int).tolist()
+        centers = np.rint(self._kf_x[:, :2]).astype(int).tolist()
+        for obj_id, center, bbox in zip(self._kf_ids.tolist(), centers, boxes):
+            tracked = self.tracked_objects[obj_id]
+            tracked.center = tuple(center)
+            tracked.bbox = tuple(bbox)
+    
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """
+        Tracker state as flat arrays: tracker scalars, "track_" arrays with
+        one row per track, "kf_" arrays with one row per Kalman state and
+        "flow_" arrays for the flow counter.
+        """
+        tracks = list(self.tracked_objects.values())
+        state = {
+            "next_id": np.array(self.next_id, dtype=np.int64),
+            "frame_index": np.array(self.frame_index, dtype=np.int64),
+            "last_timestamp": np.array(np.nan if self.last_timestamp is None else self.last_timestamp),
+            "track_ids": np.array([t.id for t in tracks], dtype=np.int64),
+            "track_classes": np.array([t.class_name for t in tracks], dtype=str),
+            "track_centers": np.array([t.center for t in tracks], dtype=np.int32).reshape(-1, 2),
+            "track_bboxes": np.array([t.bbox for t in tracks], dtype=np.int32).reshape(-1, 4),
+            "track_last_seen": np.array([t.last_seen_frame for t in tracks], dtype=np.int64),
+            "track_frames_lost": np.array([t.frames_since_seen for t in tracks], dtype=np.int32),
+            "track_confidences": np.array([t.confidence for t in tracks], dtype=np.float32),
+            "track_crossed": np.array([t.crossed for t in tracks], dtype=bool),
+            "kf_ids": self._kf_ids.copy(),
+            "kf_x": self._kf_x.copy(),
+            "kf_P": self._kf_P.copy()
+        }
+        for name, array in self.flow.export_state().items():
+            state[f"flow_{name}"] = array
+        return state
+    
+    def load_state(self, state: Dict[str, np.ndarray], time_shift: float = 0.0) -> None:
+        """
+        Restore from export_state() output.
+        
+        Args:
+            state: Arrays produced by export_state()
+            time_shift: Seconds to add to stored timestamps, mapping the
+                old process's clock onto this one
+        """
+        self.reset()
+        self.next_id = int(state["next_id"])
+        self.frame_index = int(state["frame_index"])
+        last_timestamp = float(state["last_timestamp"])
+        self.last_timestamp = None if np.isnan(last_timestamp) else last_timestamp + time_shift
+        
+        for values in zip(
+            state["track_ids"].tolist(),
+            state["track_classes"].tolist(),
+            state["track_centers"].tolist(),
+            state["track_bboxes"].tolist(),
+            state["track_last_seen"].tolist(),
+            state["track_frames_lost"].tolist(),
+            state["track_confidences"].tolist(),
+            state["track_crossed"].tolist()
+        ):
+            obj_id, class_name, center, bbox, last_seen, frames_lost, confidence, crossed = values
+            tracked = TrackedObject(
+                obj_id, class_name, tuple(center), tuple(bbox), last_seen, frames_lost, confidence
+            )
+            tracked.crossed = crossed
+            self.tracked_objects[obj_id] = tracked
+            self.grid.insert(obj_id, tracked.center)
+        
+        if self.mode == "sort":
+            if set(state["kf_ids"].tolist()) == set(self.tracked_objects):
+                self._kf_ids = state["kf_ids"].astype(np.int64)
+                self._kf_x = state["kf_x"].astype(np.float64)
+                self._kf_P = state["kf_P"].astype(np.float64)
+            elif self.tracked_objects:
+                # Saved by a centroid tracker: start each track's filter from its last box.
+                self._kf_ids = state["track_ids"].astype(np.int64)
+                self._kf_x = np.zeros((len(self._kf_ids), 8))
+                self._kf_x[:, :4] = _boxes_to_measurements(state["track_bboxes"].astype(np.float64))
+                self._kf_P = np.repeat(_KF_INITIAL_COVARIANCE[None], len(self._kf_ids), axis=0)
+        
+        flow_state = {name[5:]: array for name, array in state.items() if name.startswith("flow_")}
+        self.flow.load_state(flow_state, time_shift)
+    
     def get_active_objects(self) -> List[TrackedObject]:
         """Get list of currently tracked objects."""
+        if self.mode == "sort":
+            self._sync_from_state()
         return list(self.tracked_objects.values())
     
     def reset(self) -> None:
         """Reset tracker state."""
         self.tracked_objects.clear()
+        self.grid.clear()
+        self._kf_ids = np.empty(0, dtype=np.int64)
+        self._kf_x = np.empty((0, 8))
+        self._kf_P = np.empty((0, 8, 8))
         self.next_id = 0
+        self.frame_index = 0
+        self.flow.reset()
+        self.last_timestamp = None
+
+
+class _RegistryEntry:
+    __slots__ = ("tracker", "lock", "last_used")
+    
+    def __init__(self, tracker: ObjectTracker):
+        self.tracker = tracker
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class TrackerRegistry:
+    """
+    One ObjectTracker per intersection approach, created on first use and
+    evicted after idle_timeout seconds without updates.
+    """
+    
+    def __init__(
+        self,
+        idle_timeout: float = Config.TRACKER_IDLE_TIMEOUT,
+        stop_lines: Optional[Dict[Tuple[str, str], Tuple[float, float, float, float]]] = None,
+        flow_listener: Optional[Callable[[str, str, float, float], None]] = None,
+        **tracker_kwargs
+    ):
+        """
+        Args:
+            idle_timeout: Seconds without updates before a tracker is dropped
+            stop_lines: Stop line per (intersection_id, direction); defaults to
+                the stop_lines of Config.INTERSECTIONS
+            flow_listener: Called as (intersection_id, direction, arrival_rate,
+                discharge_rate) after every update, e.g. the signal controller
+            tracker_kwargs: Passed to every ObjectTracker
+        """
+        if stop_lines is None:
+            stop_lines = {
+                (intersection.intersection_id, direction): line
+                for intersection in Config.INTERSECTIONS
+                for direction, line in intersection.stop_lines.items()
+            }
+        self.idle_timeout = idle_timeout
+        self.stop_lines = stop_lines
+        self.flow_listener = flow_listener
+        self.tracker_kwargs = tracker_kwargs
+        self._entries: Dict[Tuple[str, str], _RegistryEntry] = {}
+        self._lock = threading.Lock()
+        self._last_eviction = time.monotonic()
+        self.evicted = 0
+    
+    def get(self, intersection_id: str, direction: str) -> ObjectTracker:
+        return self._entry(intersection_id, direction).tracker
+    
+    def update(
+        self,
+        intersection_id: str,
+        direction: str,
+        analysis,
+        timestamp: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Feed one FrameAnalysis into the approach's tracker.
+        
+        Detection dicts are built straight from the columnar boxes, so no
+        Detection objects are materialized.
+        """
+        boxes = analysis.boxes
+        class_names = analysis.class_names
+        detections = [
+            {
+                "center": tuple(center),
+                "bbox": tuple(bbox),
+                "class_name": class_names.get(class_id, str(class_id)),
+                "confidence": confidence
+            }
+            for class_id, confidence, bbox, center in zip(
+                boxes.class_ids.tolist(),
+                boxes.confidences.tolist(),
+                boxes.xyxy.tolist(),
+                boxes.centers.tolist()
+            )
+        ]
+        
+        entry = self._entry(intersection_id, direction)
+        with entry.lock:
+            result = entry.tracker.update(detections, timestamp=timestamp)
+            arrival_rate, discharge_rate = entry.tracker.flow.rates(entry.tracker.last_timestamp)
+        if self.flow_listener is not None:
+            self.flow_listener(intersection_id, direction, arrival_rate, discharge_rate)
+        self._maybe_evict()
+        return result
+    
+    def items(self) -> List[Tuple[Tuple[str, str], ObjectTracker]]:
+        with self._lock:
+            return [(key, entry.tracker) for key, entry in self._entries.items()]
+    
+    def active_objects(
+        self,
+        intersection_id: Optional[str] = None,
+        direction: Optional[str] = None
+    ) -> Dict[Tuple[str, str], List[TrackedObject]]:
+        """Active tracks of every matching approach (all when no filter is given)."""
+        result = {}
+        for key, entry in self._matching(intersection_id, direction):
+            with entry.lock:
+                result[key] = entry.tracker.get_active_objects()
+        return result
+    
+    def flow_snapshots(
+        self,
+        intersection_id: Optional[str] = None,
+        direction: Optional[str] = None
+    ) -> Dict[Tuple[str, str], Dict]:
+        """Flow rates and per-class counts of every matching approach, as of its last update."""
+        result = {}
+        for key, entry in self._matching(intersection_id, direction):
+            with entry.lock:
+                tracker = entry.tracker
+                now = tracker.last_timestamp if tracker.last_timestamp is not None else time.monotonic()
+                snapshot = tracker.flow.snapshot(now)
+            snapshot["stop_line"] = tracker.stop_line is not None
+            result[key] = snapshot
+        return result
+    
+    def reset(self, intersection_id: Optional[str] = None, direction: Optional[str] = None) -> int:
+        """Reset matching trackers (all when no filter is given); returns how many."""
+        matching = self._matching(intersection_id, direction)
+        for _, entry in matching:
+            with entry.lock:
+                entry.tracker.reset()
+        return len(matching)
+    
+    def _matching(
+        self,
+        intersection_id: Optional[str],
+        direction: Optional[str]
+    ) -> List[Tuple[Tuple[str, str], _RegistryEntry]]:
+        with self._lock:
+            return [
+                (key, entry) for key, entry in self._entries.items()
+                if (intersection_id is None or key[0] == intersection_id)
+                and (direction is None or key[1] == direction)
+            ]
+    
+    def export_state(self) -> Tuple[List[Tuple[str, str]], List[Dict[str, np.ndarray]]]:
+        """Keys and export_state() of every tracker, each taken under its lock."""
+        keys, states = [], []
+        for key, entry in self._matching(None, None):
+            with entry.lock:
+                states.append(entry.tracker.export_state())
+            keys.append(key)
+        return keys, states
+    
+    def load_state(
+        self,
+        keys: List[Tuple[str, str]],
+        states: List[Dict[str, np.ndarray]],
+        time_shift: float = 0.0
+    ) -> None:
+        """Recreate trackers from export_state() output."""
+        for (intersection_id, direction), state in zip(keys, states):
+            entry = self._entry(intersection_id, direction)
+            with entry.lock:
+                entry.tracker.load_state(state, time_shift)
+    
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [key for key, entry in self._entries.items() if now - entry.last_used > self.idle_timeout]
+            for key in idle:
+                del self._entries[key]
+            self.evicted += len(idle)
+            self._last_eviction = now
+        return len(idle)
+    
+    def _entry(self, intersection_id: str, direction: str) -> _RegistryEntry:
+        key = (intersection_id, direction)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                tracker = ObjectTracker(stop_line=self.stop_lines.get(key), **self.tracker_kwargs)
+                entry = _RegistryEntry(tracker)
+                self._entries[key] = entry
+            entry.last_used = time.monotonic()
+            return entry
+    
+    def _maybe_evict(self) -> None:
+        if time.monotonic() - self._last_eviction > self.idle_timeout / 10:
+            self.evict_idle()
@@ -0,0 +1,63 @@
+import argparse
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+def serve(
+    app,
+    host: str = Config.API_HOST,
+    port: int = Config.API_PORT,
+    threads: int = Config.SERVER_THREADS,
+    connection_limit: int = Config.SERVER_CONNECTION_LIMIT
+) -> None:
+    """
+    Serve the API with waitress, a multi-threaded production WSGI server.
+    
+    The app runs in a single process on purpose: the signal controller,
+    scheduler, trackers and preemption state live in memory, and several
+    worker processes would each drive their own copy of every intersection.
+    Detection throughput comes from the DetectionExecutor and, with
+    DETECTOR_POOL_SIZE set, DetectorPool processes; the request threads only
+    parse requests and wait, so a few of them always stay free for reads.
+    
+    Args:
+        app: WSGI application
+        host: Interface to bind
+        port: Port to bind
+        threads: Request threads; keep above Config.DETECTION_MAX_PENDING
+        connection_limit: Open connections accepted before new ones wait
+    
+    Raises:
+        ImportError: If waitress is not installed
+    """
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError as e:
+        raise ImportError("Production serving requires waitress: pip install waitress") from e
+    
+    if threads <= Config.DETECTION_MAX_PENDING:
+        logger.warning(
+            f"SERVER_THREADS ({threads}) <= DETECTION_MAX_PENDING ({Config.DETECTION_MAX_PENDING}): "
+            "a burst of uploads can occupy every request thread and stall signal reads"
+        )
+    logger.info(f"Serving API on http://{host}:{port} with {threads} threads")
+    waitress_serve(app, host=host, port=port, threads=threads, connection_limit=connection_limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the traffic management API on the production server.")
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    parser.add_argument("--threads", type=int, default=Config.SERVER_THREADS, help="Request threads")
+    args = parser.parse_args()
+    
+    # Importing the app loads the model and starts the scheduler, so only do it when actually serving.
+    from app import app
+    serve(app, args.host, args.port, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
+import threading
 import time
+import numpy as np
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional
 from datetime import datetime, timedelta
 from config import TrafficLightState, SignalTiming, Config
 from logger import setup_logger
+from corridor_coordinator import CoordinationPlan
+from timing_strategies import TimingStrategy, create_strategy, linear_duration
+from vectorized_controller import VectorizedSignalController
 
 
 logger = setup_logger(__name__)
 
+# Interrupted greens with less time left than this are not resumed after preemption.
+_MIN_RESTORE = 1.0
+
 
 @dataclass
 class SignalState:
@@ -16,11 +25,56 @@ class SignalState:
     current_state: TrafficLightState
     duration: int
     elapsed_time: int = 0
-    changed_at: datetime = field(default_factory=datetime.now)
+    changed_at: float = field(default_factory=time.monotonic)
+    
+    @property
+    def deadline(self) -> float:
+        """Monotonic time at which the current phase ends."""
+        return self.changed_at + self.duration
+    
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (time.monotonic() if now is None else now) >= self.deadline
     
-    def is_expired(self) -> bool:
-        elapsed = (datetime.now() - self.changed_at).total_seconds()
-        return elapsed >= self.duration
+    def set_phase(self, state: TrafficLightState, now: float, duration: Optional[int] = None) -> None:
+        self.current_state = state
+        self.changed_at = now
+        if duration is not None:
+            self.duration = duration
+
+
+class IntersectionSnapshot(NamedTuple):
+    """
+    Immutable view of an intersection for lock-free readers.
+    
+    Writers never modify a published snapshot; they build a new one (with
+    a higher version) and swap the reference, so a reader always sees one
+    consistent state without taking a lock. A NamedTuple rather than a
+    frozen dataclass because one is built on every vehicle count update,
+    and tuples are several times cheaper to construct.
+    """
+    version: int
+    signal_states: Mapping[str, str]
+    active_direction: Optional[str]
+    deadline: Optional[float]
+    vehicle_counts: Mapping[str, int]
+    flow_rates: Mapping[str, Mapping[str, float]]
+    emergency_mode: bool
+    optimization_enabled: bool
+    timing_strategy: str
+    coordinated: bool
+    preempted_direction: Optional[str]
+
+
+@dataclass
+class Preemption:
+    """An emergency preemption in progress, and the green it interrupted."""
+    direction: str
+    hold: float
+    detected_at: float
+    restore_direction: Optional[str] = None
+    restore_remaining: float = 0.0
+    green_at: Optional[float] = None
+    releasing: bool = False
 
 
 @dataclass
@@ -28,25 +82,61 @@ class IntersectionState:
     intersection_id: str
     signals: Dict[str, SignalState]
     last_vehicle_counts: Dict[str, int] = field(default_factory=dict)
+    flow_rates: Dict[str, Dict[str, float]] = field(default_factory=dict)
     has_emergency: bool = False
     optimization_enabled: bool = True
+    signal_timing: SignalTiming = None
+    strategy: TimingStrategy = None
+    coordination: Optional[CoordinationPlan] = None
+    preemption: Optional[Preemption] = None
+    snapshot: Optional[IntersectionSnapshot] = None
 
 
 class TrafficSignalController:
-    def __init__(self, signal_timing: SignalTiming = None):
+    """
+    Signal state for every intersection, safe to share between request
+    threads.
+    
+    Writers take the lock of the intersection's stripe (one of
+    lock_stripes locks, chosen by hashing the id), so changes to different
+    intersections rarely contend, then publish a new IntersectionSnapshot.
+    Readers (status, signal states, deadlines, the status table) only read
+    published snapshots and never lock.
+    """
+    
+    def __init__(self, signal_timing: SignalTiming = None, lock_stripes: int = Config.SIGNAL_LOCK_STRIPES):
         self.signal_timing = signal_timing or SignalTiming()
         self.intersections: Dict[str, IntersectionState] = {}
         self.emergency_mode = False
+        # Called with an intersection id whenever its next phase deadline moves (see SignalScheduler).
+        self.deadline_listener: Optional[Callable[[str], None]] = None
+        # Called with (intersection id, direction, detected_at, green_at) when a preempted direction turns green.
+        self.preemption_listener: Optional[Callable[[str, str, float, float], None]] = None
+        self._stripes = [threading.RLock() for _ in range(max(1, lock_stripes))]
         logger.info("Traffic Signal Controller initialized")
     
     def initialize_intersection(
         self, 
         intersection_id: str, 
-        directions: List[str] = None
+        directions: List[str] = None,
+        strategy: Optional[str] = None,
+        signal_timing: Optional[SignalTiming] = None,
+        now: Optional[float] = None
     ) -> None:
-        """Initialize signals for an intersection."""
+        """
+        Initialize signals for an intersection.
+        
+        Args:
+            intersection_id: ID of the intersection
+            directions: Approaches in round-robin order (default: north, south, east, west)
+            strategy: Timing strategy name (default: Config.SIGNAL_STRATEGY)
+            signal_timing: Green and yellow limits for this intersection (default: the controller's)
+            now: Monotonic time the first green starts (default: now); simulations pass their clock
+        """
         if directions is None:
             directions = ["north", "south", "east", "west"]
+        signal_timing = signal_timing or self.signal_timing
+        now = time.monotonic() if now is None else now
         
         signals = {}
         for i, direction in enumerate(directions):
@@ -54,13 +144,19 @@ class TrafficSignalController:
             signals[direction] = SignalState(
                 direction=direction,
                 current_state=state,
-                duration=self.signal_timing.min_duration
+                duration=signal_timing.min_duration,
+                changed_at=now
             )
         
-        self.intersections[intersection_id] = IntersectionState(
+        intersection = IntersectionState(
             intersection_id=intersection_id,
-            signals=signals
+            signals=signals,
+            signal_timing=signal_timing,
+            strategy=create_strategy(strategy, signal_timing, directions)
         )
+        with self._lock(intersection_id):
+            self._replace(intersection)
+        self._deadline_changed(intersection_id)
         logger.info(f"Initialized intersection {intersection_id} with {len(directions)} directions")
     
     def update_vehicle_counts(
@@ -75,13 +171,85 @@ class TrafficSignalController:
             logger.warning(f"Intersection {intersection_id} not initialized")
             return
         
-        intersection = self.intersections[intersection_id]
-        intersection.last_vehicle_counts[direction] = vehicle_count
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            intersection.last_vehicle_counts[direction] = vehicle_count
+            intersection.strategy.observe_count(direction, vehicle_count)
+            if emergency_vehicles > 0:
+                intersection.has_emergency = True
+            self._publish(intersection, phases=False)
         
         if emergency_vehicles > 0:
-            intersection.has_emergency = True
             logger.warning(f"Emergency vehicle detected at {intersection_id} - {direction}")
     
+    def update_flow_rates(
+        self,
+        intersection_id: str,
+        direction: str,
+        arrival_rate: float,
+        discharge_rate: float
+    ) -> None:
+        """
+        Update measured flow for a specific direction.
+        
+        Args:
+            intersection_id: ID of the intersection
+            direction: Direction of the approach
+            arrival_rate: Vehicles per minute entering the approach
+            discharge_rate: Vehicles per minute crossing the stop line
+        """
+        if intersection_id not in self.intersections:
+            return
+        
+        rates = {"arrival_rate": round(arrival_rate, 2), "discharge_rate": round(discharge_rate, 2)}
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            intersection.flow_rates[direction] = rates
+            intersection.strategy.observe_flow(direction, rates["arrival_rate"], rates["discharge_rate"])
+            self._publish(intersection, phases=False)
+    
+    def set_strategy(self, intersection_id: str, strategy: str) -> bool:
+        """
+        Switch an intersection's timing strategy, seeding it with the latest
+        counts and flow rates.
+        
+        Returns:
+            False if the intersection does not exist
+        """
+        if intersection_id not in self.intersections:
+            return False
+        
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            replacement = create_strategy(strategy, intersection.signal_timing, list(intersection.signals.keys()))
+            for direction, count in intersection.last_vehicle_counts.items():
+                replacement.observe_count(direction, count)
+            for direction, rates in intersection.flow_rates.items():
+                replacement.observe_flow(direction, rates["arrival_rate"], rates["discharge_rate"])
+            intersection.strategy = replacement
+            self._publish(intersection)
+        logger.info(f"Timing strategy at {intersection_id} set to {replacement.name}")
+        return True
+    
+    def set_coordination(self, intersection_id: str, plan: Optional[CoordinationPlan]) -> bool:
+        """
+        Run an intersection on a fixed-time coordination plan (see
+        corridor_coordinator), or back on its strategy when plan is None.
+        The current phase runs out first, so the switch never skips a
+        yellow.
+        
+        Returns:
+            False if the intersection does not exist
+        """
+        if intersection_id not in self.intersections:
+            return False
+        
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            intersection.coordination = plan
+            self._publish(intersection)
+        return True
+    
     def optimize_signal_duration(
         self, 
         intersection_id: str, 
@@ -91,6 +259,9 @@ class TrafficSignalController:
         """
         Calculate optimized signal duration based on vehicle count.
         
+        This is the linear rule; intersections pick their own strategy
+        (see timing_strategies), and LinearStrategy applies this rule.
+        
         Args:
             intersection_id: ID of the intersection
             direction: Direction of the signal
@@ -99,20 +270,125 @@ class TrafficSignalController:
         Returns:
             Optimized duration in seconds
         """
-        min_time = self.signal_timing.min_duration
-        max_time = self.signal_timing.max_duration
+        intersection = self.intersections.get(intersection_id)
+        signal_timing = intersection.signal_timing if intersection is not None else self.signal_timing
+        return linear_duration(vehicle_count, signal_timing)
+    
+    def next_deadline(self, intersection_id: str) -> Optional[float]:
+        """
+        Monotonic time of the intersection's next phase change.
+        
+        Returns:
+            The deadline, or None if the intersection does not exist
+        """
+        intersection = self.intersections.get(intersection_id)
+        if intersection is None:
+            return None
+        deadline = intersection.snapshot.deadline
+        # With every signal red, the next green is due immediately.
+        return deadline if deadline is not None else time.monotonic()
+    
+    def advance(self, intersection_id: str, now: Optional[float] = None) -> bool:
+        """
+        Apply the intersection's next phase change if it is due: an expired
+        green turns yellow for yellow_duration (unless the strategy extends
+        it), an expired yellow turns red and the direction the strategy
+        picks turns green for the duration it picks. Coordinated
+        intersections follow their plan instead, and preempted ones the
+        preemption sequence (see preempt()).
+        
+        Args:
+            intersection_id: ID of the intersection
+            now: Monotonic time to evaluate expiry at (default: now)
+            
+        Returns:
+            Whether a phase changed
+        """
+        now = time.monotonic() if now is None else now
+        if intersection_id not in self.intersections:
+            return False
         
-        if vehicle_count == 0:
-            return min_time
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            
+            strategy = intersection.strategy
+            optimized = intersection.optimization_enabled
+            active = self._active_signal(intersection)
+            if active is not None and not active.is_expired(now):
+                return False
+            if intersection.preemption is not None or intersection.coordination is not None:
+                if intersection.preemption is not None:
+                    self._advance_preempted(intersection, active, now)
+                else:
+                    self._advance_coordinated(intersection, active, now)
+                self._publish(intersection)
+                self._deadline_changed(intersection_id)
+                return True
+            if active is not None and active.current_state == TrafficLightState.GREEN:
+                extension = strategy.extension(active.direction, active.duration) if optimized else 0
+                if extension > 0:
+                    active.duration += extension
+                else:
+                    active.set_phase(TrafficLightState.YELLOW, now, intersection.signal_timing.yellow_duration)
+                self._publish(intersection)
+                self._deadline_changed(intersection_id)
+                return True
+            
+            current = None
+            if active is not None:
+                active.set_phase(TrafficLightState.RED, now)
+                current = active.direction
+            next_signal = self._start_next_green(intersection, current, now)
+            self._publish(intersection)
+            self._deadline_changed(intersection_id)
         
-        density = min(vehicle_count / 50, 1.0)
-        duration = min_time + int((max_time - min_time) * density)
+        logger.debug(
+            f"Signal cycled at {intersection_id}: "
+            f"{current} -> {next_signal.direction} (duration: {next_signal.duration}s)"
+        )
+        return True
+    
+    def _start_next_green(self, intersection: IntersectionState, current: Optional[str], now: float) -> SignalState:
+        """Turn green the direction the strategy picks after current (all signals are red)."""
+        strategy = intersection.strategy
+        if intersection.optimization_enabled:
+            next_direction = strategy.next_direction(current)
+            duration = strategy.green_duration(next_direction)
+        else:
+            next_direction = TimingStrategy.next_direction(strategy, current)
+            duration = intersection.signal_timing.min_duration
+        next_signal = intersection.signals[next_direction]
+        next_signal.set_phase(TrafficLightState.GREEN, now, duration)
+        return next_signal
+    
+    def _advance_coordinated(
+        self,
+        intersection: IntersectionState,
+        active: Optional[SignalState],
+        now: float
+    ) -> None:
+        """Phase change for an intersection on a coordination plan, joining the plan where it is at now."""
+        plan = intersection.coordination
+        index, in_green, remaining = plan.phase_at(now)
+        if active is not None and active.current_state == TrafficLightState.GREEN:
+            if in_green and plan.directions[index] == active.direction:
+                # Already showing the planned green (e.g. just joined the plan): hold it until the plan ends it.
+                active.duration = now - active.changed_at + remaining
+            else:
+                active.set_phase(TrafficLightState.YELLOW, now, intersection.signal_timing.yellow_duration)
+            return
         
-        return duration
+        if active is not None:
+            active.set_phase(TrafficLightState.RED, now)
+        if not in_green:
+            # Inside a planned yellow: start the following green early rather than sit in all-red.
+            index = (index + 1) % len(plan.directions)
+            remaining += plan.greens[index]
+        intersection.signals[plan.directions[index]].set_phase(TrafficLightState.GREEN, now, remaining)
     
     def cycle_signal(self, intersection_id: str) -> Dict[str, TrafficLightState]:
         """
-        Cycle traffic signals to the next state.
+        Apply any due phase change to the intersection's signals.
         
         Returns:
             Dictionary with current signal states
@@ -121,54 +397,16 @@ class TrafficSignalController:
             logger.warning(f"Intersection {intersection_id} not found")
             return {}
         
-        intersection = self.intersections[intersection_id]
-        directions = list(intersection.signals.keys())
-        
-        current_green_direction = None
-        for direction, signal in intersection.signals.items():
-            if signal.current_state == TrafficLightState.GREEN:
-                current_green_direction = direction
-                break
-        
-        if current_green_direction is None:
-            directions[0]
-        
-        if current_green_direction and signal.is_expired():
-            next_index = (directions.index(current_green_direction) + 1) % len(directions)
-            
-            intersection.signals[current_green_direction].current_state = TrafficLightState.RED
-            
-            for direction in directions:
-                if direction != current_green_direction:
-                    intersection.signals[direction].current_state = TrafficLightState.RED
-            
-            next_direction = directions[next_index]
-            next_signal = intersection.signals[next_direction]
-            next_signal.current_state = TrafficLightState.GREEN
-            next_signal.changed_at = datetime.now()
-            
-            if intersection.optimization_enabled:
-                vehicle_count = intersection.last_vehicle_counts.get(next_direction, 0)
-                next_signal.duration = self.optimize_signal_duration(
-                    intersection_id, 
-                    next_direction, 
-                    vehicle_count
-                )
-            
-            logger.info(
-                f"Signal cycled at {intersection_id}: "
-                f"{current_green_direction} -> {next_direction} (duration: {next_signal.duration}s)"
-            )
-        
-        return {
-            direction: signal.current_state.value 
-            for direction, signal in intersection.signals.items()
-        }
+        self.advance(intersection_id)
+        return self.get_signal_state(intersection_id)
     
     def handle_emergency(self, intersection_id: str, direction: str) -> Dict[str, str]:
         """
         Handle emergency vehicle by giving it priority.
         
+        Operator-triggered preemption: the direction is held green for
+        EMERGENCY_MANUAL_HOLD seconds, then the interrupted phase resumes.
+        
         Args:
             intersection_id: ID of the intersection
             direction: Direction of emergency vehicle
@@ -180,49 +418,401 @@ class TrafficSignalController:
             logger.warning(f"Intersection {intersection_id} not found")
             return {}
         
-        intersection = self.intersections[intersection_id]
+        self.preempt(intersection_id, direction, hold=Config.EMERGENCY_MANUAL_HOLD)
+        return self.get_signal_state(intersection_id)
+    
+    def preempt(
+        self,
+        intersection_id: str,
+        direction: str,
+        hold: float = Config.EMERGENCY_MAX_HOLD,
+        detected_at: Optional[float] = None,
+        now: Optional[float] = None
+    ) -> bool:
+        """
+        Give an emergency vehicle's direction green as fast as is safe.
         
-        for direction_key, signal in intersection.signals.items():
-            signal.current_state = TrafficLightState.RED if direction_key != direction else TrafficLightState.GREEN
-            signal.changed_at = datetime.now()
-            signal.duration = 30
+        A conflicting green gets its yellow clearance first; a yellow
+        already running finishes. The direction is then held green until
+        release() or until hold seconds pass, after which the interrupted
+        green resumes with the time it had left.
         
-        logger.warning(f"Emergency mode activated at {intersection_id} for direction {direction}")
+        Args:
+            intersection_id: ID of the intersection
+            direction: Approach the emergency vehicle is on
+            hold: Longest the direction is held green, in seconds
+            detected_at: Monotonic time the vehicle was first seen, for latency (default: now)
+            now: Monotonic time of the request (default: now)
         
-        return {
-            direction: signal.current_state.value 
-            for direction, signal in intersection.signals.items()
-        }
+        Returns:
+            Whether the direction is (or is becoming) the preempted one;
+            False if it does not exist or another direction holds preemption
+        """
+        now = time.monotonic() if now is None else now
+        if intersection_id not in self.intersections:
+            return False
+        
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            if direction not in intersection.signals:
+                logger.warning(f"Intersection {intersection_id} has no {direction} signal to preempt")
+                return False
+            if intersection.preemption is not None:
+                return intersection.preemption.direction == direction and not intersection.preemption.releasing
+            
+            preemption = Preemption(direction, hold, detected_at if detected_at is not None else now)
+            active = self._active_signal(intersection)
+            if active is not None and active.current_state == TrafficLightState.GREEN:
+                preemption.restore_direction = active.direction
+                preemption.restore_remaining = max(active.deadline - now, 0.0)
+            intersection.preemption = preemption
+            intersection.has_emergency = True
+            
+            if active is None or (active.current_state == TrafficLightState.GREEN and active.direction == direction):
+                self._start_preempted_green(intersection, now)
+            elif active.current_state == TrafficLightState.GREEN:
+                active.set_phase(TrafficLightState.YELLOW, now, intersection.signal_timing.yellow_duration)
+            # A running yellow is already clearing; advance() turns the direction green when it ends.
+            self._publish(intersection)
+            self._deadline_changed(intersection_id)
+        
+        logger.warning(f"Emergency preemption at {intersection_id} for direction {direction}")
+        return True
+    
+    def release(self, intersection_id: str, direction: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """
+        End an intersection's preemption: the emergency green gets its
+        yellow clearance and the interrupted green resumes.
+        
+        Args:
+            intersection_id: ID of the intersection
+            direction: Only release if this is the preempted direction (default: any)
+            now: Monotonic time of the request (default: now)
+        
+        Returns:
+            Whether a preemption was released
+        """
+        now = time.monotonic() if now is None else now
+        if intersection_id not in self.intersections:
+            return False
+        
+        with self._lock(intersection_id):
+            intersection = self.intersections[intersection_id]
+            preemption = intersection.preemption
+            if preemption is None or preemption.releasing:
+                return False
+            if direction is not None and preemption.direction != direction:
+                return False
+            self._release(intersection, self._active_signal(intersection), now)
+            self._publish(intersection)
+            self._deadline_changed(intersection_id)
+        
+        logger.info(f"Emergency preemption released at {intersection_id}")
+        return True
+    
+    def _advance_preempted(
+        self,
+        intersection: IntersectionState,
+        active: Optional[SignalState],
+        now: float
+    ) -> None:
+        """Phase change for a preempted intersection whose current phase has ended."""
+        preemption = intersection.preemption
+        if active is not None and active.current_state == TrafficLightState.GREEN:
+            # Only the emergency green can expire here: its hold ran out.
+            logger.warning(f"Emergency hold at {intersection.intersection_id} ran out; restoring signals")
+            self._release(intersection, active, now)
+            return
+        
+        if active is not None:
+            active.set_phase(TrafficLightState.RED, now)
+        if preemption.releasing:
+            self._restore(intersection, now)
+        else:
+            self._start_preempted_green(intersection, now)
+    
+    def _start_preempted_green(self, intersection: IntersectionState, now: float) -> None:
+        preemption = intersection.preemption
+        signal = intersection.signals[preemption.direction]
+        if signal.current_state == TrafficLightState.GREEN:
+            signal.duration = now - signal.changed_at + preemption.hold
+        else:
+            signal.set_phase(TrafficLightState.GREEN, now, preemption.hold)
+        preemption.green_at = now
+        if self.preemption_listener is not None:
+            self.preemption_listener(intersection.intersection_id, preemption.direction, preemption.detected_at, now)
+    
+    def _release(self, intersection: IntersectionState, active: Optional[SignalState], now: float) -> None:
+        preemption = intersection.preemption
+        preemption.releasing = True
+        if active is None:
+            self._restore(intersection, now)
+        elif active.current_state == TrafficLightState.GREEN and active.direction == preemption.direction:
+            if preemption.restore_direction == preemption.direction:
+                # The interrupted green was this one: keep it and give back the time it had left.
+                active.duration = now - active.changed_at + preemption.restore_remaining
+                intersection.preemption = None
+                intersection.has_emergency = False
+            else:
+                active.set_phase(TrafficLightState.YELLOW, now, intersection.signal_timing.yellow_duration)
+        # A clearance yellow still running finishes first; advance() then restores.
+    
+    def _restore(self, intersection: IntersectionState, now: float) -> None:
+        """Resume the interrupted green (every signal is red), or continue the cycle if there is none."""
+        preemption = intersection.preemption
+        intersection.preemption = None
+        intersection.has_emergency = False
+        if preemption.restore_direction is not None and preemption.restore_remaining >= _MIN_RESTORE:
+            signal = intersection.signals[preemption.restore_direction]
+            signal.set_phase(TrafficLightState.GREEN, now, preemption.restore_remaining)
+        elif intersection.coordination is not None:
+            self._advance_coordinated(intersection, None, now)
+        else:
+            self._start_next_green(intersection, preemption.direction, now)
     
     def reset_emergency(self, intersection_id: str) -> None:
         """Reset emergency mode."""
         if intersection_id in self.intersections:
-            self.intersections[intersection_id].has_emergency = False
+            with self._lock(intersection_id):
+                intersection = self.intersections[intersection_id]
+                intersection.has_emergency = False
+                self._publish(intersection)
             logger.info(f"Emergency mode reset for {intersection_id}")
     
     def get_signal_state(self, intersection_id: str) -> Dict[str, str]:
         """Get current signal states for an intersection."""
-        if intersection_id not in self.intersections:
+        intersection = self.intersections.get(intersection_id)
+        if intersection is None:
             return {}
+        return dict(intersection.snapshot.signal_states)
+    
+    def get_signal_timing(self, intersection_id: str) -> Optional[SignalTiming]:
+        """The intersection's own timing limits, or None if it does not exist."""
+        intersection = self.intersections.get(intersection_id)
+        return intersection.signal_timing if intersection is not None else None
+    
+    def get_status_table(self) -> Dict[str, List]:
+        """Status of every intersection as parallel columns (see VectorizedSignalController)."""
+        now = time.monotonic()
+        table = {
+            "intersection_ids": [],
+            "active_direction": [],
+            "active_state": [],
+            "next_change_in": [],
+            "active_count": [],
+            "total_count": [],
+            "emergency_mode": [],
+            "timing_strategy": []
+        }
+        for intersection_id, intersection in list(self.intersections.items()):
+            snapshot = intersection.snapshot
+            active = snapshot.active_direction
+            counts = snapshot.vehicle_counts
+            table["intersection_ids"].append(intersection_id)
+            table["active_direction"].append(active)
+            table["active_state"].append(snapshot.signal_states[active] if active else TrafficLightState.RED.value)
+            table["next_change_in"].append(round(max(snapshot.deadline - now, 0.0), 2) if active else 0.0)
+            table["active_count"].append(counts.get(active, 0) if active else 0)
+            table["total_count"].append(sum(counts.get(direction, 0) for direction in snapshot.signal_states))
+            table["emergency_mode"].append(snapshot.emergency_mode)
+            table["timing_strategy"].append(snapshot.timing_strategy)
+        return table
+    
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """
+        Controller state as flat arrays: one row per intersection, and one
+        row per signal grouped by intersection through signal_offsets.
+        """
+        states = list(TrafficLightState)
+        intersections = []
+        for intersection_id in list(self.intersections):
+            # Copy each intersection under its lock so a concurrent phase change cannot tear it.
+            with self._lock(intersection_id):
+                intersection = self.intersections[intersection_id]
+                intersections.append(replace(
+                    intersection,
+                    signals={direction: replace(signal) for direction, signal in intersection.signals.items()},
+                    last_vehicle_counts=dict(intersection.last_vehicle_counts),
+                    flow_rates=dict(intersection.flow_rates)
+                ))
+        # Phase start times are stored as wall-clock time; the monotonic clock restarts with the machine.
+        wall_offset = time.time() - time.monotonic()
+        signals = [
+            (intersection, signal)
+            for intersection in intersections
+            for signal in intersection.signals.values()
+        ]
+        
+        def flow(intersection, signal, name):
+            return intersection.flow_rates.get(signal.direction, {}).get(name, np.nan)
         
-        intersection = self.intersections[intersection_id]
         return {
-            direction: signal.current_state.value 
-            for direction, signal in intersection.signals.items()
+            "emergency_mode": np.array(self.emergency_mode),
+            "intersection_ids": np.array([i.intersection_id for i in intersections], dtype=str),
+            "has_emergency": np.array([i.has_emergency for i in intersections], dtype=bool),
+            "optimization_enabled": np.array([i.optimization_enabled for i in intersections], dtype=bool),
+            "timing_strategies": np.array([i.strategy.name for i in intersections], dtype=str),
+            "signal_offsets": np.cumsum([0] + [len(i.signals) for i in intersections]).astype(np.int64),
+            "signal_directions": np.array([signal.direction for _, signal in signals], dtype=str),
+            "signal_states": np.array([states.index(signal.current_state) for _, signal in signals], dtype=np.int8),
+            "signal_durations": np.array([signal.duration for _, signal in signals], dtype=np.float64),
+            "signal_elapsed": np.array([signal.elapsed_time for _, signal in signals], dtype=np.int32),
+            "signal_changed_at": np.array([signal.changed_at for _, signal in signals]) + wall_offset,
+            "signal_vehicle_counts": np.array(
+                [i.last_vehicle_counts.get(signal.direction, -1) for i, signal in signals], dtype=np.int32
+            ),
+            "signal_arrival_rates": np.array([flow(i, signal, "arrival_rate") for i, signal in signals]),
+            "signal_discharge_rates": np.array([flow(i, signal, "discharge_rate") for i, signal in signals])
         }
     
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore intersections, signal phases and measurements from export_state() output."""
+        states = list(TrafficLightState)
+        offsets = state["signal_offsets"].tolist()
+        directions = state["signal_directions"].tolist()
+        light_states = state["signal_states"].tolist()
+        durations = state["signal_durations"].tolist()
+        elapsed = state["signal_elapsed"].tolist()
+        changed_at = state["signal_changed_at"].tolist()
+        vehicle_counts = state["signal_vehicle_counts"].tolist()
+        arrival_rates = state["signal_arrival_rates"].tolist()
+        discharge_rates = state["signal_discharge_rates"].tolist()
+        wall_offset = time.time() - time.monotonic()
+        
+        self.emergency_mode = bool(state["emergency_mode"])
+        for index, intersection_id in enumerate(state["intersection_ids"].tolist()):
+            # Timings are configuration, not state: keep the intersection's own if it has one.
+            existing = self.intersections.get(intersection_id)
+            intersection = IntersectionState(
+                intersection_id=intersection_id,
+                signals={},
+                has_emergency=bool(state["has_emergency"][index]),
+                optimization_enabled=bool(state["optimization_enabled"][index]),
+                signal_timing=existing.signal_timing if existing is not None else self.signal_timing
+            )
+            for row in range(offsets[index], offsets[index + 1]):
+                direction = directions[row]
+                intersection.signals[direction] = SignalState(
+                    direction=direction,
+                    current_state=states[light_states[row]],
+                    duration=durations[row],
+                    elapsed_time=elapsed[row],
+                    changed_at=changed_at[row] - wall_offset
+                )
+                if vehicle_counts[row] >= 0:
+                    intersection.last_vehicle_counts[direction] = vehicle_counts[row]
+                if not np.isnan(arrival_rates[row]):
+                    intersection.flow_rates[direction] = {
+                        "arrival_rate": arrival_rates[row],
+                        "discharge_rate": discharge_rates[row]
+                    }
+            strategies = state.get("timing_strategies")
+            intersection.strategy = create_strategy(
+                str(strategies[index]) if strategies is not None else None,
+                intersection.signal_timing,
+                list(intersection.signals.keys())
+            )
+            for direction, count in intersection.last_vehicle_counts.items():
+                intersection.strategy.observe_count(direction, count)
+            for direction, rates in intersection.flow_rates.items():
+                intersection.strategy.observe_flow(direction, rates["arrival_rate"], rates["discharge_rate"])
+            with self._lock(intersection_id):
+                self._replace(intersection)
+            self._deadline_changed(intersection_id)
+        
+        logger.info(f"Restored {len(self.intersections)} intersections from snapshot")
+    
     def get_intersection_status(self, intersection_id: str) -> Dict:
         """Get comprehensive status of an intersection."""
-        if intersection_id not in self.intersections:
+        intersection = self.intersections.get(intersection_id)
+        if intersection is None:
             return {}
         
-        intersection = self.intersections[intersection_id]
+        snapshot = intersection.snapshot
+        now = time.monotonic()
+        next_change_in = max(snapshot.deadline - now, 0.0) if snapshot.deadline is not None else 0.0
         
         return {
             "intersection_id": intersection_id,
-            "signal_states": self.get_signal_state(intersection_id),
-            "vehicle_counts": intersection.last_vehicle_counts,
-            "emergency_mode": intersection.has_emergency,
-            "optimization_enabled": intersection.optimization_enabled,
+            "version": snapshot.version,
+            "signal_states": dict(snapshot.signal_states),
+            "next_change_in": round(next_change_in, 2),
+            "vehicle_counts": dict(snapshot.vehicle_counts),
+            "flow_rates": {direction: dict(rates) for direction, rates in snapshot.flow_rates.items()},
+            "emergency_mode": snapshot.emergency_mode,
+            "optimization_enabled": snapshot.optimization_enabled,
+            "timing_strategy": snapshot.timing_strategy,
+            "coordinated": snapshot.coordinated,
+            "preempted_direction": snapshot.preempted_direction,
             "timestamp": datetime.now().isoformat()
         }
+    
+    def _active_signal(self, intersection: IntersectionState) -> Optional[SignalState]:
+        """The signal currently green or yellow, if any."""
+        for signal in intersection.signals.values():
+            if signal.current_state != TrafficLightState.RED:
+                return signal
+        return None
+    
+    def _lock(self, intersection_id: str) -> threading.RLock:
+        """The lock of the stripe the intersection hashes to."""
+        return self._stripes[hash(intersection_id) % len(self._stripes)]
+    
+    def _publish(self, intersection: IntersectionState, phases: bool = True) -> IntersectionSnapshot:
+        """
+        Replace the intersection's snapshot with one of its current state (caller holds its lock).
+        
+        Args:
+            intersection: Intersection to publish
+            phases: Whether signal phases may have changed; measurement
+                updates pass False to reuse the previous snapshot's phases
+        """
+        previous = intersection.snapshot
+        if phases or previous is None:
+            active = self._active_signal(intersection)
+            signal_states = MappingProxyType({
+                direction: signal.current_state.value for direction, signal in intersection.signals.items()
+            })
+            active_direction = active.direction if active is not None else None
+            deadline = active.deadline if active is not None else None
+        else:
+            signal_states = previous.signal_states
+            active_direction = previous.active_direction
+            deadline = previous.deadline
+        
+        snapshot = IntersectionSnapshot(
+            version=previous.version + 1 if previous is not None else 0,
+            signal_states=signal_states,
+            active_direction=active_direction,
+            deadline=deadline,
+            vehicle_counts=MappingProxyType(dict(intersection.last_vehicle_counts)),
+            # Rate dicts are replaced, never modified, so the inner dicts can be shared.
+            flow_rates=MappingProxyType(dict(intersection.flow_rates)),
+            emergency_mode=intersection.has_emergency,
+            optimization_enabled=intersection.optimization_enabled,
+            timing_strategy=intersection.strategy.name,
+            coordinated=intersection.coordination is not None,
+            preempted_direction=intersection.preemption.direction if intersection.preemption is not None else None
+        )
+        intersection.snapshot = snapshot
+        return snapshot
+    
+    def _replace(self, intersection: IntersectionState) -> None:
+        """Install a new state for an intersection (caller holds its lock), continuing its snapshot versions."""
+        previous = self.intersections.get(intersection.intersection_id)
+        intersection.snapshot = previous.snapshot if previous is not None else None
+        self._publish(intersection)
+        self.intersections[intersection.intersection_id] = intersection
+    
+    def _deadline_changed(self, intersection_id: str) -> None:
+        if self.deadline_listener is not None:
+            self.deadline_listener(intersection_id)
+
+
+def create_signal_controller(signal_timing: SignalTiming = None):
+    """Build the controller selected by Config.SIGNAL_CONTROLLER ("object" or "vectorized")."""
+    if Config.SIGNAL_CONTROLLER == "vectorized":
+        return VectorizedSignalController(signal_timing)
+    if Config.SIGNAL_CONTROLLER != "object":
+        raise ValueError(f"Unknown signal controller {Config.SIGNAL_CONTROLLER}, expected 'object' or 'vectorized'")
+    return TrafficSignalController(signal_timing)
@@ -0,0 +1,183 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+# Seconds to back off after the controller raises, so a persistent error cannot spin the thread.
+_ERROR_BACKOFF = 1.0
+
+
+class SignalScheduler:
+    """
+    Drives signal phase changes for every intersection from one background
+    thread.
+    
+    A min-heap holds each intersection's next deadline on the monotonic
+    clock and the thread sleeps until the earliest one is due, so idle cost
+    does not grow with the number of intersections. When a deadline moves
+    outside the scheduler (emergency preemption, manual cycling, snapshot
+    restore), the controller's deadline_listener pushes it again under a
+    new generation, and superseded heap entries are skipped when popped.
+    
+    Controllers with a step() method (VectorizedSignalController) are
+    driven in batches instead: the thread sleeps until the earliest
+    deadline over all intersections and advances every due one in a
+    single step() call.
+    """
+    
+    def __init__(self, signal_controller, jitter_samples: int = Config.SCHEDULER_JITTER_SAMPLES):
+        self.signal_controller = signal_controller
+        self.batched = hasattr(signal_controller, "step")
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generation: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        # Lateness of each transition behind its deadline, in ms, kept in a ring.
+        self._jitter = np.zeros(max(1, jitter_samples))
+        self._jitter_count = 0
+        self.transitions = 0
+        self.wakeups = 0
+    
+    def schedule(self, intersection_id: str) -> None:
+        """(Re)schedule the intersection at the controller's current deadline for it."""
+        if self.batched:
+            with self._condition:
+                self._condition.notify()
+            return
+        
+        deadline = self.signal_controller.next_deadline(intersection_id)
+        with self._condition:
+            generation = self._generation.get(intersection_id, 0) + 1
+            self._generation[intersection_id] = generation
+            if deadline is None:
+                return
+            heapq.heappush(self._heap, (deadline, generation, intersection_id))
+            if len(self._heap) > 4 * len(self._generation) + 64:
+                self._compact()
+            if self._heap[0][1:] == (generation, intersection_id):
+                # New earliest deadline: wake the thread so it does not oversleep.
+                self._condition.notify()
+    
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.signal_controller.deadline_listener = self.schedule
+        intersection_ids = list(self.signal_controller.intersections)
+        for intersection_id in intersection_ids:
+            self.schedule(intersection_id)
+        target = self._run_batched if self.batched else self._run
+        self._thread = threading.Thread(target=target, name="signal-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Signal scheduler started for {len(intersection_ids)} intersections")
+    
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify()
+        self._thread.join(timeout=5)
+        self.signal_controller.deadline_listener = None
+        self._thread = None
+        self._stop_event.clear()
+    
+    def get_stats(self) -> Dict:
+        samples = self._jitter[:min(self._jitter_count, len(self._jitter))]
+        with self._condition:
+            pending = len(self._heap)
+            earliest = self._heap[0][0] if self._heap else None
+        if self.batched:
+            earliest = self.signal_controller.earliest_deadline()
+        next_due = earliest - time.monotonic() if earliest is not None else None
+        return {
+            "running": self._thread is not None,
+            "mode": "batched" if self.batched else "heap",
+            "intersections": len(self.signal_controller.intersections),
+            "heap_size": pending,
+            "next_due_in": round(next_due, 3) if next_due is not None else None,
+            "transitions": self.transitions,
+            "wakeups": self.wakeups,
+            "jitter_ms": {
+                "samples": len(samples),
+                "mean": round(float(samples.mean()), 3) if len(samples) else 0.0,
+                "p50": round(float(np.percentile(samples, 50)), 3) if len(samples) else 0.0,
+                "p99": round(float(np.percentile(samples, 99)), 3) if len(samples) else 0.0,
+                "max": round(float(samples.max()), 3) if len(samples) else 0.0
+            }
+        }
+    
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            due = self._wait_for_due()
+            for deadline, intersection_id in due:
+                now = time.monotonic()
+                self._record_jitter((now - deadline) * 1000)
+                try:
+                    changed = self.signal_controller.advance(intersection_id, now)
+                except Exception as e:
+                    logger.error(f"Error advancing signals at {intersection_id}: {e}")
+                    self._stop_event.wait(_ERROR_BACKOFF)
+                    changed = False
+                if changed:
+                    self.transitions += 1
+                else:
+                    # Nothing moved the deadline, so the listener did not reschedule it.
+                    self.schedule(intersection_id)
+    
+    def _run_batched(self) -> None:
+        while not self._stop_event.is_set():
+            with self._condition:
+                while not self._stop_event.is_set():
+                    # earliest_deadline() is lock-free, so calling it under the condition cannot deadlock.
+                    deadline = self.signal_controller.earliest_deadline()
+                    now = time.monotonic()
+                    if deadline is not None and deadline <= now:
+                        break
+                    self._condition.wait(deadline - now if deadline is not None else None)
+                    self.wakeups += 1
+                else:
+                    return
+            
+            now = time.monotonic()
+            self._record_jitter((now - deadline) * 1000)
+            try:
+                self.transitions += self.signal_controller.step(now)
+            except Exception as e:
+                logger.error(f"Error stepping signals: {e}")
+                self._stop_event.wait(_ERROR_BACKOFF)
+    
+    def _wait_for_due(self) -> List[Tuple[float, str]]:
+        """Sleep until the earliest deadline passes, then pop every due, current entry."""
+        with self._condition:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    break
+                self._condition.wait(self._heap[0][0] - now if self._heap else None)
+                self.wakeups += 1
+            else:
+                return []
+            
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                deadline, generation, intersection_id = heapq.heappop(self._heap)
+                if self._generation.get(intersection_id) == generation:
+                    due.append((deadline, intersection_id))
+            return due
+    
+    def _compact(self) -> None:
+        """Drop superseded entries so frequent rescheduling cannot grow the heap without bound."""
+        self._heap = [entry for entry in self._heap if self._generation.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+    
+    def _record_jitter(self, lateness_ms: float) -> None:
+        self._jitter[self._jitter_count % len(self._jitter)] = lateness_ms
+        self._jitter_count += 1
@@ -0,0 +1,218 @@
+import atexit
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from config import Config
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+SNAPSHOT_MAGIC = "traffic-state"
+SNAPSHOT_VERSION = 1
+
+# Tracker arrays with a variable number of rows per tracker; everything else has one row per tracker.
+_ROW_GROUPS = ("track_", "kf_")
+
+
+def _pack(states: List[Dict[str, np.ndarray]], prefix: str) -> Dict[str, np.ndarray]:
+    """
+    Concatenate per-tracker state dicts into shared columns.
+    
+    Row-group arrays are concatenated with a `<group>offsets` column marking
+    where each tracker's rows start; the rest are stacked.
+    """
+    if not states:
+        return {}
+    
+    packed = {}
+    for group in _ROW_GROUPS:
+        names = [name for name in states[0] if name.startswith(group)]
+        lengths = [len(state[names[0]]) for state in states]
+        packed[f"{prefix}{group}offsets"] = np.cumsum([0] + lengths).astype(np.int64)
+        for name in names:
+            packed[prefix + name] = np.concatenate([state[name] for state in states])
+    for name in states[0]:
+        if not name.startswith(_ROW_GROUPS):
+            packed[prefix + name] = np.stack([state[name] for state in states])
+    return packed
+
+
+def _unpack(arrays: Dict[str, np.ndarray], prefix: str, count: int) -> List[Dict[str, np.ndarray]]:
+    """Inverse of _pack: split shared columns back into per-tracker state dicts."""
+    states = [{} for _ in range(count)]
+    if not count:
+        return states
+    
+    offsets = {group: arrays[f"{prefix}{group}offsets"] for group in _ROW_GROUPS}
+    for key, array in arrays.items():
+        if not key.startswith(prefix) or key.endswith("offsets"):
+            continue
+        name = key[len(prefix):]
+        group = next((g for g in _ROW_GROUPS if name.startswith(g)), None)
+        for index, state in enumerate(states):
+            if group is None:
+                state[name] = array[index]
+            else:
+                state[name] = array[offsets[group][index]:offsets[group][index + 1]]
+    return states
+
+
+def build_snapshot(signal_controller, tracker_registry) -> Dict[str, np.ndarray]:
+    """Collect controller and tracker state into one flat dict of arrays."""
+    keys, states = tracker_registry.export_state()
+    arrays = {
+        "magic": np.array(SNAPSHOT_MAGIC),
+        "version": np.array(SNAPSHOT_VERSION),
+        "wall_time": np.array(time.time()),
+        "monotonic_time": np.array(time.monotonic()),
+        "tracker_intersections": np.array([key[0] for key in keys], dtype=str),
+        "tracker_directions": np.array([key[1] for key in keys], dtype=str)
+    }
+    for name, array in signal_controller.export_state().items():
+        arrays[f"controller_{name}"] = array
+    arrays.update(_pack(states, "tracker_"))
+    return arrays
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray]) -> int:
+    """
+    Write arrays to path atomically: a temporary file in the same directory
+    is fsynced and renamed over the old snapshot, so readers only ever see
+    a complete file.
+    
+    Returns:
+        Size of the written file in bytes
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+def load_snapshot(path: str) -> Optional[Dict[str, np.ndarray]]:
+    """Read a snapshot, or None when the file is missing or from another format version."""
+    if not os.path.exists(path):
+        return None
+    
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    if str(arrays.get("magic")) != SNAPSHOT_MAGIC or int(arrays.get("version", -1)) != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring snapshot {path}: unknown format")
+        return None
+    return arrays
+
+
+def restore_snapshot(arrays: Dict[str, np.ndarray], signal_controller, tracker_registry) -> None:
+    """Load controller and tracker state from build_snapshot() output."""
+    # Maps the old process's monotonic timestamps onto this one's (they differ after a reboot).
+    time_shift = (time.monotonic() - float(arrays["monotonic_time"])) - (time.time() - float(arrays["wall_time"]))
+    
+    controller_state = {
+        name[len("controller_"):]: array
+        for name, array in arrays.items() if name.startswith("controller_")
+    }
+    signal_controller.load_state(controller_state)
+    
+    keys = list(zip(arrays["tracker_intersections"].tolist(), arrays["tracker_directions"].tolist()))
+    tracker_registry.load_state(keys, _unpack(arrays, "tracker_", len(keys)), time_shift)
+
+
+class StateSnapshotter:
+    """
+    Periodically snapshots controller and tracker state to disk and restores
+    it on startup, so a restart resumes signal phases and tracks instead of
+    cycling from scratch.
+    """
+    
+    def __init__(
+        self,
+        signal_controller,
+        tracker_registry,
+        path: str = Config.SNAPSHOT_PATH,
+        interval: float = Config.SNAPSHOT_INTERVAL
+    ):
+        self.signal_controller = signal_controller
+        self.tracker_registry = tracker_registry
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "snapshots": 0,
+            "last_ms": 0.0,
+            "last_bytes": 0,
+            "last_saved_at": None,
+            "last_error": None,
+            "restored": False,
+            "restore_ms": 0.0
+        }
+    
+    def restore(self) -> bool:
+        """Restore state from the snapshot file, if there is a usable one."""
+        start = time.perf_counter()
+        try:
+            arrays = load_snapshot(self.path)
+            if arrays is None:
+                return False
+            restore_snapshot(arrays, self.signal_controller, self.tracker_registry)
+        except Exception as e:
+            logger.error(f"Failed to restore state snapshot {self.path}: {e}")
+            self._stats["last_error"] = str(e)
+            return False
+        
+        self._stats["restored"] = True
+        self._stats["restore_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Restored state snapshot {self.path} in {self._stats['restore_ms']} ms")
+        return True
+    
+    def save(self) -> None:
+        """Write one snapshot now."""
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                size = write_snapshot(self.path, build_snapshot(self.signal_controller, self.tracker_registry))
+            except Exception as e:
+                logger.error(f"Failed to write state snapshot {self.path}: {e}")
+                self._stats["last_error"] = str(e)
+                return
+            self._stats["snapshots"] += 1
+            self._stats["last_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self._stats["last_bytes"] = size
+            self._stats["last_saved_at"] = time.time()
+    
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="state-snapshotter", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+    
+    def stop(self) -> None:
+        """Stop the periodic writer and take a final snapshot."""
+        if self._thread is None or self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=self.interval + 5)
+        self.save()
+    
+    def get_stats(self) -> Dict:
+        return {"path": self.path, "interval": self.interval, **self._stats}
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.save()
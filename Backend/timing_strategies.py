@@ -0,0 +1,200 @@
+from typing import Dict, List, Optional, Type
+from config import SignalTiming, Config
+
+
+def linear_duration(vehicle_count: int, signal_timing: SignalTiming) -> int:
+    """The original density rule: min duration plus the range scaled by min(count / saturation_count, 1)."""
+    min_time = signal_timing.min_duration
+    max_time = signal_timing.max_duration
+    
+    if vehicle_count == 0:
+        return min_time
+    
+    density = min(vehicle_count / signal_timing.saturation_count, 1.0)
+    return min_time + int((max_time - min_time) * density)
+
+
+class TimingStrategy:
+    """
+    Chooses the next green direction and its duration for one intersection.
+    
+    Observations arrive one approach at a time through observe_count and
+    observe_flow and update the strategy's running state in O(1), so a
+    phase decision never rescans history.
+    """
+    name = ""
+    
+    def __init__(self, signal_timing: SignalTiming, directions: List[str]):
+        self.signal_timing = signal_timing
+        self.directions = list(directions)
+        self.counts: Dict[str, int] = dict.fromkeys(self.directions, 0)
+    
+    def observe_count(self, direction: str, vehicle_count: int) -> None:
+        if direction in self.counts:
+            self.counts[direction] = vehicle_count
+    
+    def observe_flow(self, direction: str, arrival_rate: float, discharge_rate: float) -> None:
+        pass
+    
+    def next_direction(self, current: Optional[str]) -> str:
+        """Direction to turn green after current (None when every signal is red)."""
+        if current is None:
+            return self.directions[0]
+        return self.directions[(self.directions.index(current) + 1) % len(self.directions)]
+    
+    def green_duration(self, direction: str) -> int:
+        raise NotImplementedError
+    
+    def extension(self, direction: str, duration: int) -> int:
+        """Seconds to extend an expiring green of the given duration instead of ending it."""
+        return 0
+    
+    def _clip(self, seconds: float) -> int:
+        # Rounded (half to even, like np.rint), so both controllers agree on an exact split such as 52.0.
+        return round(min(max(seconds, self.signal_timing.min_duration), self.signal_timing.max_duration))
+
+
+class LinearStrategy(TimingStrategy):
+    """Round-robin phases with green scaled linearly by the approach's own count."""
+    name = "linear"
+    
+    def green_duration(self, direction: str) -> int:
+        return linear_duration(self.counts.get(direction, 0), self.signal_timing)
+
+
+class WebsterStrategy(TimingStrategy):
+    """
+    Webster's cycle split.
+    
+    Each approach has flow ratio y_i = q_i / s (demand over saturation
+    flow). The cycle is C0 = (1.5 L + 5) / (1 - Y) with Y = sum(y_i) and
+    L the lost time, and approach i gets green (C0 - L) * y_i / Y. Demand
+    is the measured arrival rate once flow data arrives for an approach,
+    and its vehicle count until then. Y is re-summed over the (few)
+    approaches on each change rather than adjusted by differences, which
+    would accumulate rounding drift.
+    """
+    name = "webster"
+    
+    def __init__(
+        self,
+        signal_timing: SignalTiming,
+        directions: List[str],
+        saturation_flow: float = Config.SATURATION_FLOW,
+        lost_time: float = Config.WEBSTER_LOST_TIME,
+        max_cycle: float = Config.WEBSTER_MAX_CYCLE
+    ):
+        """
+        Args:
+            saturation_flow: Vehicles per minute an approach discharges at during green
+            lost_time: Seconds lost per phase change (start-up plus clearance)
+            max_cycle: Upper bound on the cycle length in seconds
+        """
+        super().__init__(signal_timing, directions)
+        self.saturation_flow = saturation_flow
+        self.lost_time = lost_time
+        self.max_cycle = max_cycle
+        self.ratios: Dict[str, float] = dict.fromkeys(self.directions, 0.0)
+        self.total_ratio = 0.0
+        self._measured = set()
+    
+    def observe_count(self, direction: str, vehicle_count: int) -> None:
+        super().observe_count(direction, vehicle_count)
+        if direction in self.ratios and direction not in self._measured:
+            self._set_demand(direction, vehicle_count)
+    
+    def observe_flow(self, direction: str, arrival_rate: float, discharge_rate: float) -> None:
+        if direction in self.ratios:
+            self._measured.add(direction)
+            self._set_demand(direction, arrival_rate)
+    
+    def cycle_length(self) -> float:
+        total_lost = self.lost_time * len(self.directions)
+        # Y >= 1 means the intersection is oversaturated; cap it so the cycle stays finite.
+        saturation = min(self.total_ratio, 0.95)
+        return min((1.5 * total_lost + 5) / (1 - saturation), self.max_cycle)
+    
+    def green_duration(self, direction: str) -> int:
+        if self.total_ratio <= 0:
+            return self.signal_timing.min_duration
+        effective_green = max(self.cycle_length() - self.lost_time * len(self.directions), 0.0)
+        return self._clip(effective_green * self.ratios.get(direction, 0.0) / self.total_ratio)
+    
+    def _set_demand(self, direction: str, demand: float) -> None:
+        ratio = max(demand, 0.0) / self.saturation_flow
+        self.ratios[direction] = ratio
+        self.total_ratio = sum(self.ratios.values())
+
+
+class MaxPressureStrategy(TimingStrategy):
+    """
+    Max-pressure control.
+    
+    An approach's pressure is its queue minus the mean queue of the
+    competing approaches; with no downstream detectors, the competing
+    queues stand in for downstream occupancy. The highest-pressure
+    approach gets the next green, for as long as it takes to discharge its
+    queue at the saturation flow, and a green whose approach still has the
+    highest pressure is extended instead of ended. The queue total is
+    adjusted by each change, so each pressure is O(1).
+    """
+    name = "max_pressure"
+    
+    def __init__(
+        self,
+        signal_timing: SignalTiming,
+        directions: List[str],
+        saturation_flow: float = Config.SATURATION_FLOW
+    ):
+        """
+        Args:
+            saturation_flow: Vehicles per minute an approach discharges at during green
+        """
+        super().__init__(signal_timing, directions)
+        self.saturation_flow = saturation_flow
+        self.total_queue = 0
+    
+    def observe_count(self, direction: str, vehicle_count: int) -> None:
+        if direction in self.counts:
+            self.total_queue += vehicle_count - self.counts[direction]
+            self.counts[direction] = vehicle_count
+    
+    def pressure(self, direction: str) -> float:
+        queue = self.counts.get(direction, 0)
+        competing = max(len(self.directions) - 1, 1)
+        return queue - (self.total_queue - queue) / competing
+    
+    def next_direction(self, current: Optional[str]) -> str:
+        if self.total_queue <= 0:
+            return super().next_direction(current)
+        # The current approach just had its green capped, so it competes only when it is alone.
+        candidates = [direction for direction in self.directions if direction != current] or self.directions
+        return max(candidates, key=self.pressure)
+    
+    def green_duration(self, direction: str) -> int:
+        return self._clip(self.counts.get(direction, 0) * 60.0 / self.saturation_flow)
+    
+    def extension(self, direction: str, duration: int) -> int:
+        if self.total_queue <= 0 or self.pressure(direction) <= 0:
+            return 0
+        if max(self.directions, key=self.pressure) != direction:
+            return 0
+        return max(min(self.green_duration(direction), self.signal_timing.max_duration - duration), 0)
+
+
+STRATEGIES: Dict[str, Type[TimingStrategy]] = {
+    strategy.name: strategy for strategy in (LinearStrategy, WebsterStrategy, MaxPressureStrategy)
+}
+
+
+def resolve_strategy(name: Optional[str]) -> str:
+    """Validate a strategy name, defaulting to Config.SIGNAL_STRATEGY when None."""
+    name = name or Config.SIGNAL_STRATEGY
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown timing strategy {name}, expected one of {sorted(STRATEGIES)}")
+    return name
+
+
+def create_strategy(name: Optional[str], signal_timing: SignalTiming, directions: List[str]) -> TimingStrategy:
+    """Build a strategy by name (Config.SIGNAL_STRATEGY when None)."""
+    return STRATEGIES[resolve_strategy(name)](signal_timing, directions)
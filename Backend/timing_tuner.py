@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import Config, SignalTiming, get_config
+from logger import setup_logger
+from signal_controller import TrafficSignalController
+from traffic_simulator import SimulatedApproach, SimulatedIntersection, TrafficSimulator
+
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class TuningScenario:
+    """One demand pattern an intersection's timing is evaluated under."""
+    name: str
+    arrival_rates: Dict[str, float]  # vehicles per minute, per direction
+    demand_profile: List[Tuple[float, float]] = field(default_factory=list)  # see TrafficSimulator
+    weight: float = 1.0
+
+
+@dataclass
+class IntersectionSpec:
+    directions: List[str]
+    scenarios: List[TuningScenario]
+    timing_strategy: Optional[str] = None
+
+
+@dataclass
+class ParameterSpace:
+    """
+    Candidate values of each SignalTiming field. Grid search tries every
+    combination with min_duration below max_duration; random search a
+    sample of them. Yellow is a clearance time set by road geometry and
+    speed, so by default it is not searched at all: only list values that
+    are safe for every intersection being tuned.
+    """
+    min_duration: List[int] = field(default_factory=lambda: [5, 8, 10, 15, 20])
+    max_duration: List[int] = field(default_factory=lambda: [30, 45, 60, 90])
+    yellow_duration: List[int] = field(default_factory=lambda: [SignalTiming().yellow_duration])
+    saturation_count: List[int] = field(default_factory=lambda: [20, 35, 50, 75])
+    
+    def grid(self) -> List[SignalTiming]:
+        return [
+            SignalTiming(*values)
+            for values in itertools.product(
+                self.min_duration, self.max_duration, self.yellow_duration, self.saturation_count
+            )
+            if values[0] < values[1]
+        ]
+    
+    def sample(self, count: int, seed: int = 0) -> List[SignalTiming]:
+        grid = self.grid()
+        return random.Random(seed).sample(grid, min(count, len(grid)))
+
+
+# (name, vehicles per minute for each approach in order, demand profile) used when no spec is given.
+DEFAULT_SCENARIOS = [
+    ("light", [4, 4, 2, 2], []),
+    ("unbalanced", [9, 9, 2.5, 2.5], []),
+    ("peak", [4.5, 4.5, 3.5, 3.5], [(0, 1.0), (20, 1.6), (50, 1.0)])
+]
+
+
+@dataclass
+class _Trial:
+    """One simulation run; everything that determines its result, so it can key the cache."""
+    directions: List[str]
+    timing_strategy: Optional[str]
+    signal_timing: Tuple[int, int, int, int]
+    arrival_rates: List[float]
+    demand_profile: List[Tuple[float, float]]
+    seed: int
+    minutes: float
+    warmup: float
+    
+    def key(self) -> str:
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()
+
+
+def _run_trial(trial: _Trial) -> float:
+    """Average delay per vehicle (seconds) of one trial; runs in a worker process."""
+    controller = TrafficSignalController(SignalTiming(*trial.signal_timing), lock_stripes=1)
+    intersection = SimulatedIntersection(
+        "TUNE",
+        [SimulatedApproach(direction, rate) for direction, rate in zip(trial.directions, trial.arrival_rates)],
+        trial.timing_strategy
+    )
+    simulator = TrafficSimulator(controller, [intersection], seed=trial.seed, demand_profile=trial.demand_profile)
+    return simulator.run(trial.minutes * 60, warmup=trial.warmup * 60)["totals"]["average_delay"]
+
+
+def _quiet_worker() -> None:
+    # Every trial builds a controller, which logs at INFO; keep worker logs to warnings and up.
+    logging.disable(logging.INFO)
+
+
+class TimingTuner:
+    """
+    Searches SignalTiming values per intersection by simulation.
+    
+    Every candidate timing is run through TrafficSimulator for each of an
+    intersection's scenarios and seeds, and scored by the scenario-weighted
+    mean of the average delay per vehicle. Trials are independent and only
+    return one number, so they are spread over a ProcessPoolExecutor and
+    throughput grows linearly with worker processes. Results are cached by
+    trial content (directions, strategy, timing, demand, seed, duration),
+    in memory and optionally in a JSON file, so re-runs and intersections
+    with identical specs only simulate what is new.
+    """
+    
+    def __init__(
+        self,
+        intersections: Dict[str, IntersectionSpec],
+        space: ParameterSpace = None,
+        seeds: int = 3,
+        minutes: float = 60,
+        warmup: float = 10,
+        workers: Optional[int] = None,
+        cache_path: Optional[str] = None
+    ):
+        self.intersections = intersections
+        self.space = space or ParameterSpace()
+        self.seeds = seeds
+        self.minutes = minutes
+        self.warmup = warmup
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_path = cache_path
+        self.cache: Dict[str, float] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache = json.load(f)
+        self.simulated = 0
+    
+    def tune(self, search: str = "grid", samples: int = 32, seed: int = 0) -> Dict[str, Dict]:
+        """
+        Find the best timing for every intersection.
+        
+        Args:
+            search: "grid" (every candidate) or "random" (samples candidates)
+            samples: Candidates to try in random search
+            seed: Random search seed
+        
+        Returns:
+            Per intersection: the best SignalTiming, its average delay, and
+            the average delay under the default SignalTiming for comparison
+        """
+        if search == "grid":
+            candidates = self.space.grid()
+        elif search == "random":
+            candidates = self.space.sample(samples, seed)
+        else:
+            raise ValueError(f"Unknown search {search}, expected 'grid' or 'random'")
+        baseline = SignalTiming()
+        if baseline not in candidates:
+            candidates.append(baseline)
+        
+        trials = {
+            (intersection_id, timing_index, scenario_index, trial_seed): self._trial(
+                spec, timing, scenario, trial_seed
+            )
+            for intersection_id, spec in self.intersections.items()
+            for timing_index, timing in enumerate(candidates)
+            for scenario_index, scenario in enumerate(spec.scenarios)
+            for trial_seed in range(self.seeds)
+        }
+        self._simulate(list(trials.values()))
+        
+        results = {}
+        for intersection_id, spec in self.intersections.items():
+            total_weight = sum(scenario.weight for scenario in spec.scenarios)
+            scores = [
+                sum(
+                    scenario.weight * self.cache[trials[(intersection_id, timing_index, scenario_index, trial_seed)].key()]
+                    for scenario_index, scenario in enumerate(spec.scenarios)
+                    for trial_seed in range(self.seeds)
+                ) / (total_weight * self.seeds)
+                for timing_index in range(len(candidates))
+            ]
+            best = min(range(len(candidates)), key=scores.__getitem__)
+            results[intersection_id] = {
+                "signal_timing": candidates[best],
+                "average_delay": round(scores[best], 2),
+                "baseline_delay": round(scores[candidates.index(baseline)], 2)
+            }
+            logger.info(
+                f"Best timing for {intersection_id}: {candidates[best]} "
+                f"({scores[best]:.1f}s delay, default {scores[candidates.index(baseline)]:.1f}s)"
+            )
+        return results
+    
+    def _trial(self, spec: IntersectionSpec, timing: SignalTiming, scenario: TuningScenario, seed: int) -> _Trial:
+        return _Trial(
+            directions=list(spec.directions),
+            timing_strategy=spec.timing_strategy,
+            signal_timing=(timing.min_duration, timing.max_duration, timing.yellow_duration, timing.saturation_count),
+            arrival_rates=[float(scenario.arrival_rates.get(direction, 0.0)) for direction in spec.directions],
+            demand_profile=[tuple(step) for step in scenario.demand_profile],
+            seed=seed,
+            minutes=self.minutes,
+            warmup=self.warmup
+        )
+    
+    def _simulate(self, trials: List[_Trial]) -> None:
+        """Run every trial not cached yet across the worker pool."""
+        pending = {}
+        for trial in trials:
+            key = trial.key()
+            if key not in self.cache:
+                pending[key] = trial
+        if not pending:
+            return
+        
+        logger.info(f"Simulating {len(pending)} trials ({len(trials) - len(pending)} cached) on {self.workers} workers")
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        with ProcessPoolExecutor(self.workers, initializer=_quiet_worker) as executor:
+            delays = executor.map(_run_trial, pending.values(), chunksize=chunksize)
+            for key, delay in zip(pending, delays):
+                self.cache[key] = delay
+        self.simulated += len(pending)
+        
+        if self.cache_path:
+            with open(self.cache_path, "w") as f:
+                json.dump(self.cache, f)
+
+
+def save_signal_timings(results: Dict[str, Dict], path: str, **metadata) -> None:
+    """Write tune() results in the format config.load_signal_timings reads."""
+    document = {
+        "generated_at": datetime.now().isoformat(),
+        **metadata,
+        "intersections": {
+            intersection_id: {
+                **asdict(result["signal_timing"]),
+                "average_delay": result["average_delay"],
+                "baseline_delay": result["baseline_delay"]
+            }
+            for intersection_id, result in results.items()
+        }
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_specs(path: Optional[str] = None) -> Dict[str, IntersectionSpec]:
+    """
+    Intersections to tune, from a JSON file of the form
+    {"INT_001": {"directions": [...], "timing_strategy": "webster",
+    "scenarios": [{"name": ..., "arrival_rates": {direction: rate},
+    "demand_profile": [[minute, multiplier], ...], "weight": 1.0}]}}.
+    
+    Without a file, every configured intersection is tuned for its camera
+    directions under DEFAULT_SCENARIOS.
+    """
+    if path is None:
+        specs = {}
+        for intersection in get_config().INTERSECTIONS:
+            directions = list(intersection.camera_urls) or ["north", "south", "east", "west"]
+            scenarios = [
+                TuningScenario(name, dict(zip(directions, itertools.cycle(rates))), profile)
+                for name, rates, profile in DEFAULT_SCENARIOS
+            ]
+            specs[intersection.intersection_id] = IntersectionSpec(directions, scenarios, intersection.timing_strategy)
+        return specs
+    
+    with open(path) as f:
+        entries = json.load(f)
+    return {
+        intersection_id: IntersectionSpec(
+            entry["directions"],
+            [TuningScenario(**scenario) for scenario in entry["scenarios"]],
+            entry.get("timing_strategy")
+        )
+        for intersection_id, entry in entries.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune per-intersection SignalTiming by simulation.")
+    parser.add_argument("--spec", help="Intersections and demand scenarios (JSON; default: configured intersections)")
+    parser.add_argument("--output", default=Config.SIGNAL_TIMINGS_PATH)
+    parser.add_argument("--search", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=32, help="Candidates to try in random search")
+    parser.add_argument("--seeds", type=int, default=3, help="Simulation seeds per scenario")
+    parser.add_argument("--minutes", type=float, default=60, help="Simulated minutes per trial")
+    parser.add_argument("--warmup", type=float, default=10, help="Simulated minutes before measuring")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache", help="JSON file caching trial results across runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    tuner = TimingTuner(
+        load_specs(args.spec),
+        seeds=args.seeds,
+        minutes=args.minutes,
+        warmup=args.warmup,
+        workers=args.workers,
+        cache_path=args.cache
+    )
+    results = tuner.tune(args.search, args.samples, args.seed)
+    save_signal_timings(
+        results, args.output,
+        search=args.search, seeds=args.seeds, minutes=args.minutes, warmup=args.warmup
+    )
+    for intersection_id, result in results.items():
+        print(
+            f"{intersection_id}: {result['signal_timing']} "
+            f"delay {result['average_delay']}s (default {result['baseline_delay']}s)"
+        )
+    print(f"Wrote {args.output} ({tuner.simulated} trials simulated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import bisect
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from config import Config, TrafficLightState
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+# Random variation of the arrival and discharge rates at each step, as in road.py's Road.update().
+ARRIVAL_JITTER = 0.2
+DISCHARGE_JITTER = 0.1
+
+# Event kinds, in the order same-time events are handled.
+_SIGNAL, _EMERGENCY, _RELEASE, _SAMPLE, _FLOW = range(5)
+
+
+@dataclass
+class SimulatedApproach:
+    """One approach of a simulated intersection."""
+    direction: str
+    arrival_rate: float  # vehicles per minute
+    saturation_flow: float = Config.SATURATION_FLOW  # vehicles per minute while green
+
+
+@dataclass
+class SimulatedIntersection:
+    intersection_id: str
+    approaches: List[SimulatedApproach]
+    timing_strategy: Optional[str] = None
+
+
+@dataclass
+class _Queues:
+    """Queue and running totals of one intersection's approaches, one array entry per approach."""
+    directions: List[str]
+    arrival_rates: np.ndarray
+    saturation_flows: np.ndarray
+    updated_at: float
+    green: np.ndarray = None
+    queue: np.ndarray = None
+    arrived: np.ndarray = None
+    departed: np.ndarray = None
+    queue_seconds: np.ndarray = None
+    max_queue: np.ndarray = None
+    window_arrived: np.ndarray = None
+    window_departed: np.ndarray = None
+    
+    def __post_init__(self):
+        size = len(self.directions)
+        self.green = np.zeros(size, dtype=bool)
+        self.queue = np.zeros(size)
+        self.window_arrived = np.zeros(size)
+        self.window_departed = np.zeros(size)
+        self.reset_totals()
+    
+    def reset_totals(self) -> None:
+        size = len(self.directions)
+        self.arrived = np.zeros(size)
+        self.departed = np.zeros(size)
+        self.queue_seconds = np.zeros(size)
+        self.max_queue = self.queue.copy()
+
+
+@dataclass(order=True)
+class _Event:
+    at: float
+    kind: int
+    sequence: int
+    intersection_id: Optional[str] = field(default=None, compare=False)
+    direction: Optional[str] = field(default=None, compare=False)
+
+
+class TrafficSimulator:
+    """
+    Discrete-event traffic simulation that drives a real signal controller
+    on a virtual clock.
+    
+    Each approach follows the arrival/discharge model of road.py's Road:
+    vehicles arrive at the approach's rate (Poisson, with the rate varied
+    by up to ARRIVAL_JITTER per step) and a green approach discharges at
+    its saturation flow (varied by up to DISCHARGE_JITTER). The controller
+    is fed what the camera pipeline would feed it (queue lengths every
+    sample_interval and measured flow rates every flow_interval) and its
+    phases change exactly at the deadlines it reports through
+    deadline_listener, so no time is spent waiting and hours of traffic
+    run in seconds. Either controller works, with any timing strategy.
+    
+    Queues only change at events, so between two events an intersection's
+    queues advance in one step: arrivals and discharge over the interval,
+    with queue-seconds integrated by the trapezoid rule. Average delay
+    per vehicle is queue-seconds over arrivals (Little's law).
+    
+    Emergency vehicles, like Road's random ones, appear at emergency_rate
+    per hour per intersection on a random approach and preempt it for
+    emergency_duration seconds.
+    """
+    
+    def __init__(
+        self,
+        signal_controller,
+        intersections: List[SimulatedIntersection],
+        seed: int = 0,
+        sample_interval: float = Config.SIMULATION_SAMPLE_INTERVAL,
+        flow_interval: float = Config.SIMULATION_FLOW_INTERVAL,
+        demand_profile: Sequence[Tuple[float, float]] = (),
+        emergency_rate: float = 0.0,
+        emergency_duration: float = 5.0
+    ):
+        """
+        Args:
+            signal_controller: TrafficSignalController or VectorizedSignalController; the
+                intersections are (re)initialized in it
+            intersections: Intersections to simulate
+            seed: Random seed; a run is fully determined by it
+            sample_interval: Seconds between vehicle count updates
+            flow_interval: Seconds between flow rate updates
+            demand_profile: (minute, multiplier) pairs; from each minute on, every
+                arrival rate is scaled by the multiplier (default: 1 throughout)
+            emergency_rate: Emergency vehicles per hour per intersection
+            emergency_duration: Seconds an emergency vehicle holds its approach
+        """
+        self.signal_controller = signal_controller
+        self.rng = np.random.default_rng(seed)
+        self.sample_interval = sample_interval
+        self.flow_interval = flow_interval
+        self.emergency_rate = emergency_rate
+        self.emergency_duration = emergency_duration
+        self._profile_minutes = [minute for minute, _ in demand_profile]
+        self._profile_multipliers = [multiplier for _, multiplier in demand_profile]
+        self._sequence = itertools.count()
+        self._events: List[_Event] = []
+        
+        # The virtual clock starts at zero and every phase is stamped from it, so a run never
+        # depends on when it was started.
+        self.start = self.clock = 0.0
+        self.queues: Dict[str, _Queues] = {}
+        self.strategies: Dict[str, str] = {}
+        for intersection in intersections:
+            directions = [approach.direction for approach in intersection.approaches]
+            signal_controller.initialize_intersection(
+                intersection.intersection_id, directions, intersection.timing_strategy, now=self.clock
+            )
+            self.queues[intersection.intersection_id] = _Queues(
+                directions,
+                np.array([approach.arrival_rate for approach in intersection.approaches], dtype=float),
+                np.array([approach.saturation_flow for approach in intersection.approaches], dtype=float),
+                self.clock
+            )
+            self.strategies[intersection.intersection_id] = signal_controller.get_intersection_status(
+                intersection.intersection_id
+            )["timing_strategy"]
+            self._refresh_green(intersection.intersection_id)
+            self._schedule(intersection.intersection_id)
+            self._schedule_emergency(intersection.intersection_id, self.clock)
+        self._push(self.clock + sample_interval, _SAMPLE)
+        self._push(self.clock + flow_interval, _FLOW)
+        
+        self.measured_from = self.clock
+        self.events = 0
+        self.wall_seconds = 0.0
+        self.emergencies = 0
+        self._time_to_green: List[float] = []
+    
+    def run(self, seconds: float, warmup: float = 0.0) -> Dict:
+        """
+        Advance the simulation.
+        
+        Args:
+            seconds: Simulated seconds to measure
+            warmup: Simulated seconds to run first without measuring, so
+                queues reach a steady state
+        
+        Returns:
+            Measurements since the end of the warmup (see results())
+        """
+        listeners = (self.signal_controller.deadline_listener, self.signal_controller.preemption_listener)
+        self.signal_controller.deadline_listener = self._schedule
+        self.signal_controller.preemption_listener = self._on_preempted_green
+        started = time.perf_counter()
+        try:
+            if warmup > 0:
+                self._run_until(self.clock + warmup)
+                self._reset_totals()
+            self._run_until(self.clock + seconds)
+        finally:
+            self.signal_controller.deadline_listener, self.signal_controller.preemption_listener = listeners
+        self.wall_seconds += time.perf_counter() - started
+        return self.results()
+    
+    def results(self) -> Dict:
+        """
+        Measurements per approach, per intersection and in total: vehicles
+        arrived and departed, average delay per vehicle (seconds), average
+        and peak queue (vehicles; the longest single approach's above
+        approach level) and throughput (vehicles per minute).
+        """
+        elapsed = self.clock - self.measured_from
+        intersections = {}
+        for intersection_id, queues in self.queues.items():
+            approaches = {
+                direction: self._summarize(
+                    queues.arrived[index], queues.departed[index],
+                    queues.queue_seconds[index], queues.max_queue[index], elapsed
+                )
+                for index, direction in enumerate(queues.directions)
+            }
+            summary = self._summarize(
+                queues.arrived.sum(), queues.departed.sum(), queues.queue_seconds.sum(), queues.max_queue.max(), elapsed
+            )
+            summary["timing_strategy"] = self.strategies[intersection_id]
+            summary["approaches"] = approaches
+            intersections[intersection_id] = summary
+        
+        all_queues = list(self.queues.values())
+        totals = self._summarize(
+            sum(queues.arrived.sum() for queues in all_queues),
+            sum(queues.departed.sum() for queues in all_queues),
+            sum(queues.queue_seconds.sum() for queues in all_queues),
+            max((queues.max_queue.max() for queues in all_queues), default=0.0),
+            elapsed
+        )
+        time_to_green = np.array(self._time_to_green)
+        return {
+            "simulated_seconds": round(elapsed, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "speedup": round((self.clock - self.start) / self.wall_seconds, 1) if self.wall_seconds else None,
+            "events": self.events,
+            "totals": totals,
+            "emergencies": {
+                "count": self.emergencies,
+                "mean_time_to_green": round(float(time_to_green.mean()), 3) if len(time_to_green) else 0.0,
+                "max_time_to_green": round(float(time_to_green.max()), 3) if len(time_to_green) else 0.0
+            },
+            "intersections": intersections
+        }
+    
+    def _run_until(self, end: float) -> None:
+        controller = self.signal_controller
+        while self._events and self._events[0].at <= end:
+            event = heapq.heappop(self._events)
+            now = event.at
+            self.events += 1
+            
+            if event.kind == _SIGNAL:
+                # Superseded when the deadline moved after the event was pushed.
+                if controller.next_deadline(event.intersection_id) != now:
+                    continue
+                self._integrate(event.intersection_id, now)
+                controller.advance(event.intersection_id, now)
+                self._refresh_green(event.intersection_id)
+            elif event.kind == _SAMPLE:
+                for intersection_id, queues in self.queues.items():
+                    self._integrate(intersection_id, now)
+                    for direction, queue in zip(queues.directions, queues.queue.tolist()):
+                        controller.update_vehicle_counts(intersection_id, direction, int(round(queue)))
+                self._push(now + self.sample_interval, _SAMPLE)
+            elif event.kind == _FLOW:
+                for intersection_id, queues in self.queues.items():
+                    self._integrate(intersection_id, now)
+                    arrival_rates = (queues.window_arrived * 60.0 / self.flow_interval).tolist()
+                    discharge_rates = (queues.window_departed * 60.0 / self.flow_interval).tolist()
+                    for direction, arrival, discharge in zip(queues.directions, arrival_rates, discharge_rates):
+                        controller.update_flow_rates(intersection_id, direction, arrival, discharge)
+                    queues.window_arrived[:] = 0
+                    queues.window_departed[:] = 0
+                self._push(now + self.flow_interval, _FLOW)
+            elif event.kind == _EMERGENCY:
+                self._integrate(event.intersection_id, now)
+                direction = str(self.rng.choice(self.queues[event.intersection_id].directions))
+                if controller.preempt(event.intersection_id, direction, detected_at=now, now=now):
+                    self.emergencies += 1
+                    self._push(now + self.emergency_duration, _RELEASE, event.intersection_id, direction)
+                self._refresh_green(event.intersection_id)
+                self._schedule_emergency(event.intersection_id, now)
+            else:
+                self._integrate(event.intersection_id, now)
+                controller.release(event.intersection_id, event.direction, now=now)
+                self._refresh_green(event.intersection_id)
+        
+        for intersection_id in self.queues:
+            self._integrate(intersection_id, end)
+        self.clock = end
+    
+    def _integrate(self, intersection_id: str, now: float) -> None:
+        """Advance an intersection's queues to now under the signals it has shown since its last update."""
+        queues = self.queues[intersection_id]
+        dt = now - queues.updated_at
+        if dt <= 0:
+            return
+        size = len(queues.directions)
+        multiplier = self._demand_multiplier(queues.updated_at)
+        queues.updated_at = now
+        
+        jitter = 1 + self.rng.uniform(-ARRIVAL_JITTER, ARRIVAL_JITTER, size)
+        arrivals = self.rng.poisson(queues.arrival_rates * multiplier * jitter * dt / 60.0)
+        capacity = queues.saturation_flows * (1 + self.rng.uniform(-DISCHARGE_JITTER, DISCHARGE_JITTER, size)) * dt / 60.0
+        before = queues.queue.copy()
+        queues.queue += arrivals
+        departures = np.where(queues.green, np.minimum(queues.queue, capacity), 0.0)
+        queues.queue -= departures
+        
+        queues.arrived += arrivals
+        queues.departed += departures
+        queues.window_arrived += arrivals
+        queues.window_departed += departures
+        queues.queue_seconds += (before + queues.queue) * dt / 2
+        np.maximum(queues.max_queue, queues.queue, out=queues.max_queue)
+    
+    def _demand_multiplier(self, now: float) -> float:
+        index = bisect.bisect_right(self._profile_minutes, (now - self.start) / 60.0) - 1
+        return self._profile_multipliers[index] if index >= 0 else 1.0
+    
+    def _refresh_green(self, intersection_id: str) -> None:
+        states = self.signal_controller.get_signal_state(intersection_id)
+        queues = self.queues[intersection_id]
+        queues.green = np.array([states.get(direction) == TrafficLightState.GREEN.value for direction in queues.directions])
+    
+    def _reset_totals(self) -> None:
+        for queues in self.queues.values():
+            queues.reset_totals()
+        self.measured_from = self.clock
+        self.emergencies = 0
+        self._time_to_green = []
+    
+    def _schedule(self, intersection_id: str) -> None:
+        """deadline_listener: queue the intersection's next phase change."""
+        deadline = self.signal_controller.next_deadline(intersection_id)
+        if deadline is not None:
+            self._push(deadline, _SIGNAL, intersection_id)
+    
+    def _schedule_emergency(self, intersection_id: str, now: float) -> None:
+        if self.emergency_rate > 0:
+            self._push(now + self.rng.exponential(3600.0 / self.emergency_rate), _EMERGENCY, intersection_id)
+    
+    def _on_preempted_green(self, intersection_id: str, direction: str, detected_at: float, green_at: float) -> None:
+        self._time_to_green.append(green_at - detected_at)
+    
+    def _push(self, at: float, kind: int, intersection_id: Optional[str] = None, direction: Optional[str] = None) -> None:
+        heapq.heappush(self._events, _Event(at, kind, next(self._sequence), intersection_id, direction))
+    
+    @staticmethod
+    def _summarize(arrived: float, departed: float, queue_seconds: float, max_queue: float, elapsed: float) -> Dict:
+        arrived, departed, queue_seconds = float(arrived), float(departed), float(queue_seconds)
+        return {
+            "arrived": int(round(arrived)),
+            "departed": int(round(departed)),
+            "average_delay": round(queue_seconds / arrived, 2) if arrived else 0.0,
+            "average_queue": round(queue_seconds / elapsed, 2) if elapsed else 0.0,
+            "max_queue": round(float(max_queue), 1),
+            "throughput": round(departed * 60.0 / elapsed, 2) if elapsed else 0.0
+        }
@@ -0,0 +1,763 @@
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from config import TrafficLightState, SignalTiming, Config
+from logger import setup_logger
+from corridor_coordinator import CoordinationPlan
+from timing_strategies import STRATEGIES, linear_duration, resolve_strategy
+
+
+logger = setup_logger(__name__)
+
+# Phase codes are indices into this list, the same encoding snapshots use.
+_STATES = list(TrafficLightState)
+RED = _STATES.index(TrafficLightState.RED)
+YELLOW = _STATES.index(TrafficLightState.YELLOW)
+GREEN = _STATES.index(TrafficLightState.GREEN)
+_STATE_VALUES = [state.value for state in _STATES]
+
+# Strategy codes are indices into this list.
+_STRATEGY_NAMES = list(STRATEGIES)
+LINEAR = _STRATEGY_NAMES.index("linear")
+WEBSTER = _STRATEGY_NAMES.index("webster")
+MAX_PRESSURE = _STRATEGY_NAMES.index("max_pressure")
+
+# name: (dtype, one column per direction, fill value)
+_COLUMNS = {
+    "num_directions": (np.int16, False, 0),
+    "active": (np.int16, False, -1),
+    "phase": (np.int8, False, RED),
+    "changed_at": (np.float64, False, 0.0),
+    "duration": (np.float64, False, 0.0),
+    "has_emergency": (bool, False, False),
+    "optimization_enabled": (bool, False, True),
+    "strategy": (np.int8, False, LINEAR),
+    # Per-intersection SignalTiming.
+    "min_durations": (np.float64, False, 0.0),
+    "max_durations": (np.float64, False, 0.0),
+    "yellow_durations": (np.float64, False, 0.0),
+    "saturation_counts": (np.float64, False, 1.0),
+    "green_durations": (np.int32, True, 0),
+    "counts": (np.int32, True, 0),
+    "count_known": (bool, True, False),
+    "arrival_rates": (np.float64, True, np.nan),
+    "discharge_rates": (np.float64, True, np.nan),
+    # Coordination plan (see corridor_coordinator); coord_origin is NaN for uncoordinated rows.
+    "coord_origin": (np.float64, False, np.nan),
+    "coord_cycle": (np.float64, False, 1.0),
+    "coord_yellow": (np.float64, False, 0.0),
+    "coord_start": (np.float64, True, 0.0),
+    "coord_green": (np.float64, True, 0.0),
+    "coord_next": (np.int16, True, 0),
+    # Emergency preemption (see TrafficSignalController.preempt); preempt_direction is -1 when none.
+    "preempt_direction": (np.int16, False, -1),
+    "preempt_releasing": (bool, False, False),
+    "preempt_hold": (np.float64, False, 0.0),
+    "preempt_detected_at": (np.float64, False, 0.0),
+    "restore_direction": (np.int16, False, -1),
+    "restore_remaining": (np.float64, False, 0.0)
+}
+
+# Interrupted greens with less time left than this are not resumed after preemption.
+_MIN_RESTORE = 1.0
+
+
+class VectorizedSignalController:
+    """
+    Array-backed alternative to TrafficSignalController for city-scale
+    deployments.
+    
+    Every intersection is one row in a set of NumPy arrays (active
+    direction, phase, phase start and duration, per-direction counts and
+    rates, flags), so step() advances all expired intersections in one
+    vectorized pass and whole-city status comes from array slices instead
+    of per-intersection dicts. The active direction is the one showing
+    green or yellow; all other directions are red. Timing strategies are
+    the column-wise equivalents of those in timing_strategies, evaluated
+    for every due row of a strategy at once.
+    """
+    
+    def __init__(self, signal_timing: SignalTiming = None, capacity: int = 64, max_directions: int = 4):
+        self.signal_timing = signal_timing or SignalTiming()
+        self.emergency_mode = False
+        self.deadline_listener: Optional[Callable[[str], None]] = None
+        self.preemption_listener: Optional[Callable[[str, str, float, float], None]] = None
+        self._lock = threading.RLock()
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._directions: List[List[str]] = []
+        self._direction_rows: List[Dict[str, int]] = []
+        self._size = 0
+        self._capacity = 0
+        self._width = 0
+        self._grow(capacity, max_directions)
+        logger.info("Vectorized Traffic Signal Controller initialized")
+    
+    @property
+    def intersections(self) -> Dict[str, int]:
+        """Row index of every intersection, keyed by id."""
+        return self._rows
+    
+    def initialize_intersection(
+        self,
+        intersection_id: str,
+        directions: List[str] = None,
+        strategy: Optional[str] = None,
+        signal_timing: Optional[SignalTiming] = None,
+        now: Optional[float] = None
+    ) -> None:
+        """Initialize signals for an intersection, with the first direction green."""
+        if directions is None:
+            directions = ["north", "south", "east", "west"]
+        signal_timing = signal_timing or self.signal_timing
+        now = time.monotonic() if now is None else now
+        strategy_code = _STRATEGY_NAMES.index(resolve_strategy(strategy))
+        
+        with self._lock:
+            row = self._rows.get(intersection_id)
+            if row is None:
+                if self._size == self._capacity or len(directions) > self._width:
+                    self._grow(max(self._capacity * 2, self._size + 1), max(self._width, len(directions)))
+                row = self._size
+                self._size += 1
+                self.ids.append(intersection_id)
+                self._directions.append([])
+                self._direction_rows.append({})
+                self._rows[intersection_id] = row
+            elif len(directions) > self._width:
+                self._grow(self._capacity, len(directions))
+            
+            for name, (_, _, fill) in _COLUMNS.items():
+                getattr(self, name)[row] = fill
+            self._directions[row] = list(directions)
+            self._direction_rows[row] = {direction: i for i, direction in enumerate(directions)}
+            self.num_directions[row] = len(directions)
+            self.strategy[row] = strategy_code
+            self.min_durations[row] = signal_timing.min_duration
+            self.max_durations[row] = signal_timing.max_duration
+            self.yellow_durations[row] = signal_timing.yellow_duration
+            self.saturation_counts[row] = signal_timing.saturation_count
+            self.green_durations[row] = signal_timing.min_duration
+            self._set_phase(np.array([row]), 0, GREEN, signal_timing.min_duration, now)
+        
+        self._deadline_changed(intersection_id)
+        logger.debug(f"Initialized intersection {intersection_id} with {len(directions)} directions")
+    
+    def update_vehicle_counts(
+        self,
+        intersection_id: str,
+        direction: str,
+        vehicle_count: int,
+        emergency_vehicles: int = 0
+    ) -> None:
+        """Update vehicle counts for a specific direction."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            logger.warning(f"Intersection {intersection_id} not initialized")
+            return
+        
+        column = self._direction_rows[row].get(direction)
+        # Every column write holds the lock: _grow swaps in copied arrays, and a write to the old one is lost.
+        with self._lock:
+            if column is not None:
+                self.counts[row, column] = vehicle_count
+                self.count_known[row, column] = True
+            if emergency_vehicles > 0:
+                self.has_emergency[row] = True
+        
+        if emergency_vehicles > 0:
+            logger.warning(f"Emergency vehicle detected at {intersection_id} - {direction}")
+    
+    def update_flow_rates(
+        self,
+        intersection_id: str,
+        direction: str,
+        arrival_rate: float,
+        discharge_rate: float
+    ) -> None:
+        """Update measured flow (vehicles per minute) for a specific direction."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return
+        
+        column = self._direction_rows[row].get(direction)
+        if column is not None:
+            with self._lock:
+                self.arrival_rates[row, column] = round(arrival_rate, 2)
+                self.discharge_rates[row, column] = round(discharge_rate, 2)
+    
+    def set_strategy(self, intersection_id: str, strategy: str) -> bool:
+        """Switch an intersection's timing strategy; returns False if it does not exist."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return False
+        code = _STRATEGY_NAMES.index(resolve_strategy(strategy))
+        with self._lock:
+            self.strategy[row] = code
+        logger.info(f"Timing strategy at {intersection_id} set to {strategy}")
+        return True
+    
+    def set_coordination(self, intersection_id: str, plan: Optional[CoordinationPlan]) -> bool:
+        """Run an intersection on a coordination plan, or back on its strategy when plan is None."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return False
+        
+        with self._lock:
+            if plan is None:
+                self.coord_origin[row] = np.nan
+                return True
+            columns = [self._direction_rows[row][direction] for direction in plan.directions]
+            self.coord_start[row, columns] = plan.starts
+            self.coord_green[row, columns] = plan.greens
+            self.coord_next[row, columns] = columns[1:] + columns[:1]
+            self.coord_cycle[row] = plan.cycle_length
+            self.coord_yellow[row] = plan.yellow
+            self.coord_origin[row] = plan.origin
+        return True
+    
+    def optimize_signal_duration(self, intersection_id: str, direction: str, vehicle_count: int) -> int:
+        """Calculate optimized signal duration based on vehicle count."""
+        row = self._rows.get(intersection_id)
+        return linear_duration(vehicle_count, self._signal_timing(row) if row is not None else self.signal_timing)
+    
+    def step(self, now: Optional[float] = None) -> int:
+        """
+        Advance every intersection whose phase has expired: green turns
+        yellow for yellow_duration unless its strategy extends it, yellow
+        turns red and the direction the strategy picks turns green for the
+        duration it picks.
+        
+        Args:
+            now: Monotonic time to evaluate expiry at (default: now)
+        
+        Returns:
+            Number of intersections that changed phase
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            n = self._size
+            due = (now >= self.changed_at[:n] + self.duration[:n]) | (self.active[:n] < 0)
+            rows = np.flatnonzero(due)
+            if rows.size:
+                self._advance_rows(rows, now)
+        return int(rows.size)
+    
+    def advance(self, intersection_id: str, now: Optional[float] = None) -> bool:
+        """Apply the intersection's next phase change if it is due; returns whether it changed."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            row = self._rows.get(intersection_id)
+            if row is None:
+                return False
+            if self.active[row] >= 0 and now < self.changed_at[row] + self.duration[row]:
+                return False
+            self._advance_rows(np.array([row]), now)
+        self._deadline_changed(intersection_id)
+        return True
+    
+    def next_deadline(self, intersection_id: str) -> Optional[float]:
+        """Monotonic time of the intersection's next phase change, or None if it does not exist."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return None
+        if self.active[row] < 0:
+            return time.monotonic()
+        return float(self.changed_at[row] + self.duration[row])
+    
+    def earliest_deadline(self) -> Optional[float]:
+        """
+        Earliest phase change over all intersections, or None without any.
+        
+        Reads the arrays without taking the lock, so a scheduler may call it
+        while holding its own lock.
+        """
+        n = self._size
+        if not n:
+            return None
+        if (self.active[:n] < 0).any():
+            return time.monotonic()
+        return float((self.changed_at[:n] + self.duration[:n]).min())
+    
+    def cycle_signal(self, intersection_id: str) -> Dict[str, str]:
+        """Apply any due phase change to the intersection's signals and return their states."""
+        if intersection_id not in self._rows:
+            logger.warning(f"Intersection {intersection_id} not found")
+            return {}
+        
+        self.advance(intersection_id)
+        return self.get_signal_state(intersection_id)
+    
+    def handle_emergency(self, intersection_id: str, direction: str) -> Dict[str, str]:
+        """
+        Handle emergency vehicle by giving it priority, holding it green for
+        EMERGENCY_MANUAL_HOLD seconds before the interrupted phase resumes.
+        
+        Args:
+            intersection_id: ID of the intersection
+            direction: Direction of emergency vehicle
+        
+        Returns:
+            Updated signal states
+        """
+        if intersection_id not in self._rows:
+            logger.warning(f"Intersection {intersection_id} not found")
+            return {}
+        
+        self.preempt(intersection_id, direction, hold=Config.EMERGENCY_MANUAL_HOLD)
+        return self.get_signal_state(intersection_id)
+    
+    def preempt(
+        self,
+        intersection_id: str,
+        direction: str,
+        hold: float = Config.EMERGENCY_MAX_HOLD,
+        detected_at: Optional[float] = None,
+        now: Optional[float] = None
+    ) -> bool:
+        """Give an emergency vehicle's direction green as fast as is safe (see TrafficSignalController.preempt)."""
+        now = time.monotonic() if now is None else now
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return False
+        
+        with self._lock:
+            column = self._direction_rows[row].get(direction)
+            if column is None:
+                logger.warning(f"Intersection {intersection_id} has no {direction} signal to preempt")
+                return False
+            if self.preempt_direction[row] >= 0:
+                return self.preempt_direction[row] == column and not self.preempt_releasing[row]
+            
+            active = int(self.active[row])
+            showing_green = active >= 0 and self.phase[row] == GREEN
+            self.restore_direction[row] = active if showing_green else -1
+            self.restore_remaining[row] = max(self.changed_at[row] + self.duration[row] - now, 0.0) if showing_green else 0.0
+            self.preempt_direction[row] = column
+            self.preempt_releasing[row] = False
+            self.preempt_hold[row] = hold
+            self.preempt_detected_at[row] = detected_at if detected_at is not None else now
+            self.has_emergency[row] = True
+            
+            if active < 0 or (showing_green and active == column):
+                self._start_preempted_green(row, now)
+            elif showing_green:
+                self._set_phase(np.array([row]), active, YELLOW, self.yellow_durations[row], now)
+        self._deadline_changed(intersection_id)
+        
+        logger.warning(f"Emergency preemption at {intersection_id} for direction {direction}")
+        return True
+    
+    def release(self, intersection_id: str, direction: Optional[str] = None, now: Optional[float] = None) -> bool:
+        """End an intersection's preemption (see TrafficSignalController.release)."""
+        now = time.monotonic() if now is None else now
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return False
+        
+        with self._lock:
+            column = self.preempt_direction[row]
+            if column < 0 or self.preempt_releasing[row]:
+                return False
+            if direction is not None and self._direction_rows[row].get(direction) != column:
+                return False
+            self._release(row, now)
+        self._deadline_changed(intersection_id)
+        
+        logger.info(f"Emergency preemption released at {intersection_id}")
+        return True
+    
+    def reset_emergency(self, intersection_id: str) -> None:
+        """Reset emergency mode."""
+        row = self._rows.get(intersection_id)
+        if row is not None:
+            with self._lock:
+                self.has_emergency[row] = False
+            logger.info(f"Emergency mode reset for {intersection_id}")
+    
+    def get_signal_state(self, intersection_id: str) -> Dict[str, str]:
+        """Get current signal states for an intersection."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return {}
+        
+        states = dict.fromkeys(self._directions[row], TrafficLightState.RED.value)
+        active = int(self.active[row])
+        if active >= 0:
+            states[self._directions[row][active]] = _STATE_VALUES[self.phase[row]]
+        return states
+    
+    def get_signal_timing(self, intersection_id: str) -> Optional[SignalTiming]:
+        """The intersection's own timing limits, or None if it does not exist."""
+        row = self._rows.get(intersection_id)
+        return self._signal_timing(row) if row is not None else None
+    
+    def get_intersection_status(self, intersection_id: str) -> Dict:
+        """Get comprehensive status of an intersection."""
+        row = self._rows.get(intersection_id)
+        if row is None:
+            return {}
+        
+        directions = self._directions[row]
+        width = len(directions)
+        counts = zip(directions, self.counts[row, :width].tolist(), self.count_known[row, :width].tolist())
+        rates = zip(directions, self.arrival_rates[row, :width].tolist(), self.discharge_rates[row, :width].tolist())
+        next_change_in = max(self.next_deadline(intersection_id) - time.monotonic(), 0.0)
+        
+        return {
+            "intersection_id": intersection_id,
+            "signal_states": self.get_signal_state(intersection_id),
+            "next_change_in": round(next_change_in, 2),
+            "vehicle_counts": {direction: count for direction, count, known in counts if known},
+            "flow_rates": {
+                direction: {"arrival_rate": arrival, "discharge_rate": discharge}
+                for direction, arrival, discharge in rates if not math.isnan(arrival)
+            },
+            "emergency_mode": bool(self.has_emergency[row]),
+            "optimization_enabled": bool(self.optimization_enabled[row]),
+            "timing_strategy": _STRATEGY_NAMES[self.strategy[row]],
+            "coordinated": not math.isnan(self.coord_origin[row]),
+            "preempted_direction": directions[self.preempt_direction[row]] if self.preempt_direction[row] >= 0 else None,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def get_status_table(self) -> Dict[str, List]:
+        """
+        Status of every intersection as parallel columns, built from array
+        slices rather than one dict per intersection.
+        """
+        n = self._size
+        active = self.active[:n]
+        has_active = active >= 0
+        rows = np.arange(n)
+        green_direction = [
+            directions[column] if column >= 0 else None
+            for directions, column in zip(self._directions, active.tolist())
+        ]
+        remaining = np.where(has_active, self.changed_at[:n] + self.duration[:n] - time.monotonic(), 0.0)
+        
+        return {
+            "intersection_ids": list(self.ids),
+            "active_direction": green_direction,
+            "active_state": np.array(_STATE_VALUES)[np.where(has_active, self.phase[:n], RED)].tolist(),
+            "next_change_in": np.round(np.maximum(remaining, 0.0), 2).tolist(),
+            "active_count": np.where(has_active, self.counts[rows, np.maximum(active, 0)], 0).tolist(),
+            "total_count": self.counts[:n].sum(axis=1).tolist(),
+            "emergency_mode": self.has_emergency[:n].tolist(),
+            "timing_strategy": np.array(_STRATEGY_NAMES)[self.strategy[:n]].tolist()
+        }
+    
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """Controller state in the same flat-array layout TrafficSignalController uses."""
+        with self._lock:
+            n = self._size
+            num_directions = self.num_directions[:n].astype(np.int64)
+            rows = np.repeat(np.arange(n), num_directions)
+            columns = np.concatenate([np.arange(k) for k in num_directions.tolist()]) if n else np.empty(0, int)
+            is_active = self.active[rows] == columns
+            wall_offset = time.time() - time.monotonic()
+            
+            return {
+                "emergency_mode": np.array(self.emergency_mode),
+                "intersection_ids": np.array(self.ids, dtype=str),
+                "has_emergency": self.has_emergency[:n].copy(),
+                "optimization_enabled": self.optimization_enabled[:n].copy(),
+                "timing_strategies": np.array(_STRATEGY_NAMES)[self.strategy[:n]].astype(str),
+                "signal_offsets": np.concatenate([[0], np.cumsum(num_directions)]).astype(np.int64),
+                "signal_directions": np.array(
+                    [direction for directions in self._directions for direction in directions], dtype=str
+                ),
+                "signal_states": np.where(is_active, self.phase[rows], RED).astype(np.int8),
+                "signal_durations": np.where(
+                    is_active, self.duration[rows], self.green_durations[rows, columns]
+                ),
+                "signal_elapsed": np.zeros(len(rows), dtype=np.int32),
+                "signal_changed_at": self.changed_at[rows] + wall_offset,
+                "signal_vehicle_counts": np.where(
+                    self.count_known[rows, columns], self.counts[rows, columns], -1
+                ).astype(np.int32),
+                "signal_arrival_rates": self.arrival_rates[rows, columns],
+                "signal_discharge_rates": self.discharge_rates[rows, columns]
+            }
+    
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore intersections, signal phases and measurements from export_state() output."""
+        offsets = state["signal_offsets"].tolist()
+        directions = state["signal_directions"].tolist()
+        strategies = state["timing_strategies"].tolist() if "timing_strategies" in state else None
+        wall_offset = time.time() - time.monotonic()
+        
+        with self._lock:
+            self.emergency_mode = bool(state["emergency_mode"])
+            for index, intersection_id in enumerate(state["intersection_ids"].tolist()):
+                start, end = offsets[index], offsets[index + 1]
+                # Timings are configuration, not state: keep the intersection's own if it has one.
+                existing = self._rows.get(intersection_id)
+                self.initialize_intersection(
+                    intersection_id,
+                    directions[start:end],
+                    strategies[index] if strategies is not None else None,
+                    self._signal_timing(existing) if existing is not None else None
+                )
+                row = self._rows[intersection_id]
+                width = end - start
+                
+                signal_states = state["signal_states"][start:end]
+                durations = state["signal_durations"][start:end]
+                counts = state["signal_vehicle_counts"][start:end]
+                self.has_emergency[row] = state["has_emergency"][index]
+                self.optimization_enabled[row] = state["optimization_enabled"][index]
+                self.green_durations[row, :width] = durations
+                self.counts[row, :width] = np.maximum(counts, 0)
+                self.count_known[row, :width] = counts >= 0
+                self.arrival_rates[row, :width] = state["signal_arrival_rates"][start:end]
+                self.discharge_rates[row, :width] = state["signal_discharge_rates"][start:end]
+                
+                active = np.flatnonzero(signal_states != RED)
+                if len(active):
+                    column = int(active[0])
+                    phase = int(signal_states[column])
+                    changed_at = float(state["signal_changed_at"][start + column]) - wall_offset
+                    self._set_phase(np.array([row]), column, phase, durations[column], changed_at)
+                else:
+                    self._set_phase(np.array([row]), -1, RED, 0, time.monotonic())
+                self._deadline_changed(intersection_id)
+        
+        logger.info(f"Restored {len(state['intersection_ids'])} intersections from snapshot")
+    
+    def _advance_rows(self, rows: np.ndarray, now: float) -> None:
+        """Apply one phase change to each of the given (due) rows."""
+        preempted = self.preempt_direction[rows] >= 0
+        if preempted.any():
+            # Preemptions are rare and short-lived, so they are handled row by row.
+            for row in rows[preempted].tolist():
+                self._advance_preempted(row, now)
+            rows = rows[~preempted]
+        
+        coordinated = ~np.isnan(self.coord_origin[rows])
+        if coordinated.any():
+            self._advance_coordinated(rows[coordinated], now)
+            rows = rows[~coordinated]
+        
+        ending = (self.phase[rows] == GREEN) & (self.active[rows] >= 0)
+        green_ending = rows[ending]
+        if green_ending.size:
+            extension = np.where(self.optimization_enabled[green_ending], self._extensions(green_ending), 0)
+            extended = extension > 0
+            self.duration[green_ending[extended]] += extension[extended]
+            yellow_rows = green_ending[~extended]
+            self._set_phase(yellow_rows, self.active[yellow_rows], YELLOW, self.yellow_durations[yellow_rows], now)
+        
+        green_rows = rows[~ending]
+        if green_rows.size:
+            active = self.active[green_rows]
+            optimized = self.optimization_enabled[green_rows]
+            next_direction = np.where(active < 0, 0, (active + 1) % self.num_directions[green_rows])
+            next_direction = np.where(optimized, self._next_directions(green_rows, next_direction), next_direction)
+            green = np.where(
+                optimized, self._strategy_durations(green_rows, next_direction), self.min_durations[green_rows]
+            )
+            self.green_durations[green_rows, next_direction] = green
+            self._set_phase(green_rows, next_direction, GREEN, green, now)
+    
+    def _advance_preempted(self, row: int, now: float) -> None:
+        """TrafficSignalController._advance_preempted for one row whose phase has ended."""
+        active = int(self.active[row])
+        if active >= 0 and self.phase[row] == GREEN:
+            logger.warning(f"Emergency hold at {self.ids[row]} ran out; restoring signals")
+            self._release(row, now)
+            return
+        
+        self.active[row] = -1
+        if self.preempt_releasing[row]:
+            self._restore(row, now)
+        else:
+            self._start_preempted_green(row, now)
+    
+    def _start_preempted_green(self, row: int, now: float) -> None:
+        column = int(self.preempt_direction[row])
+        if self.active[row] == column and self.phase[row] == GREEN:
+            self.duration[row] = now - self.changed_at[row] + self.preempt_hold[row]
+        else:
+            self._set_phase(np.array([row]), column, GREEN, self.preempt_hold[row], now)
+        if self.preemption_listener is not None:
+            self.preemption_listener(
+                self.ids[row], self._directions[row][column], float(self.preempt_detected_at[row]), now
+            )
+    
+    def _release(self, row: int, now: float) -> None:
+        self.preempt_releasing[row] = True
+        active = int(self.active[row])
+        column = int(self.preempt_direction[row])
+        if active < 0:
+            self._restore(row, now)
+        elif self.phase[row] == GREEN and active == column:
+            if self.restore_direction[row] == column:
+                self.duration[row] = now - self.changed_at[row] + self.restore_remaining[row]
+                self.preempt_direction[row] = -1
+                self.has_emergency[row] = False
+            else:
+                self._set_phase(np.array([row]), active, YELLOW, self.yellow_durations[row], now)
+    
+    def _restore(self, row: int, now: float) -> None:
+        """Resume the interrupted green (the row is all red), or continue the cycle if there is none."""
+        column = int(self.preempt_direction[row])
+        restore = int(self.restore_direction[row])
+        remaining = float(self.restore_remaining[row])
+        self.preempt_direction[row] = -1
+        self.has_emergency[row] = False
+        if restore >= 0 and remaining >= _MIN_RESTORE:
+            self._set_phase(np.array([row]), restore, GREEN, remaining, now)
+        else:
+            # Continue from the emergency direction as if its green had just ended.
+            self.active[row] = column
+            self.phase[row] = RED
+            self._advance_rows(np.array([row]), now)
+    
+    def _advance_coordinated(self, rows: np.ndarray, now: float) -> None:
+        """Vectorized TrafficSignalController._advance_coordinated."""
+        yellow = self.coord_yellow[rows]
+        position = (now - self.coord_origin[rows]) % self.coord_cycle[rows]
+        start = self.coord_start[rows]
+        green = self.coord_green[rows]
+        valid = np.arange(self._width) < self.num_directions[rows][:, None]
+        inside = valid & (start <= position[:, None]) & (position[:, None] < start + green + yellow[:, None])
+        # Rounding can leave the position a hair past the last phase's end; it belongs to that phase.
+        last = np.where(valid, start, -np.inf).argmax(axis=1)
+        index = np.where(inside.any(axis=1), inside.argmax(axis=1), last)
+        
+        ordinal = np.arange(len(rows))
+        into = position - start[ordinal, index]
+        in_green = into < green[ordinal, index]
+        remaining = np.where(in_green, green[ordinal, index] - into, np.maximum(green[ordinal, index] + yellow - into, 0.0))
+        
+        active = self.active[rows]
+        showing_green = (self.phase[rows] == GREEN) & (active >= 0)
+        hold = showing_green & in_green & (index == active)
+        held = rows[hold]
+        self.duration[held] = now - self.changed_at[held] + remaining[hold]
+        to_yellow = rows[showing_green & ~hold]
+        self._set_phase(to_yellow, self.active[to_yellow], YELLOW, self.yellow_durations[to_yellow], now)
+        
+        starting = ~showing_green
+        next_index = np.where(in_green, index, self.coord_next[rows, index])
+        duration = np.where(in_green, remaining, remaining + green[ordinal, next_index])
+        self._set_phase(rows[starting], next_index[starting], GREEN, duration[starting], now)
+    
+    def _optimized_durations(self, rows: np.ndarray, vehicle_counts: np.ndarray) -> np.ndarray:
+        """Vectorized optimize_signal_duration: min duration plus a share of the range by density."""
+        min_time = self.min_durations[rows]
+        max_time = self.max_durations[rows]
+        density = np.minimum(vehicle_counts / self.saturation_counts[rows], 1.0)
+        return (min_time + np.floor((max_time - min_time) * density)).astype(np.int32)
+    
+    def _clip(self, rows: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+        return np.rint(np.clip(seconds, self.min_durations[rows], self.max_durations[rows])).astype(np.int32)
+    
+    def _strategy_durations(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Green duration each row's strategy gives the direction in columns."""
+        durations = self._optimized_durations(rows, self.counts[rows, columns])
+        
+        webster = self.strategy[rows] == WEBSTER
+        if webster.any():
+            durations[webster] = self._webster_durations(rows[webster], columns[webster])
+        
+        max_pressure = self.strategy[rows] == MAX_PRESSURE
+        if max_pressure.any():
+            queues = self.counts[rows[max_pressure], columns[max_pressure]]
+            durations[max_pressure] = self._clip(rows[max_pressure], queues * 60.0 / Config.SATURATION_FLOW)
+        return durations
+    
+    def _webster_durations(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Vectorized WebsterStrategy.green_duration (demand is the arrival rate once measured)."""
+        arrivals = self.arrival_rates[rows]
+        demand = np.where(np.isnan(arrivals), self.counts[rows], arrivals)
+        ratios = np.maximum(demand, 0.0) / Config.SATURATION_FLOW
+        total_ratio = ratios.sum(axis=1)
+        total_lost = Config.WEBSTER_LOST_TIME * self.num_directions[rows]
+        cycle = np.minimum((1.5 * total_lost + 5) / (1 - np.minimum(total_ratio, 0.95)), Config.WEBSTER_MAX_CYCLE)
+        effective_green = np.maximum(cycle - total_lost, 0.0)
+        split = effective_green * ratios[np.arange(len(rows)), columns] / np.where(total_ratio > 0, total_ratio, 1.0)
+        return np.where(total_ratio > 0, self._clip(rows, split), self.min_durations[rows])
+    
+    def _pressures(self, rows: np.ndarray) -> np.ndarray:
+        """
+        MaxPressureStrategy.pressure for every direction of the given rows;
+        padding columns beyond an intersection's directions are -inf.
+        """
+        queues = self.counts[rows].astype(np.float64)
+        num_directions = self.num_directions[rows]
+        competing = np.maximum(num_directions - 1, 1)[:, None]
+        pressure = queues - (queues.sum(axis=1, keepdims=True) - queues) / competing
+        pressure[np.arange(self._width) >= num_directions[:, None]] = -np.inf
+        return pressure
+    
+    def _next_directions(self, rows: np.ndarray, round_robin: np.ndarray) -> np.ndarray:
+        """Next green direction per row: round robin except for max-pressure rows with traffic."""
+        max_pressure = (self.strategy[rows] == MAX_PRESSURE) & (self.counts[rows].sum(axis=1) > 0)
+        if not max_pressure.any():
+            return round_robin
+        
+        selected = rows[max_pressure]
+        pressure = self._pressures(selected)
+        current = self.active[selected]
+        # The current approach just had its green capped, so it competes only when it is alone.
+        exclude = (current >= 0) & (self.num_directions[selected] > 1)
+        pressure[np.flatnonzero(exclude), current[exclude]] = -np.inf
+        
+        next_direction = round_robin.copy()
+        next_direction[max_pressure] = pressure.argmax(axis=1)
+        return next_direction
+    
+    def _extensions(self, rows: np.ndarray) -> np.ndarray:
+        """Seconds each row's strategy extends its expiring green by (only max-pressure extends)."""
+        extensions = np.zeros(len(rows), dtype=np.int32)
+        max_pressure = (self.strategy[rows] == MAX_PRESSURE) & (self.counts[rows].sum(axis=1) > 0)
+        if not max_pressure.any():
+            return extensions
+        
+        selected = rows[max_pressure]
+        pressure = self._pressures(selected)
+        current = self.active[selected]
+        current_pressure = pressure[np.arange(len(selected)), current]
+        green = self._clip(selected, self.counts[selected, current] * 60.0 / Config.SATURATION_FLOW)
+        headroom = self.max_durations[selected] - self.duration[selected]
+        extend = (current_pressure > 0) & (pressure.argmax(axis=1) == current)
+        extensions[max_pressure] = np.where(extend, np.maximum(np.minimum(green, headroom), 0), 0)
+        return extensions
+    
+    def _signal_timing(self, row: int) -> SignalTiming:
+        return SignalTiming(
+            int(self.min_durations[row]),
+            int(self.max_durations[row]),
+            int(self.yellow_durations[row]),
+            int(self.saturation_counts[row])
+        )
+    
+    def _set_phase(self, rows: np.ndarray, active, phase, duration, now: float) -> None:
+        self.active[rows] = active
+        self.phase[rows] = phase
+        self.duration[rows] = duration
+        self.changed_at[rows] = now
+    
+    def _grow(self, capacity: int, width: int) -> None:
+        """Reallocate every column to hold capacity rows and width directions, keeping contents."""
+        for name, (dtype, per_direction, fill) in _COLUMNS.items():
+            shape = (capacity, width) if per_direction else (capacity,)
+            array = np.full(shape, fill, dtype=dtype)
+            if self._capacity:
+                old = getattr(self, name)
+                if per_direction:
+                    array[:self._size, :self._width] = old[:self._size]
+                else:
+                    array[:self._size] = old[:self._size]
+            setattr(self, name, array)
+        self._capacity = capacity
+        self._width = width
+    
+    def _deadline_changed(self, intersection_id: str) -> None:
+        if self.deadline_listener is not None:
+            self.deadline_listener(intersection_id)
@@ -1,10 +1,12 @@
 import cv2
+import threading
+import time
 import numpy as np
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
-from ultralytics import YOLO
+from dataclasses import dataclass, field
 from config import Config
 from logger import setup_logger
+from inference_backends import load_model
 
 
 logger = setup_logger(__name__)
@@ -20,110 +22,431 @@ class Detection:
     is_emergency: bool
 
 
+@dataclass
+class DetectionBoxes:
+    """Columnar detection results for one frame, one row per box."""
+    class_ids: np.ndarray
+    confidences: np.ndarray
+    xyxy: np.ndarray
+    centers: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> "DetectionBoxes":
+        return cls(
+            class_ids=np.empty(0, dtype=np.int32),
+            confidences=np.empty(0, dtype=np.float32),
+            xyxy=np.empty((0, 4), dtype=np.int32),
+            centers=np.empty((0, 2), dtype=np.int32)
+        )
+    
+    @classmethod
+    def from_data(cls, data: np.ndarray) -> "DetectionBoxes":
+        """
+        Build from a YOLO boxes.data array with rows
+        (x1, y1, x2, y2, [track_id,] confidence, class_id).
+        """
+        if data.size == 0:
+            return cls.empty()
+        xyxy = data[:, :4].astype(np.int32)
+        return cls(
+            class_ids=data[:, -1].astype(np.int32),
+            confidences=data[:, -2].astype(np.float32),
+            xyxy=xyxy,
+            centers=(xyxy[:, :2] + xyxy[:, 2:]) // 2
+        )
+    
+    def __len__(self) -> int:
+        return len(self.class_ids)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.class_ids.nbytes + self.confidences.nbytes + self.xyxy.nbytes + self.centers.nbytes
+    
+    def shifted(self, dx: int, dy: int) -> "DetectionBoxes":
+        """Translate boxes from crop coordinates back to frame coordinates."""
+        if dx == 0 and dy == 0:
+            return self
+        return DetectionBoxes(
+            class_ids=self.class_ids,
+            confidences=self.confidences,
+            xyxy=self.xyxy + np.array([dx, dy, dx, dy], dtype=np.int32),
+            centers=self.centers + np.array([dx, dy], dtype=np.int32)
+        )
+    
+    def select(self, mask: np.ndarray) -> "DetectionBoxes":
+        return DetectionBoxes(
+            class_ids=self.class_ids[mask],
+            confidences=self.confidences[mask],
+            xyxy=self.xyxy[mask],
+            centers=self.centers[mask]
+        )
+
+
 @dataclass
 class FrameAnalysis:
     total_vehicles: int
     vehicle_breakdown: Dict[str, int]
     emergency_vehicles: int
     emergency_types: List[str]
-    detections: List[Detection]
+    boxes: DetectionBoxes
     frame_timestamp: float
+    class_names: Dict[int, str] = field(default_factory=dict, repr=False)
+    emergency_classes: frozenset = field(default_factory=frozenset, repr=False)
+    _detections: Optional[List[Detection]] = field(default=None, repr=False)
+    
+    @property
+    def detections(self) -> List[Detection]:
+        """Per-box Detection objects, materialized on first access."""
+        if self._detections is None:
+            self._detections = [
+                Detection(
+                    class_id=class_id,
+                    class_name=self.class_names.get(class_id, str(class_id)),
+                    confidence=confidence,
+                    bbox=tuple(bbox),
+                    center=tuple(center),
+                    is_emergency=self.class_names.get(class_id) in self.emergency_classes
+                )
+                for class_id, confidence, bbox, center in zip(
+                    self.boxes.class_ids.tolist(),
+                    self.boxes.confidences.tolist(),
+                    self.boxes.xyxy.tolist(),
+                    self.boxes.centers.tolist()
+                )
+            ]
+        return self._detections
+
+
+class CameraROI:
+    """
+    Polygon region of interest for one camera.
+    
+    The polygon is rasterized once into a mask over its bounding rectangle,
+    so membership tests for detection centers are array lookups.
+    """
+    
+    def __init__(self, polygon: List[Tuple[int, int]]):
+        points = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+        if len(points) < 3:
+            raise ValueError("ROI polygon needs at least 3 points")
+        
+        self.polygon = points
+        self.x, self.y, self.width, self.height = cv2.boundingRect(points)
+        self.mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [points - np.array([self.x, self.y], dtype=np.int32)], 1)
+        self.mask = self.mask.astype(bool)
+    
+    def crop(self, frame: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Crop a frame to the ROI bounding rectangle, clipped to the frame."""
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(0, self.x), max(0, self.y)
+        x1 = min(frame_w, self.x + self.width)
+        y1 = min(frame_h, self.y + self.height)
+        return frame[y0:y1, x0:x1], (x0, y0)
+    
+    def contains(self, centers: np.ndarray) -> np.ndarray:
+        """Boolean mask of which frame-coordinate centers fall inside the polygon."""
+        local_x = centers[:, 0] - self.x
+        local_y = centers[:, 1] - self.y
+        inside = (local_x >= 0) & (local_x < self.width) & (local_y >= 0) & (local_y < self.height)
+        result = np.zeros(len(centers), dtype=bool)
+        result[inside] = self.mask[local_y[inside], local_x[inside]]
+        return result
+
+
+@dataclass
+class _GateState:
+    reference: np.ndarray
+    analysis: FrameAnalysis
+    consecutive_skips: int = 0
+
+
+class MotionGate:
+    """
+    Cheap change detector that lets a camera reuse its last FrameAnalysis
+    while the scene is unchanged.
+    
+    Frames are downscaled to a small grayscale thumbnail and compared with
+    the thumbnail of the last frame that was actually inferred, using the
+    mean absolute difference in gray levels.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = Config.MOTION_GATE_THRESHOLD,
+        size: Tuple[int, int] = Config.MOTION_GATE_SIZE,
+        max_skipped: int = Config.MOTION_GATE_MAX_SKIPPED
+    ):
+        self.threshold = threshold
+        self.size = size
+        self.max_skipped = max_skipped
+        self._states: Dict[str, _GateState] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+    
+    def check(self, key: str, thumbnail: np.ndarray) -> Optional[FrameAnalysis]:
+        """Return the cached analysis if the frame is unchanged, else None."""
+        with self._lock:
+            stats = self._stats.setdefault(key, {"inferred": 0, "skipped": 0})
+            state = self._states.get(key)
+            if (
+                state is not None
+                and state.consecutive_skips < self.max_skipped
+                and cv2.absdiff(thumbnail, state.reference).mean() < self.threshold
+            ):
+                state.consecutive_skips += 1
+                stats["skipped"] += 1
+                return state.analysis
+            stats["inferred"] += 1
+            return None
+    
+    def store(self, key: str, thumbnail: np.ndarray, analysis: FrameAnalysis) -> None:
+        with self._lock:
+            self._states[key] = _GateState(reference=thumbnail, analysis=analysis)
+    
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+    
+    def get_stats(self) -> Dict[str, Dict]:
+        """Skipped vs. inferred frame counters per camera key."""
+        with self._lock:
+            return {
+                key: {
+                    **counts,
+                    "skip_ratio": counts["skipped"] / max(1, counts["inferred"] + counts["skipped"])
+                }
+                for key, counts in self._stats.items()
+            }
 
 
 class VehicleDetector:
-    def __init__(self, model_name: str = Config.YOLO_MODEL):
-        try:
-            self.model = YOLO(model_name)
-            logger.info(f"Loaded YOLO model: {model_name}")
-        except Exception as e:
-            logger.error(f"Failed to load YOLO model: {e}")
-            raise
+    def __init__(
+        self,
+        model_name: str = Config.YOLO_MODEL,
+        backend: str = Config.INFERENCE_BACKEND,
+        int8: bool = Config.INFERENCE_INT8,
+        pool=None
+    ):
+        """
+        Args:
+            model_name: YOLO weights to load
+            backend: Inference backend, see inference_backends.SUPPORTED_BACKENDS
+            int8: Use the INT8-quantized variant of the backend
+            pool: Optional DetectorPool; inference then runs in its worker
+                processes and no model is loaded in this process
+        """
+        self.pool = pool
+        # The in-process model is not thread-safe; the capture scheduler and detection threads share it.
+        self._model_lock = threading.Lock()
+        self.model_name = model_name
+        self.backend = backend
+        if pool is not None:
+            self.model = None
+            self.model_id = pool.model_id
+            class_names = pool.class_names
+        else:
+            try:
+                self.model = load_model(model_name, backend, int8)
+                self.model_id = f"{model_name}:{backend}" + (":int8" if int8 and backend != "torch" else "")
+                class_names = self.model.names
+                logger.info(f"Loaded YOLO model: {self.model_id}")
+            except Exception as e:
+                logger.error(f"Failed to load YOLO model: {e}")
+                raise
         
         self.confidence_threshold = Config.CONFIDENCE_THRESHOLD
+        self.imgsz = Config.INFERENCE_IMGSZ
         self.vehicle_classes = set(Config.VEHICLE_CLASSES)
-        self.emergency_classes = set(Config.EMERGENCY_CLASSES)
+        self.emergency_classes = frozenset(Config.EMERGENCY_CLASSES)
+        self.max_batch_size = max(1, Config.DETECTION_MAX_BATCH_SIZE)
+        self.motion_gate = MotionGate() if Config.MOTION_GATE_ENABLED else None
+        self.rois: Dict[str, CameraROI] = {}
+        for intersection in Config.INTERSECTIONS:
+            for direction, polygon in intersection.camera_rois.items():
+                self.set_roi(intersection.camera_key(direction), polygon)
+        self._build_class_tables(class_names)
+    
+    def _build_class_tables(self, names) -> None:
+        """Precompute class-id lookups used by the vectorized post-processing."""
+        if not isinstance(names, dict):
+            names = dict(enumerate(names))
+        self.class_names: Dict[int, str] = {int(i): n for i, n in names.items()}
+        self._num_classes = max(self.class_names, default=-1) + 1
+        
+        self._vehicle_class_ids = np.array(sorted(
+            i for i, n in self.class_names.items()
+            if n in self.vehicle_classes and n not in self.emergency_classes
+        ), dtype=np.intp)
+        self._emergency_lut = np.zeros(self._num_classes, dtype=bool)
+        for i, n in self.class_names.items():
+            if n in self.emergency_classes:
+                self._emergency_lut[i] = True
+        
+        # Passed to the model so NMS only ever sees classes we count.
+        wanted = self._vehicle_class_ids.tolist() + np.flatnonzero(self._emergency_lut).tolist()
+        self.class_filter: Optional[List[int]] = sorted(wanted) or None
+    
+    def set_roi(self, key: str, polygon: Optional[List[Tuple[int, int]]]) -> None:
+        """Set (or clear, with None) the polygon ROI for a camera key."""
+        if polygon is None:
+            self.rois.pop(key, None)
+        else:
+            self.rois[key] = CameraROI(polygon)
+        if self.motion_gate is not None:
+            self.motion_gate.reset(key)
     
-    def detect_vehicles(self, frame: np.ndarray) -> FrameAnalysis:
+    def detect_vehicles(self, frame: np.ndarray, key: Optional[str] = None) -> Optional[FrameAnalysis]:
         """
         Detect vehicles in a frame using YOLO.
         
         Args:
             frame: Input video frame
+            key: Camera key; frames from a keyed camera are motion-gated
             
         Returns:
-            FrameAnalysis object with detection results
+            FrameAnalysis object with detection results, or None if the
+            frame was invalid or detection failed
         """
-        if frame is None or frame.size == 0:
-            logger.warning("Invalid frame received")
-            return self._empty_analysis()
+        return self.detect_vehicles_batch([frame], [key])[0]
+    
+    def detect_vehicles_batch(
+        self,
+        frames: List[np.ndarray],
+        keys: Optional[List[str]] = None
+    ) -> List[Optional[FrameAnalysis]]:
+        """
+        Detect vehicles in several frames with one model call per batch.
         
-        try:
-            results = self.model(frame, conf=self.confidence_threshold, verbose=False)
-            
-            detections = []
-            vehicle_breakdown = {class_name: 0 for class_name in self.vehicle_classes}
-            emergency_types = []
-            emergency_count = 0
+        Frames of different sizes are letterboxed by the model into a
+        single padded batch, so cameras with different resolutions can
+        share a call.
+        
+        Args:
+            frames: Input video frames
+            keys: Optional camera key per frame. Keyed frames that are
+                unchanged since the camera's last inference reuse the
+                cached analysis instead of running the model, and keys
+                with an ROI are cropped to it before inference.
             
-            for result in results:
-                if result.boxes is None:
-                    continue
-                
-                for box in result.boxes:
-                    class_id = int(box.cls[0])
-                    class_name = self.model.names[class_id]
-                    confidence = float(box.conf[0])
-                    
-                    x1, y1, x2, y2 = box.xyxy[0]
-                    bbox = (int(x1), int(y1), int(x2), int(y2))
-                    center = (
-                        (int(x1) + int(x2)) // 2,
-                        (int(y1) + int(y2)) // 2
-                    )
-                    
-                    is_emergency = class_name in self.emergency_classes
-                    
-                    detection = Detection(
-                        class_id=class_id,
-                        class_name=class_name,
-                        confidence=confidence,
-                        bbox=bbox,
-                        center=center,
-                        is_emergency=is_emergency
-                    )
-                    detections.append(detection)
-                    
-                    if is_emergency:
-                        emergency_count += 1
-                        emergency_types.append(class_name)
-                    elif class_name in self.vehicle_classes:
-                        vehicle_breakdown[class_name] += 1
+        Returns:
+            One FrameAnalysis per input frame, in input order. Entries are
+            None where the frame was invalid or its chunk failed inference:
+            nothing was observed there, which is not the same as an empty road.
+        """
+        if keys is None:
+            keys = [None] * len(frames)
+        if len(keys) != len(frames):
+            raise ValueError("frames and keys must have the same length")
+        
+        analyses: List[Optional[FrameAnalysis]] = [None] * len(frames)
+        thumbnails: Dict[int, np.ndarray] = {}
+        offsets: Dict[int, Tuple[int, int]] = {}
+        frames = list(frames)
+        valid_indices = []
+        for i, frame in enumerate(frames):
+            roi = self.rois.get(keys[i]) if keys[i] is not None else None
+            if roi is not None and frame is not None and frame.size > 0:
+                frames[i], offsets[i] = roi.crop(frame)
+                frame = frames[i]
             
-            total_vehicles = sum(vehicle_breakdown.values())
+            if frame is None or frame.size == 0:
+                logger.warning(f"Invalid frame received (camera: {keys[i]})")
+                continue
             
-            analysis = FrameAnalysis(
-                total_vehicles=total_vehicles,
-                vehicle_breakdown=vehicle_breakdown,
-                emergency_vehicles=emergency_count,
-                emergency_types=list(set(emergency_types)),
-                detections=detections,
-                frame_timestamp=cv2.getTickCount() / cv2.getTickFrequency()
-            )
+            if self.motion_gate is not None and keys[i] is not None:
+                thumbnails[i] = self.motion_gate.thumbnail(frame)
+                cached = self.motion_gate.check(keys[i], thumbnails[i])
+                if cached is not None:
+                    analyses[i] = cached
+                    continue
             
-            return analysis
+            valid_indices.append(i)
         
-        except Exception as e:
-            logger.error(f"Error during vehicle detection: {e}")
-            return self._empty_analysis()
+        for start in range(0, len(valid_indices), self.max_batch_size):
+            chunk = valid_indices[start:start + self.max_batch_size]
+            try:
+                boxes_list = self._infer_boxes([frames[i] for i in chunk])
+                for i, boxes in zip(chunk, boxes_list):
+                    if i in offsets:
+                        boxes = boxes.shifted(*offsets[i])
+                        boxes = boxes.select(self.rois[keys[i]].contains(boxes.centers))
+                    analyses[i] = self._analyze_boxes(boxes)
+                    if i in thumbnails:
+                        self.motion_gate.store(keys[i], thumbnails[i], analyses[i])
+            except Exception as e:
+                logger.error(f"Error during vehicle detection: {e}")
+                for i in chunk:
+                    analyses[i] = None
+        
+        return analyses
+    
+    def warmup(self, iterations: int = Config.MODEL_WARMUP_ITERATIONS) -> None:
+        """Run inference on a blank frame so the first real request pays no setup cost."""
+        if self.pool is not None:
+            return  # pool workers warm up their own models on start
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        for _ in range(iterations):
+            self._infer_boxes([dummy])
+    
+    def get_gate_stats(self) -> Dict[str, Dict]:
+        """Per-camera counters of motion-gated (skipped) vs. inferred frames."""
+        if self.motion_gate is None:
+            return {}
+        return self.motion_gate.get_stats()
+    
+    def _infer_boxes(self, frames: List[np.ndarray]) -> List[DetectionBoxes]:
+        """
+        Run the model on a batch and convert each result in one bulk copy.
+        
+        Pooled inference may run concurrently; calls into the in-process
+        model are serialized, since an ultralytics model is not safe to
+        call from several threads at once.
+        """
+        if self.pool is not None:
+            return self.pool.infer(frames)
+        
+        with self._model_lock:
+            results = self.model(
+                frames,
+                conf=self.confidence_threshold,
+                imgsz=self.imgsz,
+                classes=self.class_filter,
+                verbose=False
+            )
+        return [
+            DetectionBoxes.from_data(result.boxes.data.cpu().numpy())
+            if result.boxes is not None else DetectionBoxes.empty()
+            for result in results
+        ]
     
-    def _empty_analysis(self) -> FrameAnalysis:
+    def _analyze_boxes(self, boxes: DetectionBoxes) -> FrameAnalysis:
+        counts = np.bincount(boxes.class_ids, minlength=self._num_classes)[:self._num_classes]
+        
+        vehicle_breakdown = {class_name: 0 for class_name in self.vehicle_classes}
+        for class_id, count in zip(self._vehicle_class_ids.tolist(), counts[self._vehicle_class_ids].tolist()):
+            vehicle_breakdown[self.class_names[class_id]] = count
+        
+        emergency_counts = counts * self._emergency_lut
+        
         return FrameAnalysis(
-            total_vehicles=0,
-            vehicle_breakdown={class_name: 0 for class_name in self.vehicle_classes},
-            emergency_vehicles=0,
-            emergency_types=[],
-            detections=[],
-            frame_timestamp=cv2.getTickCount() / cv2.getTickFrequency()
+            total_vehicles=sum(vehicle_breakdown.values()),
+            vehicle_breakdown=vehicle_breakdown,
+            emergency_vehicles=int(emergency_counts.sum()),
+            emergency_types=[self.class_names[i] for i in np.flatnonzero(emergency_counts).tolist()],
+            boxes=boxes,
+            frame_timestamp=cv2.getTickCount() / cv2.getTickFrequency(),
+            class_names=self.class_names,
+            emergency_classes=self.emergency_classes
         )
     
     def draw_detections(
@@ -175,3 +498,89 @@ class VehicleDetector:
                 )
         
         return output_frame
+
+
+class DetectorNotReadyError(RuntimeError):
+    """Raised when the detector is requested before it has finished loading."""
+
+
+class DetectorLoader:
+    """
+    Loads and warms up a VehicleDetector in a background thread so the
+    API can serve requests that don't need the model immediately.
+    """
+    
+    def __init__(self, factory=VehicleDetector, warmup_iterations: int = Config.MODEL_WARMUP_ITERATIONS):
+        self.factory = factory
+        self.warmup_iterations = warmup_iterations
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self._detector: Optional[VehicleDetector] = None
+        self._ready_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def start(self) -> "DetectorLoader":
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="detector-loader", daemon=True)
+                self._thread.start()
+        return self
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready_event.is_set() and self._detector is not None
+    
+    def get(self, timeout: Optional[float] = 0) -> VehicleDetector:
+        """
+        Return the loaded detector.
+        
+        Args:
+            timeout: Seconds to wait for loading to finish (None waits forever)
+            
+        Raises:
+            DetectorNotReadyError: If the detector is still loading or failed to load
+        """
+        self.start()
+        self._ready_event.wait(timeout)
+        if self._detector is None:
+            if self.state == "failed":
+                raise DetectorNotReadyError(f"Vehicle detector failed to load: {self.error}")
+            raise DetectorNotReadyError(f"Vehicle detector is not ready (state: {self.state})")
+        return self._detector
+    
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "model": self._detector.model_id if self._detector is not None else None,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error
+        }
+    
+    def _load(self) -> None:
+        try:
+            self.state = "loading"
+            start = time.monotonic()
+            detector = self.factory()
+            self.load_seconds = time.monotonic() - start
+            
+            self.state = "warming_up"
+            start = time.monotonic()
+            detector.warmup(self.warmup_iterations)
+            self.warmup_seconds = time.monotonic() - start
+            
+            self._detector = detector
+            self.state = "ready"
+            logger.info(
+                f"Vehicle detector ready (load {self.load_seconds:.2f}s, warmup {self.warmup_seconds:.2f}s)"
+            )
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Failed to initialize vehicle detector: {e}")
+        finally:
+            self._ready_event.set()
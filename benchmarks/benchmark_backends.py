@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Compare detection latency and throughput across inference backends.
+
+Usage:
+    python benchmarks/benchmark_backends.py --backends torch onnxruntime openvino --int8
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import Config
+from vehicle_detector import VehicleDetector
+
+
+def load_frames(image_path, batch_size):
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise SystemExit(f"Could not read image {image_path}")
+    else:
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    return [frame.copy() for _ in range(batch_size)]
+
+
+def benchmark(detector, frames, iterations, warmup):
+    for _ in range(warmup):
+        detector.detect_vehicles_batch(frames)
+    
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        detector.detect_vehicles_batch(frames)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    
+    latencies = np.array(latencies)
+    return {
+        "mean_ms": latencies.mean(),
+        "p50_ms": np.percentile(latencies, 50),
+        "p95_ms": np.percentile(latencies, 95),
+        "fps": iterations * len(frames) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnxruntime", "openvino"])
+    parser.add_argument("--int8", action="store_true", help="Also benchmark INT8 variants")
+    parser.add_argument("--model", default=Config.YOLO_MODEL)
+    parser.add_argument("--image", help="Image to run on (default: synthetic 720p frame)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+    
+    variants = [(backend, False) for backend in args.backends]
+    if args.int8:
+        variants += [(backend, True) for backend in args.backends if backend != "torch"]
+    
+    print(f"{'backend':<20}{'batch':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>10}")
+    for backend, int8 in variants:
+        label = backend + (" int8" if int8 else "")
+        try:
+            detector = VehicleDetector(args.model, backend=backend, int8=int8)
+        except Exception as e:
+            print(f"{label:<20} unavailable: {e}")
+            continue
+        
+        for batch_size in args.batch_sizes:
+            detector.max_batch_size = batch_size
+            stats = benchmark(detector, load_frames(args.image, batch_size), args.iterations, args.warmup)
+            print(
+                f"{label:<20}{batch_size:>6}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+                f"{stats['p95_ms']:>10.1f}{stats['fps']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare TrafficSignalController with VectorizedSignalController at city scale.
+
+Times initializing every intersection, feeding one vehicle count per
+approach, advancing every intersection once, and building status for the
+whole city (per-intersection dicts and the columnar status table).
+
+Usage:
+    python benchmarks/benchmark_controller.py --intersections 1000 10000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import SignalTiming
+from signal_controller import TrafficSignalController
+from vectorized_controller import VectorizedSignalController
+
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def advance_all(controller, ids, now):
+    if hasattr(controller, "step"):
+        controller.step(now)
+    else:
+        for intersection_id in ids:
+            controller.advance(intersection_id, now)
+
+
+def benchmark(controller_class, num_intersections, seed=0):
+    rng = np.random.default_rng(seed)
+    controller = controller_class(SignalTiming(min_duration=10, max_duration=60, yellow_duration=3))
+    ids = [f"INT_{index:05d}" for index in range(num_intersections)]
+    counts = rng.integers(0, 60, (num_intersections, len(DIRECTIONS))).tolist()
+
+    def initialize():
+        for intersection_id in ids:
+            controller.initialize_intersection(intersection_id, DIRECTIONS)
+
+    def update_counts():
+        for intersection_id, row in zip(ids, counts):
+            for direction, count in zip(DIRECTIONS, row):
+                controller.update_vehicle_counts(intersection_id, direction, count)
+
+    results = {
+        "init": timed(initialize),
+        "counts": timed(update_counts),
+        # Far enough ahead that every intersection is due.
+        "advance": timed(lambda: advance_all(controller, ids, time.monotonic() + 3600)),
+        "status": timed(lambda: [controller.get_intersection_status(i) for i in ids]),
+        "table": timed(controller.get_status_table)
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intersections", nargs="+", type=int, default=[1000, 10000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    columns = ["init", "counts", "advance", "status", "table"]
+    print(f"{'inters':>8}{'controller':>12}" + "".join(f"{name + ' ms':>12}" for name in columns))
+    for num_intersections in args.intersections:
+        for name, controller_class in (("object", TrafficSignalController), ("vectorized", VectorizedSignalController)):
+            results = benchmark(controller_class, num_intersections)
+            print(f"{num_intersections:>8}{name:>12}" + "".join(f"{results[c]:>12.2f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Time green-wave re-coordination of long corridors.
+
+Builds a straight arterial of evenly spaced intersections, gives every
+approach random demand, and times GreenWaveCoordinator.coordinate() (solve
+offsets and splits, then apply a plan to every intersection) with fresh
+demand on each repetition.
+
+Usage:
+    python benchmarks/benchmark_corridor.py --intersections 50 500 --controller vectorized
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import CorridorConfig, IntersectionConfig, SignalTiming
+from corridor_coordinator import GreenWaveCoordinator
+from signal_controller import TrafficSignalController
+from vectorized_controller import VectorizedSignalController
+
+CONTROLLERS = {"object": TrafficSignalController, "vectorized": VectorizedSignalController}
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def run(controller_class, num_intersections, spacing, repeats, seed=0):
+    rng = np.random.default_rng(seed)
+    controller = controller_class(SignalTiming())
+    ids = [f"INT_{index:05d}" for index in range(num_intersections)]
+    # Roughly spacing meters apart along a meridian.
+    intersections = [
+        IntersectionConfig(intersection_id, intersection_id, 40.0 + index * spacing / 111195.0, -74.0, {})
+        for index, intersection_id in enumerate(ids)
+    ]
+    for intersection_id in ids:
+        controller.initialize_intersection(intersection_id, DIRECTIONS)
+    coordinator = GreenWaveCoordinator(controller, [CorridorConfig("arterial", ids, "north")], intersections)
+    
+    timings = []
+    for _ in range(repeats):
+        demand = {
+            intersection_id: dict(zip(DIRECTIONS, rng.uniform(0, 10, len(DIRECTIONS)).tolist()))
+            for intersection_id in ids
+        }
+        start = time.perf_counter()
+        summary = coordinator.coordinate("arterial", demand)
+        timings.append((time.perf_counter() - start) * 1000)
+    return summary["cycle_length"], np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intersections", nargs="+", type=int, default=[10, 50, 500])
+    parser.add_argument("--spacing", type=float, default=400, help="Meters between intersections")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="object")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    print(f"{'inters':>8}{'cycle s':>9}{'mean ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for num_intersections in args.intersections:
+        cycle, timings = run(CONTROLLERS[args.controller], num_intersections, args.spacing, args.repeats)
+        print(
+            f"{num_intersections:>8}{cycle:>9}{timings.mean():>10.2f}"
+            f"{np.percentile(timings, 99):>10.2f}{timings.max():>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure detection-to-green latency of emergency preemption.
+
+Runs the SignalScheduler over many intersections on short phases and
+feeds EmergencyPreemptor a stream of camera frames, a few of which show
+an emergency vehicle for a run of consecutive frames. Latency is counted
+from the first frame that saw the vehicle, so it covers the debounce
+(confirm_frames frame intervals), any yellow clearance of a conflicting
+green and the scheduler's wake-up delay.
+
+Usage:
+    python benchmarks/benchmark_preemption.py --intersections 1000 --seconds 10
+    python benchmarks/benchmark_preemption.py --yellow 0 --controller vectorized
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import SignalTiming
+from emergency_preemption import EmergencyPreemptor
+from signal_controller import TrafficSignalController
+from signal_scheduler import SignalScheduler
+from vectorized_controller import VectorizedSignalController
+
+CONTROLLERS = {"object": TrafficSignalController, "vectorized": VectorizedSignalController}
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def run(controller_class, num_intersections, seconds, fps, yellow, confirm_frames, seed=0):
+    rng = random.Random(seed)
+    controller = controller_class(SignalTiming(min_duration=2, max_duration=5, yellow_duration=yellow))
+    ids = [f"INT_{index:05d}" for index in range(num_intersections)]
+    for intersection_id in ids:
+        controller.initialize_intersection(intersection_id, DIRECTIONS)
+    preemptor = EmergencyPreemptor(controller, confirm_frames=confirm_frames, clear_frames=3, max_hold=5)
+    scheduler = SignalScheduler(controller)
+    scheduler.start()
+    
+    # Camera -> frames left showing the vehicle; cameras not in it see none.
+    sightings = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame_start = time.monotonic()
+        if rng.random() < 0.5:
+            sightings[(rng.choice(ids), rng.choice(DIRECTIONS))] = rng.randint(confirm_frames, 4 * confirm_frames)
+        for (intersection_id, direction), remaining in list(sightings.items()):
+            preemptor.observe(intersection_id, direction, int(remaining > 0), frame_start)
+            if remaining > -3:
+                sightings[(intersection_id, direction)] = remaining - 1
+            else:
+                del sightings[(intersection_id, direction)]
+        time.sleep(max(0.0, 1.0 / fps - (time.monotonic() - frame_start)))
+    scheduler.stop()
+    return preemptor.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intersections", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=10, help="Frames per second per camera")
+    parser.add_argument("--yellow", type=float, default=1, help="Yellow clearance in seconds")
+    parser.add_argument("--confirm-frames", type=int, default=2)
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="object")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    
+    stats = run(
+        CONTROLLERS[args.controller], args.intersections, args.seconds, args.fps, args.yellow, args.confirm_frames
+    )
+    print(f"preemptions {stats['preemptions']}, rejected {stats['rejected']}, releases {stats['releases']}")
+    print(f"{'latency':>20}{'samples':>9}{'mean ms':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>10}")
+    for name in ("detection_to_preempt_ms", "detection_to_green_ms"):
+        latency = stats[name]
+        print(
+            f"{name[:-3]:>20}{latency['samples']:>9}{latency['mean']:>10.1f}"
+            f"{latency['p50']:>9.0f}{latency['p99']:>9.0f}{latency['max']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
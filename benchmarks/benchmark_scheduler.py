@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Measure SignalScheduler jitter and CPU cost with many intersections.
+
+Each run cycles every intersection on short phases for a while (busy),
+then idles with long phases and reports the CPU used while waiting.
+
+Usage:
+    python benchmarks/benchmark_scheduler.py --intersections 100 1000 5000 --seconds 10
+    python benchmarks/benchmark_scheduler.py --controller vectorized --intersections 10000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import SignalTiming
+from signal_controller import TrafficSignalController
+from signal_scheduler import SignalScheduler
+from vectorized_controller import VectorizedSignalController
+
+CONTROLLERS = {"object": TrafficSignalController, "vectorized": VectorizedSignalController}
+
+
+def make_controller(controller_class, num_intersections, timing):
+    controller = controller_class(timing)
+    for index in range(num_intersections):
+        controller.initialize_intersection(f"INT_{index:05d}")
+    return controller
+
+
+def run(controller_class, num_intersections, seconds, timing):
+    controller = make_controller(controller_class, num_intersections, timing)
+    scheduler = SignalScheduler(controller)
+    cpu_start = time.process_time()
+    scheduler.start()
+    time.sleep(seconds)
+    scheduler.stop()
+    cpu = time.process_time() - cpu_start
+    return scheduler.get_stats(), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intersections", nargs="+", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="object")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    busy = SignalTiming(min_duration=1, max_duration=1, yellow_duration=1)
+    idle = SignalTiming(min_duration=3600, max_duration=3600, yellow_duration=3)
+    
+    print(
+        f"{'inters':>8}{'transitions':>13}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'busy cpu %':>12}{'idle cpu %':>12}"
+    )
+    for num_intersections in args.intersections:
+        controller_class = CONTROLLERS[args.controller]
+        stats, busy_cpu = run(controller_class, num_intersections, args.seconds, busy)
+        _, idle_cpu = run(controller_class, num_intersections, args.seconds, idle)
+        jitter = stats["jitter_ms"]
+        print(
+            f"{num_intersections:>8}{stats['transitions']:>13}{jitter['p50']:>9.2f}{jitter['p99']:>9.2f}"
+            f"{jitter['max']:>9.2f}{100 * busy_cpu / args.seconds:>12.1f}{100 * idle_cpu / args.seconds:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
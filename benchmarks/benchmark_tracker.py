@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure per-frame ObjectTracker.update latency in congested scenes.
+
+Usage:
+    python benchmarks/benchmark_tracker.py --objects 50 200 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from object_tracker import ObjectTracker
+
+
+def make_scene(num_objects, rng):
+    # Spread objects so that neighbours are usually further apart than the gating distance.
+    side = int(np.ceil(np.sqrt(num_objects)))
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), -1).reshape(-1, 2)[:num_objects]
+    positions = grid * 80.0 + rng.uniform(0, 20, (num_objects, 2))
+    velocities = rng.uniform(-4, 4, (num_objects, 2))
+    return positions, velocities
+
+
+def to_detections(positions):
+    return [
+        {
+            "center": (int(x), int(y)),
+            "bbox": (int(x) - 10, int(y) - 10, int(x) + 10, int(y) + 10),
+            "class_name": "car",
+            "confidence": 0.9
+        }
+        for x, y in positions
+    ]
+
+
+def benchmark(num_objects, frames, hungarian_max_size, seed=0):
+    rng = np.random.default_rng(seed)
+    positions, velocities = make_scene(num_objects, rng)
+    tracker = ObjectTracker(hungarian_max_size=hungarian_max_size)
+    tracker.update(to_detections(positions))
+    
+    latencies = []
+    for _ in range(frames):
+        positions = positions + velocities
+        detections = to_detections(positions)
+        start = time.perf_counter()
+        tracker.update(detections)
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    id_switches = len(tracker.tracked_objects) - num_objects
+    return np.array(latencies), id_switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", nargs="+", type=int, default=[50, 200, 1000])
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+    
+    print(f"{'objects':>8}{'solver':>12}{'mean ms':>10}{'p95 ms':>10}{'new ids':>10}")
+    for num_objects in args.objects:
+        for solver, max_size in (("hungarian", 10 ** 9), ("greedy", 0)):
+            latencies, new_ids = benchmark(num_objects, args.frames, max_size)
+            print(
+                f"{num_objects:>8}{solver:>12}{latencies.mean():>10.2f}"
+                f"{np.percentile(latencies, 95):>10.2f}{new_ids:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Measure how TimingTuner throughput scales with worker processes.
+
+Tunes one four-way intersection (default scenarios, no result cache)
+with each worker count and reports simulated trials per second, speedup
+over one worker and parallel efficiency (speedup / workers). Trials are
+independent simulations, so efficiency should stay near 1 up to the
+number of physical cores.
+
+Usage:
+    python benchmarks/benchmark_tuner.py --workers 1 2 4 8
+    python benchmarks/benchmark_tuner.py --samples 16 --seeds 4 --minutes 30
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from timing_tuner import DEFAULT_SCENARIOS, IntersectionSpec, TimingTuner, TuningScenario
+
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+def spec():
+    scenarios = [
+        TuningScenario(name, dict(zip(DIRECTIONS, rates)), profile) for name, rates, profile in DEFAULT_SCENARIOS
+    ]
+    # Trials are cached by content, so tuning more identical intersections would not add work; seeds do.
+    return {"INT_001": IntersectionSpec(DIRECTIONS, scenarios)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", nargs="+", type=int, default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--samples", type=int, default=8, help="Random search candidates")
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--minutes", type=float, default=30)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    
+    print(f"cpu count {os.cpu_count()}")
+    print(f"{'workers':>8}{'trials':>8}{'seconds':>10}{'trials/s':>10}{'speedup':>9}{'efficiency':>12}")
+    baseline = None
+    for workers in args.workers:
+        tuner = TimingTuner(spec(), seeds=args.seeds, minutes=args.minutes, warmup=0, workers=workers)
+        start = time.perf_counter()
+        tuner.tune("random", args.samples)
+        elapsed = time.perf_counter() - start
+        rate = tuner.simulated / elapsed
+        baseline = baseline or rate
+        print(
+            f"{workers:>8}{tuner.simulated:>8}{elapsed:>10.2f}{rate:>10.1f}"
+            f"{rate / baseline:>9.2f}{rate / baseline / workers:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Load test: signal-state read latency while image detection is saturated.
+
+Runs against a live API server. First only readers poll the signal state
+endpoints to get a baseline; then uploader threads post images to
+/api/detection/image as fast as they can alongside the same readers.
+Every upload carries a few random trailing bytes (ignored by the image
+decoder) so the detection cache never answers it. With detection on its
+own bounded executor, read p99 under load should stay close to the
+baseline while excess uploads are refused with 503 instead of queueing.
+
+Start the server first, e.g. ENVIRONMENT=production python Backend/app.py
+
+Usage:
+    python benchmarks/load_test_api.py --url http://localhost:5000 --seconds 20
+    python benchmarks/load_test_api.py --image sample.jpg --readers 8 --uploaders 16
+"""
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+import requests
+
+READ_PATHS = ["/api/intersection/{intersection_id}/signal/state", "/api/intersections/signals"]
+
+
+def synthetic_image(width=1280, height=720):
+    frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def reader(url, paths, stop, latencies, errors):
+    session = requests.Session()
+    index = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = session.get(url + paths[index % len(paths)], timeout=30)
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors.append(response.status_code)
+        except requests.RequestException:
+            errors.append(None)
+        index += 1
+
+
+def uploader(url, image, intersection_id, stop, outcomes):
+    session = requests.Session()
+    while not stop.is_set():
+        try:
+            response = session.post(
+                url + "/api/detection/image",
+                files={"image": ("frame.jpg", image + os.urandom(8), "image/jpeg")},
+                data={"intersection_id": intersection_id, "direction": "north"},
+                timeout=60
+            )
+            outcomes.append(response.status_code)
+            if response.status_code == 503:
+                time.sleep(0.05)  # refused outright; back off a little instead of spinning
+        except requests.RequestException:
+            outcomes.append(None)
+
+
+def run_phase(args, paths, image, uploaders):
+    stop = threading.Event()
+    latencies, errors, outcomes = [], [], []
+    threads = [
+        threading.Thread(target=reader, args=(args.url, paths, stop, latencies, errors), daemon=True)
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(target=uploader, args=(args.url, image, args.intersection, stop, outcomes), daemon=True)
+        for _ in range(uploaders)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--image", help="Image to upload (default: a synthetic 1280x720 JPEG)")
+    parser.add_argument("--intersection", default="INT_001")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent signal-state readers")
+    parser.add_argument("--uploaders", type=int, default=16, help="Concurrent image uploaders in the load phase")
+    parser.add_argument("--seconds", type=float, default=15, help="Duration of each phase")
+    args = parser.parse_args()
+    
+    if args.image:
+        with open(args.image, "rb") as f:
+            image = f.read()
+    else:
+        image = synthetic_image()
+    paths = [path.format(intersection_id=args.intersection) for path in READ_PATHS]
+    requests.get(args.url + "/health", timeout=10).raise_for_status()
+    
+    print(
+        f"{'phase':>10}{'reads':>8}{'reads/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        f"{'errors':>8}{'uploads':>9}{'ok/s':>7}{'503':>7}"
+    )
+    for phase, uploaders in (("idle", 0), ("detecting", args.uploaders)):
+        latencies, errors, outcomes = run_phase(args, paths, image, uploaders)
+        reads = np.array(latencies) if latencies else np.zeros(1)
+        ok = sum(1 for status in outcomes if status == 200)
+        print(
+            f"{phase:>10}{len(latencies):>8}{len(latencies) / args.seconds:>9.0f}"
+            f"{np.percentile(reads, 50):>9.1f}{np.percentile(reads, 99):>9.1f}{reads.max():>9.1f}"
+            f"{len(errors):>8}{len(outcomes):>9}{ok / args.seconds:>7.1f}{outcomes.count(503):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Hammer TrafficSignalController from many threads and check consistency.
+
+Writer threads post vehicle counts and flow rates and occasionally trigger
+emergencies, while the SignalScheduler cycles every intersection on short
+phases and reader threads poll intersection status and the status table.
+Each writer owns a disjoint set of intersections, so the last count it
+wrote for an approach is the one the controller must end up with.
+
+Violations counted:
+  - more than one non-red signal in an intersection's status
+  - a snapshot version lower than one the same reader saw earlier
+  - a negative next_change_in or a status table with ragged columns
+  - a final vehicle count that differs from the last one written
+  - any exception raised by the controller
+
+Compare lock striping with a single global lock via --stripes 1.
+
+Usage:
+    python benchmarks/stress_controller.py --readers 8 --writers 8 --seconds 5
+    python benchmarks/stress_controller.py --stripes 1 64
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+
+from config import SignalTiming
+from signal_controller import TrafficSignalController
+from signal_scheduler import SignalScheduler
+
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.violations = 0
+        self.errors = []
+    
+    def add(self, reads=0, writes=0, violations=0, error=None):
+        with self.lock:
+            self.reads += reads
+            self.writes += writes
+            self.violations += violations
+            if error is not None and len(self.errors) < 5:
+                self.errors.append(error)
+
+
+def writer(controller, ids, stop, counters, last_written, seed):
+    rng = random.Random(seed)
+    writes = 0
+    while not stop.is_set():
+        intersection_id = rng.choice(ids)
+        direction = rng.choice(DIRECTIONS)
+        try:
+            roll = rng.random()
+            if roll < 0.01:
+                controller.handle_emergency(intersection_id, direction)
+            elif roll < 0.2:
+                controller.update_flow_rates(intersection_id, direction, rng.uniform(0, 30), rng.uniform(0, 30))
+            else:
+                count = rng.randint(0, 80)
+                controller.update_vehicle_counts(intersection_id, direction, count)
+                last_written[(intersection_id, direction)] = count
+            writes += 1
+        except Exception as e:
+            counters.add(error=repr(e))
+    counters.add(writes=writes)
+
+
+def reader(controller, ids, stop, counters, seed):
+    rng = random.Random(seed)
+    versions = {}
+    reads = violations = 0
+    while not stop.is_set():
+        try:
+            if rng.random() < 0.01:
+                table = controller.get_status_table()
+                if len({len(column) for column in table.values()}) != 1:
+                    violations += 1
+            else:
+                intersection_id = rng.choice(ids)
+                status = controller.get_intersection_status(intersection_id)
+                if sum(state != "red" for state in status["signal_states"].values()) > 1:
+                    violations += 1
+                if status["version"] < versions.get(intersection_id, -1):
+                    violations += 1
+                if status["next_change_in"] < 0:
+                    violations += 1
+                versions[intersection_id] = status["version"]
+            reads += 1
+        except Exception as e:
+            counters.add(error=repr(e))
+    counters.add(reads=reads, violations=violations)
+
+
+def run(stripes, num_intersections, num_readers, num_writers, seconds):
+    controller = TrafficSignalController(SignalTiming(min_duration=1, max_duration=2, yellow_duration=1), stripes)
+    ids = [f"INT_{index:05d}" for index in range(num_intersections)]
+    for intersection_id in ids:
+        controller.initialize_intersection(intersection_id, DIRECTIONS)
+    scheduler = SignalScheduler(controller)
+    scheduler.start()
+    
+    counters = Counters()
+    stop = threading.Event()
+    owned = [ids[index::num_writers] for index in range(num_writers)]
+    last_written = [{} for _ in range(num_writers)]
+    threads = [
+        threading.Thread(target=writer, args=(controller, owned[index], stop, counters, last_written[index], index))
+        for index in range(num_writers)
+    ] + [
+        threading.Thread(target=reader, args=(controller, ids, stop, counters, 1000 + index))
+        for index in range(num_readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    scheduler.stop()
+    
+    for written in last_written:
+        for (intersection_id, direction), count in written.items():
+            if controller.get_intersection_status(intersection_id)["vehicle_counts"].get(direction) != count:
+                counters.violations += 1
+    return counters, scheduler.get_stats()["transitions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stripes", nargs="+", type=int, default=[1, 64])
+    parser.add_argument("--intersections", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    
+    print(f"{'stripes':>8}{'reads/s':>11}{'writes/s':>11}{'phase chg':>11}{'violations':>12}{'errors':>8}")
+    for stripes in args.stripes:
+        counters, transitions = run(stripes, args.intersections, args.readers, args.writers, args.seconds)
+        print(
+            f"{stripes:>8}{counters.reads / args.seconds:>11.0f}{counters.writes / args.seconds:>11.0f}"
+            f"{transitions:>11}{counters.violations:>12}{len(counters.errors):>8}"
+        )
+        for error in counters.errors:
+            print(f"    {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Backend modules import each other as top-level modules, as when run from Backend/.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Backend"))
+os.environ.setdefault("LOG_FILE", os.devnull)
+os.environ.setdefault("SNAPSHOT_ENABLED", "false")
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from config import CorridorConfig, IntersectionConfig, SignalTiming
+from corridor_coordinator import GreenWaveCoordinator
+from signal_controller import TrafficSignalController
+from vectorized_controller import VectorizedSignalController
+
+DIRECTIONS = ["north", "east", "south", "west"]
+YELLOWS = {"A": 5, "B": 2}
+
+
+@pytest.fixture(params=[TrafficSignalController, VectorizedSignalController], ids=["object", "vectorized"])
+def controller(request):
+    controller = request.param(SignalTiming(min_duration=10, max_duration=60, yellow_duration=3))
+    for intersection_id, yellow in YELLOWS.items():
+        signal_timing = SignalTiming(min_duration=10, max_duration=60, yellow_duration=yellow)
+        controller.initialize_intersection(intersection_id, DIRECTIONS, signal_timing=signal_timing)
+    return controller
+
+
+def yellow_runs(controller, intersection_id, start, seconds, step=0.25):
+    """Lengths of the yellow intervals seen while stepping the intersection through time."""
+    runs, current = [], 0.0
+    for tick in range(int(seconds / step)):
+        controller.advance(intersection_id, start + tick * step)
+        if "yellow" in controller.get_signal_state(intersection_id).values():
+            current += step
+        elif current:
+            runs.append(current)
+            current = 0.0
+    return runs
+
+
+def test_coordinated_yellow_is_the_intersections_own(controller):
+    intersections = [
+        IntersectionConfig("A", "A", 12.97, 77.59, {}),
+        IntersectionConfig("B", "B", 12.97, 77.60, {})
+    ]
+    coordinator = GreenWaveCoordinator(controller, [CorridorConfig("main", ["A", "B"], "east")], intersections)
+    demand = {intersection_id: dict.fromkeys(DIRECTIONS, 10.0) for intersection_id in YELLOWS}
+    cycle = coordinator.coordinate("main", demand)["cycle_length"]
+    
+    start = time.monotonic()
+    for intersection_id, yellow in YELLOWS.items():
+        # The first run may be a partial phase while the intersection joins its plan.
+        runs = yellow_runs(controller, intersection_id, start, 3 * cycle)[1:]
+        assert runs and all(run == pytest.approx(yellow, abs=0.5) for run in runs)
@@ -0,0 +1,97 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from camera_capture import CapturedFrame, CaptureScheduler, LatestFrameBuffer
+from config import SignalTiming
+from emergency_preemption import EmergencyPreemptor
+from signal_controller import TrafficSignalController
+from vectorized_controller import VectorizedSignalController
+
+DIRECTIONS = ["north", "south", "east", "west"]
+
+
+@pytest.fixture(params=[TrafficSignalController, VectorizedSignalController], ids=["object", "vectorized"])
+def controller(request):
+    controller = request.param(SignalTiming(min_duration=10, max_duration=60, yellow_duration=0))
+    controller.initialize_intersection("A", DIRECTIONS)
+    return controller
+
+
+def test_rejected_preemption_is_retried_after_conflicting_release(controller):
+    preemptor = EmergencyPreemptor(controller, confirm_frames=2, clear_frames=3, max_hold=120)
+    for _ in range(2):
+        preemptor.observe("A", "north", 1)
+    assert preemptor.preemptions == 1
+    
+    # East is confirmed while north holds the junction, so its preemption is refused.
+    for _ in range(2):
+        preemptor.observe("A", "north", 1)
+        preemptor.observe("A", "east", 1)
+    assert preemptor.rejected == 1
+    assert preemptor.preemptions == 1
+    
+    for _ in range(3):
+        preemptor.observe("A", "north", 0)
+    assert preemptor.releases == 1
+    
+    # One missed frame of the east vehicle does not reset its confirmation.
+    preemptor.observe("A", "east", 0)
+    preemptor.observe("A", "east", 1)
+    assert preemptor.preemptions == 2
+    assert preemptor.rejected == 1
+    controller.advance("A")
+    assert controller.get_signal_state("A")["east"] == "green"
+    
+    for _ in range(3):
+        preemptor.observe("A", "east", 0)
+    assert preemptor.releases == 2
+    assert preemptor.get_stats()["tracking"] == 0
+
+
+def test_unconfirmed_vehicle_is_forgotten_on_a_miss(controller):
+    preemptor = EmergencyPreemptor(controller, confirm_frames=2, clear_frames=3, max_hold=120)
+    preemptor.observe("A", "east", 1)
+    preemptor.observe("A", "east", 0)
+    preemptor.observe("A", "east", 1)
+    assert preemptor.preemptions == 0
+    assert preemptor.get_stats()["tracking"] == 1
+
+
+class FailingDetector:
+    """Detector whose every inference fails, as detect_vehicles_batch reports it."""
+    
+    def __init__(self):
+        self.called = threading.Event()
+    
+    def detect_vehicles_batch(self, frames, keys=None):
+        self.called.set()
+        return [None] * len(frames)
+
+
+def test_failed_detection_does_not_clear_an_active_preemption(controller):
+    preemptor = EmergencyPreemptor(controller, confirm_frames=2, clear_frames=1, max_hold=120)
+    for _ in range(2):
+        preemptor.observe("A", "north", 1)
+    assert preemptor.get_stats()["active"] == 1
+    
+    frame_available = threading.Event()
+    reader = SimpleNamespace(
+        key="A_north", intersection_id="A", direction="north", buffer=LatestFrameBuffer(frame_available)
+    )
+    detector = FailingDetector()
+    scheduler = CaptureScheduler(
+        [reader], lambda: detector, controller, frame_available, emergency_preemptor=preemptor, idle_wait=0.01
+    )
+    reader.buffer.put(CapturedFrame(frame=np.zeros((8, 8, 3), np.uint8), captured_at=0.0, sequence=1))
+    scheduler.start()
+    assert detector.called.wait(5)
+    scheduler.stop()
+    scheduler.join(5)
+    
+    # With clear_frames=1 a single miss would have released north; a failed frame is no observation at all.
+    stats = preemptor.get_stats()
+    assert (stats["active"], stats["releases"]) == (1, 0)
+    assert scheduler.frame_age["A_north"]["processed"] == 0
@@ -0,0 +1,68 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from config import SignalTiming
+from signal_controller import TrafficSignalController
+from timing_strategies import STRATEGIES, WebsterStrategy
+from traffic_simulator import SimulatedApproach, SimulatedIntersection, TrafficSimulator
+from vectorized_controller import VectorizedSignalController
+
+DIRECTIONS = ["north", "south", "east", "west"]
+TIMING = SignalTiming(min_duration=10, max_duration=60, yellow_duration=3)
+
+
+def test_webster_total_ratio_does_not_drift():
+    strategy = WebsterStrategy(TIMING, DIRECTIONS)
+    rng = random.Random(0)
+    for _ in range(10000):
+        strategy.observe_flow(rng.choice(DIRECTIONS), round(rng.uniform(0, 12), 2), 0.0)
+    assert strategy.total_ratio == sum(strategy.ratios.values())
+
+
+def test_webster_split_matches_vectorized_controller():
+    rng = random.Random(1)
+    controller = VectorizedSignalController(TIMING)
+    controller.initialize_intersection("A", DIRECTIONS, strategy="webster")
+    strategy = WebsterStrategy(TIMING, DIRECTIONS)
+    row = controller.intersections["A"]
+    for _ in range(2000):
+        direction = rng.choice(DIRECTIONS)
+        rate = round(rng.uniform(0, 12), 2)
+        strategy.observe_flow(direction, rate, 0.0)
+        controller.update_flow_rates("A", direction, rate, 0.0)
+        columns = np.arange(len(DIRECTIONS))
+        expected = [strategy.green_duration(approach) for approach in DIRECTIONS]
+        assert controller._webster_durations(np.full(len(DIRECTIONS), row), columns).tolist() == expected
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_controllers_run_in_lockstep(strategy):
+    """Both controllers make identical decisions, so the same simulation gives the same delays."""
+    results = []
+    for controller_class in (TrafficSignalController, VectorizedSignalController):
+        intersection = SimulatedIntersection(
+            "SIM", [SimulatedApproach(direction, rate) for direction, rate in zip(DIRECTIONS, [9, 9, 2.5, 2.5])], strategy
+        )
+        simulator = TrafficSimulator(controller_class(TIMING), [intersection], seed=0)
+        results.append(simulator.run(3600)["intersections"]["SIM"])
+    for key in ("average_delay", "average_queue", "max_queue", "throughput"):
+        assert results[0][key] == results[1][key]
+
+
+
+@pytest.mark.parametrize("controller_class", [TrafficSignalController, VectorizedSignalController], ids=["object", "vectorized"])
+def test_simulation_does_not_depend_on_the_real_clock(controller_class, monkeypatch):
+    """A run is determined by its seed alone, whatever the monotonic clock read when it started."""
+    results = []
+    for started_at in (12.5, 987654.321):
+        monkeypatch.setattr(time, "monotonic", lambda: started_at)
+        intersection = SimulatedIntersection(
+            "SIM", [SimulatedApproach(direction, rate) for direction, rate in zip(DIRECTIONS, [9, 9, 2.5, 2.5])], "webster"
+        )
+        simulator = TrafficSimulator(controller_class(TIMING), [intersection], seed=0, emergency_rate=6)
+        result = simulator.run(1800, warmup=300)
+        results.append((result["totals"], result["emergencies"], result["intersections"]))
+    assert results[0] == results[1]